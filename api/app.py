@@ -2,22 +2,32 @@
 Reddit Newsletter API - Azure Deployment
 Fast API application for Reddit newsletter system
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import time
+_IMPORT_START = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 import os
+import json
+import asyncio
+from functools import partial
 from datetime import datetime
 import logging
 import sys
 from pathlib import Path
 
-# Import from scraper package
+# Import from scraper package (praw, psycopg2, jinja2 and requests are imported on first use)
 from scraper.config_manager import ConfigManager
-from scraper.reddit_scraper import RedditScraper
-from scraper.chatgpt_client import ChatGPTClient
-from scraper.newsletter_sender import NewsletterSender
-from scraper.database_manager import DatabaseManager
+from scraper.executor import BoundedExecutor, ExecutorOverloaded
+from scraper.job_registry import JobRegistry, JOB_FAILED, TERMINAL_STATUSES
+from scraper.lazy import Lazy, ServiceInitError, StartupReport
+from scraper.listing_cache import ListingCache, etag_matches
+from scraper.profiles import LISTING_TYPES, TIME_FILTERS
+from scraper.digest import normalize_subreddits
+from scraper.subscriber_token import read_token
+from scraper import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +36,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+startup_report = StartupReport(_IMPORT_START)
+startup_report.mark("imports")
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Reddit Newsletter API",
@@ -53,31 +66,100 @@ class SubscribeRequest(BaseModel):
     email: EmailStr
     subreddits: List[str]
 
-# Global instances (initialized on startup)
+# Configuration and executors are created on startup; every other service is built on first use
 config_manager = None
-reddit_scraper = None
-chatgpt_client = None
-newsletter_sender = None
-db_manager = None
+
+# Upper bound for ?limit= on /api/posts (one Reddit listing page)
+MAX_POSTS_LIMIT = 100
+
+# Upper bound on subreddits per subscriber
+MAX_SUBSCRIPTIONS = 50
+
+# How often /api/jobs/{id}/events re-reads the job row, and how long to stay silent before a keep-alive comment
+JOB_EVENTS_POLL_SECONDS = 1.0
+JOB_EVENTS_KEEPALIVE_SECONDS = 15.0
+
+# time_filter of /api/newsletter/send -> max post age in hours
+TIME_FILTER_HOURS = {"hour": 1, "day": 24, "week": 24 * 7, "month": 24 * 30, "year": 24 * 365, "all": 24 * 365 * 20}
+
+# Blocking work never runs on the event loop: short calls go to io_pool, full scrape/send jobs to job_pool
+io_pool = None
+job_pool = None
+settings_watcher = None
+
+def _build_reddit_scraper():
+    from scraper.reddit_scraper import RedditScraper
+    # The API only reads public listings and comments: app-only auth, no login round-trip
+    return RedditScraper(config_manager, read_only=True)
+
+def _build_newsletter_sender():
+    from scraper.newsletter_sender import NewsletterSender
+    return NewsletterSender(config_manager)
+
+def _build_db_manager():
+    from scraper.database_manager import DatabaseManager
+    return DatabaseManager(config_manager)
+
+def _build_listing_cache():
+    return ListingCache(
+        # Resolved per fetch so that a cache hit never needs the Reddit client
+        lambda *args: reddit_scraper().fetch_listing(*args),
+        ttl=config_manager.get_listing_cache_ttl(),
+        stale_ttl=config_manager.get_listing_cache_stale(),
+        max_entries=config_manager.get_listing_cache_max_entries(),
+        store=db_manager() if config_manager.get_listing_cache_shared() else None,
+        refresh_executor=io_pool
+    )
+
+reddit_scraper = Lazy("reddit", _build_reddit_scraper)
+newsletter_sender = Lazy("newsletter_sender", _build_newsletter_sender)
+db_manager = Lazy("database", _build_db_manager)
+job_registry = Lazy("job_registry", lambda: JobRegistry(db_manager()))
+listing_cache = Lazy("listing_cache", _build_listing_cache)
+SERVICES = (reddit_scraper, newsletter_sender, db_manager, job_registry, listing_cache)
+
+async def resolve(service: Lazy):
+    """Return a service instance, building it on the io pool the first time (construction blocks on network / DB)"""
+    if service.ready:
+        return service()
+    return await io_pool.run(service)
+
+async def watch_settings(interval: int):
+    """Reload the shared settings snapshot when .env changes (values read per request pick it up)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            config_manager.reload_if_changed()
+        except Exception as e:
+            logger.error(f"Settings reload check failed: {e}")
+
+def warm_up():
+    """Build the database and Reddit services in the background so the first real request does not pay for them"""
+    for service in (db_manager, reddit_scraper):
+        try:
+            service()
+        except ServiceInitError:
+            # Already logged; the next request that needs the service retries
+            pass
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup"""
-    global config_manager, reddit_scraper, chatgpt_client, newsletter_sender, db_manager
+    """Create configuration and executors; services are built lazily"""
+    global config_manager, io_pool, job_pool, settings_watcher
     
     try:
-        logger.info("Initializing services...")
-        
-        # Load configuration
         config_manager = ConfigManager()
         
-        # Initialize components
-        reddit_scraper = RedditScraper(config_manager)
-        chatgpt_client = ChatGPTClient(config_manager)
-        newsletter_sender = NewsletterSender(config_manager)
-        db_manager = DatabaseManager()
+        io_pool = BoundedExecutor("io", config_manager.get_api_io_workers(), config_manager.get_api_io_queue())
+        job_pool = BoundedExecutor("job", config_manager.get_api_job_workers(), config_manager.get_api_job_queue())
+        io_pool.submit(warm_up)
+        
+        reload_interval = config_manager.get_settings_reload_interval()
+        if reload_interval:
+            settings_watcher = asyncio.create_task(watch_settings(reload_interval))
         
-        logger.info("All services initialized successfully")
+        startup_report.mark("startup_event")
+        logger.info(startup_report.format())
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
         raise
@@ -86,12 +168,63 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down services...")
-    if db_manager:
-        db_manager.close()
+    if settings_watcher:
+        settings_watcher.cancel()
+    for pool in (io_pool, job_pool):
+        if pool:
+            pool.shutdown(wait=False)
+    db = db_manager.reset()
+    if db:
+        db.close()
+
+@app.exception_handler(ExecutorOverloaded)
+async def executor_overloaded_handler(request: Request, exc: ExecutorOverloaded):
+    """Shed load instead of queueing without bound"""
+    logger.warning(f"Rejected {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5" if exc.pool == "io" else "60"}
+    )
+
+@app.exception_handler(ServiceInitError)
+async def service_init_error_handler(request: Request, exc: ServiceInitError):
+    """A dependency (Reddit, Postgres, SMTP config) could not be built; the next request retries"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+def mark_first_healthy_response():
+    if startup_report.mark("first_healthy_response", once=True) is not None:
+        logger.info(f"First healthy response {startup_report.since_start() * 1000:.0f}ms after import")
+
+def run_tracked_job(job_id: str, func, *args):
+    """Run func(*args, progress=tracker) on the job pool and record the outcome in the job registry"""
+    tracker = job_registry().tracker(job_id)
+    try:
+        result = func(*args, progress=tracker) or {}
+    except BaseException as e:
+        tracker.finish(success=False, error=str(e) or type(e).__name__)
+        raise
+    tracker.finish(success=result.get("error") is None, error=result.get("error"), result=result)
+    return result
+
+async def submit_tracked_job(kind: str, params: dict, func, *args) -> str:
+    """Register a job and queue it on the job pool; returns the job ID"""
+    registry = await resolve(job_registry)
+    job_id = await io_pool.run(registry.create, kind, params)
+    try:
+        job_pool.submit(run_tracked_job, job_id, func, *args)
+    except ExecutorOverloaded as e:
+        await io_pool.run(registry.db.update_job, job_id, status=JOB_FAILED, error=f"Rejected: {e}")
+        raise
+    return job_id
+
+def job_links(job_id: str) -> dict:
+    return {"job_id": job_id, "status_url": f"/api/jobs/{job_id}", "events_url": f"/api/jobs/{job_id}/events"}
 
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint - health check"""
+    mark_first_healthy_response()
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -102,10 +235,11 @@ async def root():
 async def health_check():
     """Detailed health check"""
     try:
-        # Test database connection
-        if db_manager:
-            db_manager.test_connection()
+        # Test the database connection once it exists; a cold instance is healthy while it warms up
+        if db_manager.ready:
+            await io_pool.run(db_manager().test_connection)
         
+        mark_first_healthy_response()
         return {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
@@ -118,42 +252,58 @@ async def health_check():
 @app.get("/api/posts/{subreddit}")
 async def get_posts(
     subreddit: str,
+    request: Request,
     limit: int = 10,
-    time_filter: str = "day"
+    time_filter: str = "day",
+    listing: str = "top"
 ):
-    """Fetch posts from a subreddit"""
+    """Fetch posts from a subreddit (read-through listing cache, ETag / If-None-Match aware)"""
     try:
-        if not reddit_scraper:
-            raise HTTPException(status_code=503, detail="Reddit service not initialized")
+        if listing not in LISTING_TYPES:
+            raise HTTPException(status_code=400, detail=f"listing must be one of {', '.join(LISTING_TYPES)}")
+        if time_filter not in TIME_FILTERS:
+            raise HTTPException(status_code=400, detail=f"time_filter must be one of {', '.join(TIME_FILTERS)}")
+        limit = max(1, min(limit, MAX_POSTS_LIMIT))
         
-        posts = reddit_scraper.fetch_top_posts(
-            subreddit=subreddit,
-            limit=limit,
-            time_filter=time_filter
-        )
+        cache = await resolve(listing_cache)
+        entry, cache_status = await io_pool.run(cache.get, subreddit, listing, time_filter, limit)
         
-        return {
-            "subreddit": subreddit,
-            "count": len(posts),
-            "posts": posts,
-            "timestamp": datetime.now().isoformat()
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": (
+                f"public, max-age={max(0, int(cache.ttl - entry.age()))}, "
+                f"stale-while-revalidate={cache.stale_ttl}"
+            ),
+            "X-Cache": cache_status.upper()
         }
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        
+        return JSONResponse(
+            {
+                "subreddit": subreddit,
+                "listing": listing,
+                "time_filter": time_filter,
+                "count": len(entry.posts),
+                "posts": entry.posts,
+                "fetched_at": datetime.fromtimestamp(entry.fetched_at).isoformat()
+            },
+            headers=headers
+        )
+    except (HTTPException, ExecutorOverloaded, ServiceInitError):
+        raise
     except Exception as e:
         logger.error(f"Error fetching posts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/newsletter/send")
-async def send_newsletter(
-    background_tasks: BackgroundTasks,
-    request: NewsletterRequest
-):
+async def send_newsletter(request: NewsletterRequest):
     """Generate and send newsletter"""
     try:
-        if not all([reddit_scraper, chatgpt_client, newsletter_sender]):
-            raise HTTPException(status_code=503, detail="Services not initialized")
-        
-        # Add task to background
-        background_tasks.add_task(
+        # Run on the job pool; raises ExecutorOverloaded (429) when the pool is full
+        job_id = await submit_tracked_job(
+            "newsletter_send",
+            request.model_dump(),
             process_newsletter,
             request.subreddit,
             request.limit,
@@ -163,125 +313,163 @@ async def send_newsletter(
         return {
             "status": "processing",
             "message": f"Newsletter generation started for r/{request.subreddit}",
+            **job_links(job_id),
             "timestamp": datetime.now().isoformat()
         }
+    except (HTTPException, ExecutorOverloaded, ServiceInitError):
+        raise
     except Exception as e:
         logger.error(f"Error sending newsletter: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/scraper/run")
-async def trigger_scraper_job(background_tasks: BackgroundTasks):
+async def trigger_scraper_job():
     """Manually trigger a scraper job"""
     try:
-        if not all([reddit_scraper, chatgpt_client, newsletter_sender, db_manager]):
-            raise HTTPException(status_code=503, detail="Services not initialized")
+        # Imported here: run_job configures logging and pulls in every scraper module
+        from scraper.run_job import run_scraper_job
         
-        # Add scraper job to background
-        background_tasks.add_task(run_scraper_job)
+        # Run on the job pool; raises ExecutorOverloaded (429) when the pool is full
+        job_id = await submit_tracked_job("scraper_run", {}, partial(run_scraper_job, exit_on_error=False))
         
         return {
             "status": "started",
             "message": "Scraper job started in background",
+            **job_links(job_id),
             "timestamp": datetime.now().isoformat()
         }
+    except (HTTPException, ExecutorOverloaded, ServiceInitError):
+        raise
     except Exception as e:
         logger.error(f"Error starting scraper job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_newsletter(subreddit: str, limit: int, time_filter: str):
-    """Background task to process newsletter"""
-    try:
-        logger.info(f"Processing newsletter for r/{subreddit}")
-        
-        # Fetch posts
-        posts = reddit_scraper.fetch_top_posts(subreddit, limit, time_filter)
-        
-        # Generate summary
-        summary = chatgpt_client.generate_summary(posts)
-        
-        # Send newsletter
-        newsletter_sender.send(summary)
-        
+def process_newsletter(subreddit: str, limit: int, time_filter: str, progress=None):
+    """Background task to process newsletter (runs on the job pool)"""
+    logger.info(f"Processing newsletter for r/{subreddit}")
+    progress = progress or (lambda stage=None, **counters: None)
+    
+    # Fetch posts
+    progress("fetch")
+    max_age_hours = TIME_FILTER_HOURS.get(time_filter, 24)
+    posts = reddit_scraper().fetch_subreddit_posts(subreddit, limit=limit, max_age_hours=max_age_hours)
+    progress(posts_fetched=len(posts))
+    
+    selected_posts = newsletter_sender().rank_candidates(posts, limit)
+    if not selected_posts:
+        logger.info(f"No posts found for r/{subreddit}")
+        return {"posts_fetched": len(posts), "posts_sent": 0, "sent": False, "error": None}
+    
+    # Comments and summaries for the selected posts
+    progress("enrich", summaries_total=len(selected_posts))
+    for done, post in enumerate(selected_posts, 1):
+        reddit_scraper().enrich_post(post)
+        progress(summaries_done=done)
+    
+    # Send newsletter
+    progress("send")
+    success, _ = newsletter_sender().send_newsletter(selected_posts)
+    if success:
+        progress(messages_sent=len(config_manager.get_recipients()))
         logger.info(f"Newsletter sent successfully for r/{subreddit}")
-    except Exception as e:
-        logger.error(f"Error processing newsletter: {e}")
+    
+    return {
+        "posts_fetched": len(posts),
+        "posts_sent": len(selected_posts) if success else 0,
+        "sent": success,
+        "error": None if success else "Failed to send newsletter"
+    }
 
-def run_scraper_job():
-    """Background task to run complete scraper job"""
+@app.post("/api/digest/send")
+async def send_digests():
+    """Send every active subscriber a digest of their own subreddits"""
     try:
-        logger.info("=== Starting scraper job ===")
+        from scraper.run_job import run_digest_job
         
-        # Get hot posts from Reddit
-        posts_limit = config_manager.get_posts_limit()
-        posts = reddit_scraper.get_hot_posts(limit=posts_limit)
-        logger.info(f"Fetched {len(posts)} posts from Reddit")
-        
-        # Filter new posts
-        new_posts = db_manager.filter_new_posts(posts)
-        logger.info(f"Found {len(new_posts)} new posts")
-        
-        if not new_posts:
-            logger.info("No new posts to send")
-            return
-        
-        # Limit posts for newsletter
-        newsletter_limit = config_manager.get_newsletter_posts_limit()
-        selected_posts = new_posts[:newsletter_limit]
-        logger.info(f"Selected {len(selected_posts)} posts for newsletter")
-        
-        # Generate summaries using ChatGPT
-        if config_manager.get_enable_gpt_summaries():
-            for post in selected_posts:
-                try:
-                    summary = chatgpt_client.summarize_and_analyze(post)
-                    post['gpt_summary'] = summary
-                except Exception as e:
-                    logger.warning(f"Failed to generate summary for {post['id']}: {e}")
-                    post['gpt_summary'] = None
-        
-        # Generate editor words
-        if config_manager.get_enable_editor_summary():
-            try:
-                editor_words = chatgpt_client.generate_editor_words(selected_posts)
-            except Exception as e:
-                logger.warning(f"Failed to generate editor words: {e}")
-                editor_words = None
-        else:
-            editor_words = None
-        
-        # Send newsletter
-        success = newsletter_sender.send_newsletter(selected_posts, editor_words)
-        
-        if success:
-            db_manager.mark_posts_as_sent(selected_posts)
-            recipients = config_manager.get_email_recipients()
-            db_manager.log_newsletter_send(
-                posts_count=len(selected_posts),
-                success=True,
-                recipients=recipients,
-                editor_words=editor_words,
-                newsletter_title=config_manager.get_newsletter_title()
-            )
-            logger.info("Newsletter sent successfully")
-        else:
-            logger.error("Failed to send newsletter")
-            
-        logger.info("=== Scraper job completed ===")
+        # Run on the job pool; raises ExecutorOverloaded (429) when the pool is full
+        job_id = await submit_tracked_job("digest_send", {}, partial(run_digest_job, exit_on_error=False))
         
+        return {
+            "status": "started",
+            "message": "Digest job started in background",
+            **job_links(job_id),
+            "timestamp": datetime.now().isoformat()
+        }
+    except (HTTPException, ExecutorOverloaded, ServiceInitError):
+        raise
     except Exception as e:
-        logger.error(f"Error in scraper job: {e}", exc_info=True)
+        logger.error(f"Error starting digest job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 20, kind: Optional[str] = None):
+    """Recently registered jobs"""
+    registry = await resolve(job_registry)
+    return {"jobs": await io_pool.run(registry.list, limit, kind)}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, stage progress, timings and outcome"""
+    registry = await resolve(job_registry)
+    job = await io_pool.run(registry.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-sent events: a `progress` event whenever the job row changes, then `end` once it finishes"""
+    registry = await resolve(job_registry)
+    job = await io_pool.run(registry.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    async def events():
+        current, last_update, idle = job, None, 0.0
+        while True:
+            if current is not None and current["updated_at"] != last_update:
+                last_update, idle = current["updated_at"], 0.0
+                yield f"event: progress\ndata: {json.dumps(current, ensure_ascii=False, default=str)}\n\n"
+                if current["status"] in TERMINAL_STATUSES:
+                    yield f"event: end\ndata: {json.dumps({'status': current['status']})}\n\n"
+                    return
+            elif idle >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            idle += JOB_EVENTS_POLL_SECONDS
+            try:
+                # Re-read from Postgres so progress written by any replica shows up
+                current = await io_pool.run(registry.get, job_id)
+            except ExecutorOverloaded:
+                current = None
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/stats")
 async def get_stats():
     """Get system statistics"""
     try:
-        if not db_manager:
-            raise HTTPException(status_code=503, detail="Database not initialized")
-        
-        # Get stats from database
         stats = {
             "timestamp": datetime.now().isoformat(),
-            "status": "operational"
+            "status": "operational",
+            "startup": startup_report.to_dict(),
+            "services": {
+                service.name: {
+                    "ready": service.ready,
+                    "init_ms": round(service.init_seconds * 1000, 1) if service.init_seconds is not None else None
+                }
+                for service in SERVICES
+            },
+            "executors": {pool.name: pool.status() for pool in (io_pool, job_pool) if pool},
+            "listing_cache": listing_cache().stats() if listing_cache.ready else None
         }
         
         return stats
@@ -289,23 +477,65 @@ async def get_stats():
         logger.error(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.post("/api/subscribe")
 async def subscribe(request: SubscribeRequest):
-    """Subscribe to newsletter"""
+    """Subscribe to newsletter (replaces the subscriber's subreddit set)"""
     try:
-        if not db_manager:
-            raise HTTPException(status_code=503, detail="Database not initialized")
+        subreddits = normalize_subreddits(request.subreddits)
+        if not subreddits:
+            raise HTTPException(status_code=400, detail="subreddits must contain at least one valid subreddit name")
+        if len(subreddits) > MAX_SUBSCRIPTIONS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_SUBSCRIPTIONS} subreddits per subscriber")
+        
+        db = await resolve(db_manager)
+        email = request.email.lower()
+        if await io_pool.run(db.upsert_subscriber, email, subreddits) is None:
+            raise HTTPException(status_code=500, detail="Failed to save subscription")
         
-        # Add subscription logic here
         return {
             "status": "success",
-            "message": f"Subscribed {request.email} to {len(request.subreddits)} subreddits",
+            "message": f"Subscribed {email} to {len(subreddits)} subreddits",
+            "subreddits": subreddits,
             "timestamp": datetime.now().isoformat()
         }
+    except (HTTPException, ExecutorOverloaded, ServiceInitError):
+        raise
     except Exception as e:
         logger.error(f"Error subscribing: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def subscriber_email(token: str) -> str:
+    """Email address in a signed subscriber token (sent only in that subscriber's digest); 403 when it does not verify"""
+    email = read_token(token, config_manager.get_web_secret_key())
+    if email is None:
+        raise HTTPException(status_code=403, detail="Invalid subscriber token")
+    return email
+
+@app.get("/api/subscribe/{token}")
+async def get_subscription(token: str):
+    """Subscriber status and subreddits"""
+    email = subscriber_email(token)
+    db = await resolve(db_manager)
+    subscriber = await io_pool.run(db.get_subscriber, email)
+    if subscriber is None:
+        raise HTTPException(status_code=404, detail=f"Subscriber {email} not found")
+    return subscriber
+
+@app.delete("/api/subscribe/{token}")
+@app.post("/api/unsubscribe/{token}")
+async def unsubscribe(token: str):
+    """Unsubscribe from all digests (POST is the one-click target of the digest's List-Unsubscribe header)"""
+    email = subscriber_email(token)
+    db = await resolve(db_manager)
+    if not await io_pool.run(db.deactivate_subscriber, email):
+        raise HTTPException(status_code=404, detail=f"Subscriber {email} not found")
+    return {"status": "success", "message": f"Unsubscribed {email}", "timestamp": datetime.now().isoformat()}
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,272 @@
+"""Cassette - Reddit / OpenAI HTTP 请求的录制和回放模块
+
+重新运行一次任务来分析性能或排查问题，每次都要消耗真实的 API 配额，拿到的数据也不一样，前后两次的性能对比没有意义。
+这里在 HTTP 层（requests.Session）录制 RedditScraper（通过 prawcore 的 requestor）和 ChatGPTClient._call_gpt 的全部请求，
+之后可以完全离线、确定性地回放整个 run_scraper_job：
+
+- 录制（HTTP_CASSETTE_MODE=record）：真实请求，响应体压缩（zlib）后追加到 <HTTP_CASSETTE>/interactions.dat，
+  index.json 记录每个请求键对应的记录位置；请求头和请求体都不保存（请求键只包含请求体的哈希），access token 会被替换
+- 回放（HTTP_CASSETTE_MODE=replay）：按请求键查索引，同一个键按录制顺序依次返回，读完后重复最后一个；
+  没有录制的请求抛出 CassetteMiss（ConnectionError 的子类，按网络错误处理）
+- 回放延迟（HTTP_CASSETTE_LATENCY）：original 按录制时的耗时，none 不等待，2x 为录制耗时的倍数，50 为固定 50 毫秒
+- Reddit 响应中的 created / created_utc 按录制到回放经过的时间平移，帖子的年龄（时间窗口过滤、排序的速度）与录制时一致；
+  X-Ratelimit-* 响应头不回放，回放时也不经过令牌桶，耗时只由延迟配置决定
+
+请求键：方法 + URL（查询参数合并、排序）+ 请求体的 SHA-1。获取 access token 的请求体包含账号和密码，
+不加盐的哈希可以离线穷举，这个请求只按方法 + URL 作为键。
+
+    HTTP_CASSETTE=cassettes/monday HTTP_CASSETTE_MODE=record python scraper/run_job.py
+    python scraper/run_job.py --replay cassettes/monday
+"""
+
+import os
+import json
+import time
+import zlib
+import atexit
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+DATA_FILE = "interactions.dat"
+CASSETTE_VERSION = 1
+
+# 录制时每追加这么多条记录写一次索引（退出时总会写入）
+INDEX_FLUSH_EVERY = 50
+
+# 请求体包含凭据的请求：请求键不包含请求体的哈希
+_CREDENTIAL_PATHS = ("/api/v1/access_token",)
+
+# 不回放的响应头：内容已经解压，回放时不经过限流
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "set-cookie")
+_RATELIMIT_HEADER_PREFIX = "x-ratelimit-"
+_TIME_FIELDS = ("created", "created_utc")
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """回放时请求没有录制"""
+
+
+def request_key(method: str, url: str, params=None, data=None, json_body=None) -> str:
+    """请求键：方法 + URL（查询参数合并、排序）+ 请求体的 SHA-1（不保存请求体本身；凭据请求不包含请求体）"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items()) if isinstance(params, dict) else list(params)
+    key = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}"
+    if query:
+        key += "?" + urlencode(sorted((str(name), str(value)) for name, value in query))
+    if parts.path.endswith(_CREDENTIAL_PATHS):
+        return key
+
+    if json_body is not None:
+        body = json.dumps(json_body, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    elif isinstance(data, dict):
+        body = urlencode(sorted((str(name), str(value)) for name, value in data.items())).encode("utf-8")
+    elif isinstance(data, (list, tuple)):
+        body = urlencode(sorted((str(name), str(value)) for name, value in data)).encode("utf-8")
+    elif isinstance(data, str):
+        body = data.encode("utf-8")
+    else:
+        body = data or b""
+    if body:
+        key += "#" + hashlib.sha1(body).hexdigest()
+    return key
+
+
+def _shift_times(value, offset: float):
+    """把 JSON 中的 created / created_utc 平移 offset 秒（原地修改）"""
+    if isinstance(value, dict):
+        for name, item in value.items():
+            if name in _TIME_FIELDS and isinstance(item, (int, float)) and not isinstance(item, bool):
+                value[name] = item + offset
+            elif isinstance(item, (dict, list)):
+                _shift_times(item, offset)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                _shift_times(item, offset)
+
+
+class Cassette:
+    """
+    一盘磁带：一个目录，包含索引和压缩的响应记录（线程安全，多个 session 可以共用）
+
+    Args:
+        path: 磁带目录
+        mode: record / replay
+        latency_scale: 回放时按录制耗时的倍数等待
+        latency_ms: 回放时每个请求额外等待的毫秒数
+    """
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0, latency_ms: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.latency_ms = latency_ms
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(path, INDEX_FILE)
+        self._data_path = os.path.join(path, DATA_FILE)
+        # 请求键 -> [(偏移, 长度)]，按录制顺序
+        self._entries: Dict[str, List[Tuple[int, int]]] = {}
+        self._played: Dict[str, int] = {}
+        self._unflushed = 0
+        self.misses = 0
+
+        if mode == "record":
+            os.makedirs(path, exist_ok=True)
+            # 同一个目录重新录制时覆盖旧记录
+            self._data = open(self._data_path, "wb")
+            self._offset = 0
+            self.recorded_at = time.time()
+            atexit.register(self.close)
+        else:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}: {index.get('version')}")
+            self._entries = {key: [tuple(entry) for entry in entries] for key, entries in index["entries"].items()}
+            self.recorded_at = index["recorded_at"]
+            self._data = open(self._data_path, "rb")
+            self._time_offset = time.time() - self.recorded_at
+            logger.info(f"Replaying {sum(map(len, self._entries.values()))} recorded HTTP interactions from {path}")
+
+    def session(self) -> "CassetteSession":
+        """创建一个经过这盘磁带的 requests.Session"""
+        return CassetteSession(self)
+
+    def handle(self, session: requests.Session, method: str, url: str, params=None, data=None, json=None, **kwargs):
+        key = request_key(method, url, params, data, json)
+        if self.mode == "replay":
+            return self._replay(key, method, url)
+
+        start = time.perf_counter()
+        response = requests.Session.request(session, method, url, params=params, data=data, json=json, **kwargs)
+        self._record(key, method, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, key: str, method: str, response: requests.Response, elapsed: float):
+        body = response.content
+        if urlsplit(response.url).path.endswith(_CREDENTIAL_PATHS):
+            # 不保存真实的 token，回放时任意值都可以
+            try:
+                token = response.json()
+                for name in ("access_token", "refresh_token"):
+                    if name in token:
+                        token[name] = "cassette"
+                body = json.dumps(token).encode("utf-8")
+            except (ValueError, TypeError):
+                pass
+        meta = {
+            "method": method.upper(),
+            "url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS},
+            "elapsed": round(elapsed, 6),
+        }
+        record = zlib.compress(json.dumps(meta).encode("utf-8") + b"\n" + body)
+        with self._lock:
+            self._data.write(record)
+            self._data.flush()
+            self._entries.setdefault(key, []).append((self._offset, len(record)))
+            self._offset += len(record)
+            self._unflushed += 1
+            if self._unflushed >= INDEX_FLUSH_EVERY:
+                self._write_index()
+
+    def _replay(self, key: str, method: str, url: str) -> requests.Response:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                logger.warning(f"No recorded response for {key}")
+                raise CassetteMiss(f"No recorded response for {method.upper()} {url}")
+            position = self._played.get(key, 0)
+            self._played[key] = position + 1
+            offset, length = entries[min(position, len(entries) - 1)]
+            self._data.seek(offset)
+            record = self._data.read(length)
+
+        meta, body = zlib.decompress(record).split(b"\n", 1)
+        meta = json.loads(meta)
+        headers = CaseInsensitiveDict(
+            (name, value) for name, value in meta["headers"].items() if not name.lower().startswith(_RATELIMIT_HEADER_PREFIX)
+        )
+        if "reddit.com" in urlsplit(meta["url"]).netloc and body[:1] in (b"{", b"["):
+            payload = json.loads(body)
+            _shift_times(payload, self._time_offset)
+            body = json.dumps(payload).encode("utf-8")
+        headers["Content-Length"] = str(len(body))
+
+        delay = meta["elapsed"] * self.latency_scale + self.latency_ms / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta["reason"]
+        response.headers = headers
+        response.url = meta["url"]
+        response.encoding = get_encoding_from_headers(headers)
+        response.elapsed = timedelta(seconds=delay)
+        response._content = body
+        return response
+
+    def _write_index(self):
+        index = {"version": CASSETTE_VERSION, "recorded_at": self.recorded_at, "entries": self._entries}
+        temporary = self._index_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(temporary, self._index_path)
+        self._unflushed = 0
+
+    def close(self):
+        """录制时写入索引；可以重复调用"""
+        with self._lock:
+            if self._data.closed:
+                return
+            if self.mode == "record":
+                self._write_index()
+                logger.info(f"Recorded {sum(map(len, self._entries.values()))} HTTP interactions to {self.path}")
+            self._data.close()
+
+
+class CassetteSession(requests.Session):
+    """经过磁带的 requests.Session：录制时发出真实请求并保存，回放时不访问网络"""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def request(self, method, url, params=None, data=None, json=None, **kwargs):
+        return self.cassette.handle(self, method, url, params=params, data=data, json=json, **kwargs)
+
+
+_cassettes: Dict[Tuple[str, str], Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(config) -> Optional[Cassette]:
+    """按 HTTP_CASSETTE_* 配置返回进程内共用的磁带，未启用时返回None"""
+    settings = config.get_cassette_settings()
+    if settings.mode == "off":
+        return None
+    key = (os.path.abspath(settings.path), settings.mode)
+    with _cassettes_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            cassette = _cassettes[key] = Cassette(settings.path, settings.mode, settings.latency_scale, settings.latency_ms)
+        return cassette
@@ -1,7 +1,8 @@
 import os
-import requests
 from typing import List
 from .config_manager import ConfigManager
+from .tracing import span, incr
+from .metrics import OPENAI_REQUEST_SECONDS, OPENAI_TOKENS, OPENAI_FAILURES
 
 
 class ChatGPTClient:
@@ -16,6 +17,7 @@ class ChatGPTClient:
         self.api_key = self.config.get_chatgpt_api_key()
         self.api_url = self.config.get_openai_api_base().rstrip("/") + "/chat/completions"
         self.model = self.config.get_openai_model()
+        self._session = None
 
     def summarize_and_analyze(self, post_title: str, post_content: str) -> str:
         prompt = f"""请为以下Reddit热门帖子生成一个简洁的中文总结。
@@ -96,8 +98,21 @@ class ChatGPTClient:
         response = self._call_gpt(prompt, max_tokens=120)
         return response
 
+    def _http(self):
+        """HTTP 客户端：配置了 HTTP_CASSETTE_* 时经过录制/回放的磁带（scraper/cassette.py），否则直接使用 requests"""
+        if self._session is None:
+            import requests
+            from .cassette import get_cassette
+
+            cassette = get_cassette(self.config)
+            self._session = cassette.session() if cassette is not None else requests
+        return self._session
+
     def _call_gpt(self, prompt: str, max_tokens: int = 300) -> str:
         """调用 GPT API"""
+        # 延迟导入：只有真正调用 API 时才需要 requests
+        import requests
+
         if not self.api_key:
             return "[ChatGPT分析失败: API密钥未配置]"
 
@@ -108,18 +123,34 @@ class ChatGPTClient:
             "max_tokens": max_tokens,
             "temperature": 0.7,
         }
-        try:
-            resp = requests.post(self.api_url, headers=headers, json=data, timeout=15)
-            resp.raise_for_status()
-            result = resp.json()
-            return result["choices"][0]["message"]["content"].strip()
-        except requests.exceptions.Timeout:
-            return f"[ChatGPT分析失败: 请求超时]"
-        except requests.exceptions.ConnectionError:
-            return f"[ChatGPT分析失败: 网络连接错误]"
-        except requests.exceptions.HTTPError as e:
-            return f"[ChatGPT分析失败: HTTP错误 {e.response.status_code}]"
-        except KeyError:
-            return f"[ChatGPT分析失败: 响应格式异常]"
-        except Exception as e:
-            return f"[ChatGPT分析失败: {str(e)[:50]}]"
+        with span("openai.chat", OPENAI_REQUEST_SECONDS.labels(model=self.model), model=self.model) as gpt_span:
+            try:
+                resp = self._http().post(self.api_url, headers=headers, json=data, timeout=15)
+                gpt_span.add_bytes(len(resp.content))
+                resp.raise_for_status()
+                result = resp.json()
+                usage = result.get("usage", {})
+                incr("openai.tokens", usage.get("total_tokens", 0))
+                OPENAI_TOKENS.labels(model=self.model, type="prompt").inc(usage.get("prompt_tokens", 0))
+                OPENAI_TOKENS.labels(model=self.model, type="completion").inc(usage.get("completion_tokens", 0))
+                return result["choices"][0]["message"]["content"].strip()
+            except requests.exceptions.Timeout:
+                gpt_span.set_error("timeout")
+                OPENAI_FAILURES.labels(reason="timeout").inc()
+                return f"[ChatGPT分析失败: 请求超时]"
+            except requests.exceptions.ConnectionError:
+                gpt_span.set_error("connection error")
+                OPENAI_FAILURES.labels(reason="connection").inc()
+                return f"[ChatGPT分析失败: 网络连接错误]"
+            except requests.exceptions.HTTPError as e:
+                gpt_span.set_error(f"HTTP {e.response.status_code}")
+                OPENAI_FAILURES.labels(reason=f"http_{e.response.status_code}").inc()
+                return f"[ChatGPT分析失败: HTTP错误 {e.response.status_code}]"
+            except KeyError:
+                gpt_span.set_error("malformed response")
+                OPENAI_FAILURES.labels(reason="malformed").inc()
+                return f"[ChatGPT分析失败: 响应格式异常]"
+            except Exception as e:
+                gpt_span.set_error(str(e))
+                OPENAI_FAILURES.labels(reason="other").inc()
+                return f"[ChatGPT分析失败: {str(e)[:50]}]"
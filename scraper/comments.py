@@ -0,0 +1,118 @@
+"""Comments - 有界的评论树抓取模块
+
+每个入选的帖子只需要几条热门的顶层评论，而 post.comments + replace_more(limit=0) 会下载整页评论树
+（默认最多 200 条评论，连同它们的回复），热门帖子一次就是几百 KB。这里直接请求 /comments/{id}，只取需要的部分：
+
+- 只请求一个浅的、排好序的切片：depth=COMMENT_DEPTH（默认 1，只要顶层评论）、sort=COMMENT_SORT、
+  limit=需要的条数 + LIMIT_HEADROOM（给 [deleted] / [removed] 留出余量）
+- 切片中的有效评论不够时，用 /api/morechildren 批量展开顶层的 "more" 占位（每次最多 MORECHILDREN_BATCH_SIZE 个ID），
+  每个帖子最多 COMMENT_MORE_REQUESTS 次，0 表示不展开
+- 每个帖子的请求数和下载字节数（RateLimitedRequestor 的 ResponseMeter 按线程累计）随结果返回
+
+多个帖子的评论由 RedditScraper.iter_enriched 用线程池并行获取（COMMENT_FETCH_CONCURRENCY），请求仍经过同一个令牌桶。
+
+    fetcher = CommentFetcher(reddit, meter, depth=1, sort="best", more_requests=1)
+    comments, stats = fetcher.fetch("abc123", 5)
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+# 请求的评论数比需要的多出这么多，给已删除的评论留出余量
+LIMIT_HEADROOM = 5
+
+# /api/morechildren 每次最多展开 100 个评论ID
+MORECHILDREN_BATCH_SIZE = 100
+
+# 评论正文保留的字符数
+COMMENT_BODY_CHARS = 300
+
+COMMENT_SORTS = ("confidence", "top", "new", "controversial", "old", "qa", "best")
+_REMOVED_BODIES = frozenset(("[deleted]", "[removed]"))
+
+
+def comment_data(data: Dict) -> Optional[Comment]:
+    """评论 JSON（t1 的 data）转换为评论记录，已删除的评论返回None"""
+    body = data.get("body")
+    if not body or body in _REMOVED_BODIES:
+        return None
+    return Comment(data.get("author") or "[deleted]", body[:COMMENT_BODY_CHARS], data.get("score", 0), data.get("created_utc"))
+
+
+class CommentFetcher:
+    """
+    按预算获取帖子的热门顶层评论（线程安全，可以在多个线程中共用）
+
+    Args:
+        reddit: praw.Reddit 客户端（只用 reddit.request 发起原始请求，不构造 PRAW 评论对象）
+        meter: 按线程累计响应字节数的 ResponseMeter，为None时字节数为 0
+        depth: 评论树的深度（1 只返回顶层评论）
+        sort: 评论排序
+        more_requests: 每个帖子最多的 /api/morechildren 请求数
+    """
+
+    def __init__(self, reddit, meter=None, depth: int = 1, sort: str = "best", more_requests: int = 1):
+        self.reddit = reddit
+        self.meter = meter
+        self.depth = depth
+        self.sort = sort
+        self.more_requests = more_requests
+
+    def _downloaded(self) -> int:
+        return self.meter.total() if self.meter is not None else 0
+
+    def fetch(self, post_id: str, limit: int) -> Tuple[List[Comment], Dict[str, int]]:
+        """
+        获取帖子的前 limit 条有效顶层评论
+
+        Args:
+            post_id: 帖子ID（不带 t3_ 前缀）
+            limit: 需要的评论数
+
+        Returns:
+            (评论记录列表, {"requests": 请求数, "bytes": 下载字节数, "expanded": 从 "more" 展开的评论数})
+        """
+        start = self._downloaded()
+        link_id = f"t3_{post_id}"
+        _, listing = self.reddit.request(
+            method="GET",
+            path=f"comments/{post_id}",
+            params={"limit": limit + LIMIT_HEADROOM, "depth": self.depth, "sort": self.sort},
+        )
+        requests = 1
+
+        comments: List[Comment] = []
+        more: List[str] = []
+        for child in listing["data"]["children"]:
+            if child["kind"] == "more":
+                more.extend(child["data"].get("children") or ())
+            elif child["kind"] == "t1" and len(comments) < limit:
+                comment = comment_data(child["data"])
+                if comment is not None:
+                    comments.append(comment)
+
+        # 有效评论不够时批量展开顶层的 "more" 占位
+        expanded = 0
+        while len(comments) < limit and more and requests - 1 < self.more_requests:
+            batch, more = more[:MORECHILDREN_BATCH_SIZE], more[MORECHILDREN_BATCH_SIZE:]
+            result = self.reddit.request(
+                method="POST",
+                path="api/morechildren",
+                data={"link_id": link_id, "children": ",".join(batch), "sort": self.sort, "depth": self.depth},
+            )
+            requests += 1
+            for thing in result["json"]["data"]["things"]:
+                # 展开结果可能包含回复和嵌套的 "more"，只保留顶层评论
+                data = thing["data"]
+                if thing["kind"] != "t1" or data.get("parent_id") != link_id or len(comments) >= limit:
+                    continue
+                comment = comment_data(data)
+                if comment is not None:
+                    comments.append(comment)
+                    expanded += 1
+
+        return comments, {"requests": requests, "bytes": self._downloaded() - start, "expanded": expanded}
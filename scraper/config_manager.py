@@ -1,12 +1,15 @@
 """
 Config Manager - 配置管理模块
+
+配置由 scraper/settings.py 解析为进程内共享的不可变快照，ConfigManager 的 getter 只是读取快照属性；
+热路径可以直接读取 config.settings 的属性。
 """
 
-import os
 import logging
 from typing import List, Dict, Any
-from dotenv import load_dotenv
-from urllib.parse import urlparse
+
+from .profiles import SubredditProfile, SubredditProfiles
+from .settings import CassetteSettings, RankingSettings, SelectionSettings, Settings, TrendingSettings, get_store
 
 logger = logging.getLogger(__name__)
 
@@ -14,153 +17,269 @@ logger = logging.getLogger(__name__)
 class ConfigManager:
     def get_chatgpt_api_key(self) -> str:
         # 兼容 chatgpt_client.py，优先 CHATGPT_API_KEY，其次 OPENAI_API_KEY
-        return os.getenv("CHATGPT_API_KEY", os.getenv("OPENAI_API_KEY", ""))
+        return self.settings.chatgpt_api_key
 
     """配置管理器"""
 
     def __init__(self, config_file: str = ".env"):
         self.config_file = config_file
-        self._load_config()
+        # 同一个 .env 的所有 ConfigManager 共享一个快照（进程内只解析一次）
+        self._store = get_store(config_file)
+        self._store.get()
+
+    @property
+    def settings(self) -> Settings:
+        """当前配置快照（reload_if_changed 后指向新快照）"""
+        return self._store.settings
 
-    def _load_config(self):
-        """加载配置文件"""
-        try:
-            # override=False: 不覆盖已存在的环境变量（Docker --env-file 传递的）
-            load_dotenv(self.config_file, override=False)
-            logger.info(f"Config file {self.config_file} loaded successfully")
-        except Exception as e:
-            logger.warning(f"Failed to load config file: {e}, using environment variables or defaults")
+    def reload_if_changed(self) -> bool:
+        """.env 文件修改后重新加载配置，返回是否加载了新配置"""
+        return self._store.reload_if_changed()
 
     def get_reddit_client_id(self) -> str:
-        return os.getenv("REDDIT_CLIENT_ID", "")
+        return self.settings.reddit_client_id
 
     def get_reddit_client_secret(self) -> str:
-        return os.getenv("REDDIT_CLIENT_SECRET", "")
+        return self.settings.reddit_client_secret
 
     def get_reddit_user_agent(self) -> str:
-        return os.getenv("REDDIT_USER_AGENT", "Reddit Newsletter Bot v1.0")
+        return self.settings.reddit_user_agent
 
     def get_reddit_username(self) -> str:
-        return os.getenv("REDDIT_USERNAME", "")
+        return self.settings.reddit_username
 
     def get_reddit_password(self) -> str:
-        return os.getenv("REDDIT_PASSWORD", "")
+        return self.settings.reddit_password
+
+    def get_reddit_read_only(self) -> bool:
+        # 只读模式：不用用户名密码登录，启动时不调用 reddit.user.me()
+        return self.settings.reddit_read_only
+
+    # Reddit 令牌桶限流（scraper/ratelimit.py）：突发请求数，是否通过 PostgreSQL 与其他进程共享配额
+    def get_reddit_ratelimit_burst(self) -> int:
+        return self.settings.reddit_ratelimit_burst
+
+    def get_reddit_ratelimit_shared(self) -> bool:
+        return self.settings.reddit_ratelimit_shared
 
     # 目标Subreddit配置
     def get_target_subreddits(self) -> List[str]:
-        subreddits_str = os.getenv("TARGET_SUBREDDITS", "AskReddit,todayilearned,worldnews,technology,science")
-        return [s.strip() for s in subreddits_str.split(",")]
+        return list(self.settings.target_subreddits)
 
     def get_posts_limit(self) -> int:
-        return int(os.getenv("POSTS_LIMIT", "25"))
+        return self.settings.posts_limit
 
     def get_newsletter_posts_limit(self) -> int:
-        return int(os.getenv("NEWSLETTER_POSTS_LIMIT", "10"))
+        return self.settings.newsletter_posts_limit
 
     def get_include_nsfw(self) -> bool:
-        return os.getenv("INCLUDE_NSFW", "false").lower() == "true"
+        return self.settings.include_nsfw
+
+    # 过滤后候选不足 NEWSLETTER_POSTS_LIMIT 时向列表深处翻页（请求预算为 0 表示不翻页）
+    def get_deepen_max_requests(self) -> int:
+        return self.settings.deepen_max_requests
+
+    def get_deepen_min_score(self) -> int:
+        return self.settings.deepen_min_score
+
+    # 入选帖子的评论抓取（scraper/comments.py）：评论树深度、排序、每个帖子展开 "more" 的请求数、并行抓取的线程数
+    def get_comment_depth(self) -> int:
+        return self.settings.comment_depth
+
+    def get_comment_sort(self) -> str:
+        return self.settings.comment_sort
+
+    def get_comment_more_requests(self) -> int:
+        return self.settings.comment_more_requests
+
+    def get_comment_fetch_concurrency(self) -> int:
+        return self.settings.comment_fetch_concurrency
+
+    # 并行抓取 subreddit 列表的线程数（RedditScraper.iter_listing_batches）
+    def get_listing_fetch_concurrency(self) -> int:
+        return self.settings.listing_fetch_concurrency
+
+    # 按 subreddit 的抓取配置（列表类型、抓取数量、时间窗口、评论数、权重、是否补充摘要）
+    def get_subreddit_profiles_file(self) -> str:
+        return self.settings.subreddit_profiles_file
+
+    def get_subreddit_profiles(self) -> SubredditProfiles:
+        return self.settings.subreddit_profiles
+
+    def get_subreddit_profile(self, subreddit: str) -> SubredditProfile:
+        return self.settings.subreddit_profiles.get(subreddit)
+
+    def get_ranking_settings(self) -> RankingSettings:
+        # 排序方式（zscore / subscribers / none）和各特征的权重
+        return self.settings.ranking
+
+    def get_selection_settings(self) -> SelectionSettings:
+        # 每个 subreddit 的入选上限和 MMR 多样性权衡
+        return self.settings.selection
+
+    def get_trending_settings(self) -> TrendingSettings:
+        # 分数快照的速度/加速度窗口
+        return self.settings.trending
 
     # SMTP邮件配置
     def get_smtp_server(self) -> str:
-        return os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        return self.settings.smtp_server
 
     def get_smtp_port(self) -> int:
-        return int(os.getenv("SMTP_PORT", "587"))
+        return self.settings.smtp_port
 
     def get_smtp_use_tls(self) -> bool:
-        return os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+        return self.settings.smtp_use_tls
 
     def get_smtp_use_ssl(self) -> bool:
-        return os.getenv("SMTP_USE_SSL", "false").lower() == "true"
+        return self.settings.smtp_use_ssl
 
     def get_smtp_username(self) -> str:
-        return os.getenv("SMTP_USERNAME", "")
+        return self.settings.smtp_username
 
     def get_smtp_password(self) -> str:
-        return os.getenv("SMTP_PASSWORD", "")
+        return self.settings.smtp_password
 
     def get_smtp_from_email(self) -> str:
-        return os.getenv("SMTP_FROM_EMAIL", self.get_smtp_username())
+        return self.settings.smtp_from_email
 
     def get_recipients(self) -> List[str]:
-        recipients_str = os.getenv("EMAIL_RECIPIENTS", "")
-        if not recipients_str:
-            return []
-        return [email.strip() for email in recipients_str.split(",")]
+        return list(self.settings.recipients)
 
     # 定时任务配置
     def get_schedule_time(self) -> str:
-        return os.getenv("SCHEDULE_TIME", "09:00")
+        return self.settings.schedule_time
 
     def get_run_immediately(self) -> bool:
-        return os.getenv("RUN_IMMEDIATELY", "false").lower() == "true"
+        return self.settings.run_immediately
+
+    # 后台增量采集配置
+    def get_ingest_interval_minutes(self) -> int:
+        return self.settings.ingest_interval_minutes
+
+    def get_ingest_enrich_batch(self) -> int:
+        return self.settings.ingest_enrich_batch
+
+    # 已发送帖子的分数刷新（run_job.py --refresh）
+    def get_score_refresh_days(self) -> int:
+        return self.settings.score_refresh_days
+
+    def get_score_refresh_interval_hours(self) -> float:
+        return self.settings.score_refresh_interval_hours
+
+    # 暂存候选的评论刷新：评论数至少增加 max(MIN_DELTA, 上次评论数 * RATIO) 才重新获取评论（MIN_DELTA=0 不刷新）
+    def get_comment_refresh_min_delta(self) -> int:
+        return self.settings.comment_refresh_min_delta
+
+    def get_comment_refresh_ratio(self) -> float:
+        return self.settings.comment_refresh_ratio
+
+    # 分布式任务队列配置
+    def get_queue_visibility_timeout(self) -> int:
+        return self.settings.queue_visibility_timeout
+
+    def get_queue_max_attempts(self) -> int:
+        return self.settings.queue_max_attempts
+
+    def get_queue_wait_timeout(self) -> int:
+        return self.settings.queue_wait_timeout
+
+    def get_worker_poll_interval(self) -> float:
+        return self.settings.worker_poll_interval
+
+    # API 线程池配置
+    def get_api_io_workers(self) -> int:
+        # 短阻塞调用（数据库查询、单个 subreddit 抓取）的线程数
+        return self.settings.api_io_workers
+
+    def get_api_io_queue(self) -> int:
+        return self.settings.api_io_queue
+
+    def get_api_job_workers(self) -> int:
+        # 长任务（完整抓取 + 发送）的线程数
+        return self.settings.api_job_workers
+
+    def get_api_job_queue(self) -> int:
+        return self.settings.api_job_queue
+
+    # 列表缓存配置（/api/posts）
+    def get_listing_cache_ttl(self) -> int:
+        return self.settings.listing_cache_ttl
+
+    def get_listing_cache_stale(self) -> int:
+        # 过期后仍返回旧数据并在后台刷新的时间
+        return self.settings.listing_cache_stale
+
+    def get_listing_cache_max_entries(self) -> int:
+        return self.settings.listing_cache_max_entries
+
+    def get_listing_cache_shared(self) -> bool:
+        # 启用 PostgreSQL 共享缓存层（多个 API 副本共用）
+        return self.settings.listing_cache_shared
+
+    # 监控配置
+    def get_otel_exporter_endpoint(self) -> str:
+        # 标准 OpenTelemetry 环境变量，例如 http://localhost:4318；为空时不导出
+        return self.settings.otel_exporter_endpoint
+
+    def get_metrics_port(self) -> int:
+        # scraper / worker 进程的 /metrics 端口，0 表示不启动
+        return self.settings.metrics_port
+
+    def get_settings_reload_interval(self) -> int:
+        # 检查 .env 是否修改的间隔（秒），0 表示不检查
+        return self.settings.settings_reload_interval
 
     # PostgreSQL 数据库配置
+    def get_cassette_settings(self) -> CassetteSettings:
+        # Reddit / OpenAI 请求的录制和回放（HTTP_CASSETTE_*）
+        return self.settings.cassette
+
     def get_database_config(self) -> Dict[str, Any]:
-        """获取 PostgreSQL 数据库配置"""
-        # 优先使用 DATABASE_URL (Azure PostgreSQL / Supabase 格式)
-        database_url = os.getenv("DATABASE_URL")
-
-        if database_url:
-            # 解析 PostgreSQL URL
-            parsed = urlparse(database_url)
-            return {
-                "host": parsed.hostname,
-                "port": parsed.port or 5432,
-                "database": parsed.path[1:] if parsed.path else "postgres",  # 移除开头的 '/'
-                "user": parsed.username,
-                "password": parsed.password,
-                "sslmode": "require",
-            }
-        else:
-            # 使用单独的环境变量
-            return {
-                "host": os.getenv("DB_HOST", "localhost"),
-                "port": int(os.getenv("DB_PORT", "5432")),
-                "database": os.getenv("DB_NAME", "reddit_newsletter"),
-                "user": os.getenv("DB_USER", "postgres"),
-                "password": os.getenv("DB_PASSWORD", ""),
-                "sslmode": os.getenv("DB_SSLMODE", "require"),
-            }
+        """获取 PostgreSQL 数据库配置（DATABASE_URL 优先，其次 DB_* 变量）"""
+        return self.settings.database.as_dict()
 
     # GPT/OpenAI 配置
     def get_openai_api_key(self) -> str:
-        return os.getenv("OPENAI_API_KEY", "")
+        return self.settings.openai_api_key
 
     def get_openai_api_base(self) -> str:
-        return os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+        return self.settings.openai_api_base
 
     def get_openai_model(self) -> str:
-        return os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        return self.settings.openai_model
 
     def get_enable_gpt_summaries(self) -> bool:
-        return os.getenv("ENABLE_GPT_SUMMARIES", "true").lower() == "true"
+        return self.settings.enable_gpt_summaries
 
     def get_enable_editor_summary(self) -> bool:
-        return os.getenv("ENABLE_EDITOR_SUMMARY", "true").lower() == "true"
+        return self.settings.enable_editor_summary
 
     # Newsletter 编辑配置
     def get_newsletter_editor_name(self) -> str:
-        return os.getenv("NEWSLETTER_EDITOR_NAME", "Reddit Newsletter Team")
+        return self.settings.newsletter_editor_name
 
     def get_newsletter_title(self) -> str:
-        return os.getenv("NEWSLETTER_TITLE", "Reddit 热门精选")
+        return self.settings.newsletter_title
 
     # Web服务配置
     def get_web_host(self) -> str:
-        return os.getenv("WEB_HOST", "127.0.0.1")
+        return self.settings.web_host
 
     def get_web_port(self) -> int:
-        return int(os.getenv("WEB_PORT", "5000"))
+        return self.settings.web_port
 
     def get_web_debug(self) -> bool:
-        return os.getenv("WEB_DEBUG", "false").lower() == "true"
+        return self.settings.web_debug
 
     def get_web_secret_key(self) -> str:
-        return os.getenv("WEB_SECRET_KEY", "dev-secret-key-change-in-production")
+        return self.settings.web_secret_key
+
+    def get_public_base_url(self) -> str:
+        return self.settings.public_base_url
 
     def get_enable_web_service(self) -> bool:
-        return os.getenv("ENABLE_WEB_SERVICE", "false").lower() == "true"
+        return self.settings.enable_web_service
 
     # 验证配置
     def validate_config(self) -> bool:
@@ -215,7 +334,18 @@ class ConfigManager:
             "target_subreddits": self.get_target_subreddits(),
             "posts_limit": self.get_posts_limit(),
             "newsletter_posts_limit": self.get_newsletter_posts_limit(),
+            "deepen_max_requests": self.get_deepen_max_requests(),
+            "comment_depth": self.get_comment_depth(),
+            "comment_fetch_concurrency": self.get_comment_fetch_concurrency(),
+            "listing_fetch_concurrency": self.get_listing_fetch_concurrency(),
             "include_nsfw": self.get_include_nsfw(),
+            "reddit_ratelimit_shared": self.get_reddit_ratelimit_shared(),
+            "subreddit_profiles_file": self.get_subreddit_profiles_file(),
+            "subreddit_profiles_count": len(self.get_subreddit_profiles().overrides),
+            "ranking_normalization": self.get_ranking_settings().normalization,
+            "selection_subreddit_cap": self.get_selection_settings().subreddit_cap,
+            "selection_mmr_lambda": self.get_selection_settings().mmr_lambda,
+            "trending_window_hours": self.get_trending_settings().window_hours,
             "smtp_server": self.get_smtp_server(),
             "smtp_port": self.get_smtp_port(),
             "smtp_use_tls": self.get_smtp_use_tls(),
@@ -223,6 +353,9 @@ class ConfigManager:
             "schedule_time": self.get_schedule_time(),
             "recipients_count": len(self.get_recipients()),
             "run_immediately": self.get_run_immediately(),
+            "ingest_interval_minutes": self.get_ingest_interval_minutes(),
+            "ingest_enrich_batch": self.get_ingest_enrich_batch(),
+            "score_refresh_days": self.get_score_refresh_days(),
             "enable_gpt_summaries": self.get_enable_gpt_summaries(),
             "enable_editor_summary": self.get_enable_editor_summary(),
             "openai_model": self.get_openai_model(),
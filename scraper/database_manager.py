@@ -3,19 +3,31 @@
 import psycopg2
 import psycopg2.extras
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import json
 from .config_manager import ConfigManager
+from .models import Post, json_default
+from .tracing import traced
+from .metrics import DB_QUERY_SECONDS, DB_CONNECTIONS
 
 logger = logging.getLogger(__name__)
 
 
+def db_query(name: str):
+    """记录查询耗时：tracing span + Prometheus 直方图"""
+    return traced(f"db.{name}", histogram=DB_QUERY_SECONDS.labels(query=name))
+
+
 class DatabaseManager:
     """PostgreSQL 数据库管理器"""
 
-    def __init__(self):
-        self.config = ConfigManager()
+    def __init__(self, config: ConfigManager = None):
+        """
+        Args:
+            config: 配置管理器，为None时使用进程内共享的配置快照
+        """
+        self.config = config or ConfigManager()
         self.connection = None
         self._connect()
         self._initialize_database()
@@ -33,6 +45,7 @@ class DatabaseManager:
                 sslmode=db_config.get("sslmode", "prefer"),
             )
             self.connection.autocommit = True
+            DB_CONNECTIONS.inc()
             logger.info("Successfully connected to PostgreSQL database")
 
         except psycopg2.Error as e:
@@ -95,6 +108,152 @@ class DatabaseManager:
             """
             )
 
+            # 创建候选帖子暂存表（后台增量采集写入，发送时直接读取）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS post_candidates (
+                    id VARCHAR(50) PRIMARY KEY,
+                    subreddit VARCHAR(100),
+                    score INTEGER,
+                    num_comments INTEGER,
+                    created_utc TIMESTAMP,
+                    over_18 BOOLEAN,
+                    data_json JSONB NOT NULL,
+                    enriched_at TIMESTAMP,
+                    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+
+            # 创建分数快照表（每次抓取记录一次，用于计算上升速度和加速度；ts 为 UTC 时间）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS post_snapshots (
+                    post_id VARCHAR(50) NOT NULL,
+                    ts TIMESTAMP NOT NULL DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'),
+                    score INTEGER NOT NULL,
+                    num_comments INTEGER NOT NULL
+                )
+            """
+            )
+
+            # 创建任务队列表（多进程 worker 通过 FOR UPDATE SKIP LOCKED 领取任务）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_queue (
+                    id BIGSERIAL PRIMARY KEY,
+                    batch_id VARCHAR(64) NOT NULL,
+                    kind VARCHAR(32) NOT NULL,
+                    payload JSONB NOT NULL,
+                    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+                    priority INTEGER DEFAULT 0,
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    locked_by VARCHAR(100),
+                    locked_until TIMESTAMP,
+                    available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+
+            # 创建任务运行计时报告表
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_runs (
+                    run_id VARCHAR(32) PRIMARY KEY,
+                    job_name VARCHAR(100),
+                    started_at TIMESTAMP,
+                    duration_seconds REAL,
+                    success BOOLEAN,
+                    report JSONB
+                )
+            """
+            )
+
+            # 创建任务登记表（API 触发的任务的状态和进度，跨重启、跨副本可查）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id VARCHAR(32) PRIMARY KEY,
+                    kind VARCHAR(50) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    stage VARCHAR(50),
+                    params JSONB,
+                    progress JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    stages JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    result JSONB,
+                    error TEXT,
+                    owner VARCHAR(100),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+
+            # 创建列表缓存表（API 副本共享的 subreddit 列表缓存）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS listing_cache (
+                    cache_key VARCHAR(200) PRIMARY KEY,
+                    posts JSONB NOT NULL,
+                    etag VARCHAR(64) NOT NULL,
+                    fetched_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+
+            # 创建列表游标表（每个 subreddit 列表上次抓取到的帖子，增量采集时遇到已知帖子即停止翻页）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS listing_cursors (
+                    cursor_key VARCHAR(200) PRIMARY KEY,
+                    seen_ids JSONB NOT NULL,
+                    fetched_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+
+            # 创建 Reddit 配额表（多个进程共享同一个账号的剩余请求数，见 scraper/ratelimit.py）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reddit_ratelimit (
+                    ratelimit_key VARCHAR(200) PRIMARY KEY,
+                    remaining DOUBLE PRECISION NOT NULL,
+                    reset_at TIMESTAMP NOT NULL
+                )
+            """
+            )
+
+            # 创建订阅者表和订阅表（订阅者 -> subreddit 集合）
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subscribers (
+                    id SERIAL PRIMARY KEY,
+                    email VARCHAR(254) UNIQUE NOT NULL,
+                    active BOOLEAN NOT NULL DEFAULT TRUE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+                    subreddit VARCHAR(100) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (subscriber_id, subreddit)
+                )
+            """
+            )
+
             # 创建索引
             cursor.execute(
                 """
@@ -117,9 +276,65 @@ class DatabaseManager:
             """
             )
 
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_post_candidates_created_utc 
+                ON post_candidates(created_utc)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_job_queue_claim 
+                ON job_queue(priority DESC, id) WHERE status IN ('pending', 'running')
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_job_queue_batch 
+                ON job_queue(batch_id, status)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_job_runs_started_at 
+                ON job_runs(started_at)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_jobs_created_at 
+                ON jobs(created_at)
+            """
+            )
+
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_post_snapshots_post_ts 
+                ON post_snapshots(post_id, ts)
+            """
+            )
+
+            # subreddit -> 订阅者的倒排索引
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_subscriptions_subreddit 
+                ON subscriptions(subreddit)
+            """
+            )
+
             # 添加评论字段（如果不存在）
             self._migrate_add_comment_fields(cursor)
 
+            # 分数刷新时间（已发送帖子的分数和评论数定期从 Reddit 刷新）
+            cursor.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS score_refreshed_at TIMESTAMP")
+
+            # 评论水位：上次获取评论时的评论数，评论数明显增加后才重新获取
+            cursor.execute("ALTER TABLE post_candidates ADD COLUMN IF NOT EXISTS comments_watermark INTEGER")
+
             cursor.close()
             logger.info("PostgreSQL database tables initialized successfully")
 
@@ -150,6 +365,7 @@ class DatabaseManager:
         except psycopg2.Error as e:
             logger.warning(f"Error adding comment fields (may already exist): {e}")
 
+    @db_query("test_connection")
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
@@ -161,6 +377,7 @@ class DatabaseManager:
             logger.error(f"Database connection test failed: {e}")
             return False
 
+    @db_query("filter_new_posts")
     def filter_new_posts(self, posts: List[Dict]) -> List[Dict]:
         """
         过滤出未发送过的新帖子
@@ -171,13 +388,20 @@ class DatabaseManager:
         Returns:
             新帖子列表
         """
+        if not posts:
+            return []
+
         try:
             cursor = self.connection.cursor()
 
+            # 一次查询取回所有已发送的ID，并按ID去重
+            cursor.execute("SELECT id FROM posts WHERE id = ANY(%s)", (list({post["id"] for post in posts}),))
+            seen_ids = {row[0] for row in cursor.fetchall()}
+
             new_posts = []
             for post in posts:
-                cursor.execute("SELECT id FROM posts WHERE id = %s", (post["id"],))
-                if not cursor.fetchone():
+                if post["id"] not in seen_ids:
+                    seen_ids.add(post["id"])
                     new_posts.append(post)
 
             cursor.close()
@@ -188,6 +412,7 @@ class DatabaseManager:
             logger.error(f"Error filtering new posts: {e}")
             return posts  # 出错时返回所有帖子
 
+    @db_query("mark_posts_as_sent")
     def mark_posts_as_sent(self, posts: List[Dict]) -> bool:
         """
         标记帖子为已发送
@@ -236,9 +461,9 @@ class DatabaseManager:
                         post["is_video"],
                         post["over_18"],
                         sent_time,
-                        json.dumps(post, ensure_ascii=False),
+                        json.dumps(post, ensure_ascii=False, default=json_default),
                         post.get("gpt_summary", ""),
-                        json.dumps(post.get("top_comments", []), ensure_ascii=False),
+                        json.dumps(post.get("top_comments", []), ensure_ascii=False, default=json_default),
                         post.get("comment_summary", ""),
                     ),
                 )
@@ -251,182 +476,1315 @@ class DatabaseManager:
             logger.error(f"Error marking posts as sent: {e}")
             return False
 
-    def log_newsletter_send(
-        self,
-        posts_count: int,
-        success: bool,
-        error_message: str = None,
-        recipients: List[str] = None,
-        editor_words: str = None,
-        newsletter_title: str = None,
-    ) -> bool:
+    @db_query("get_stale_post_ids")
+    def get_stale_post_ids(self, days: int = 7, refresh_interval_hours: float = 6, limit: int = 5000) -> List[str]:
         """
-        记录Newsletter发送日志
+        获取需要刷新分数的已发送帖子（最近 days 天发送，且从未刷新或上次刷新早于 refresh_interval_hours 小时前）
 
         Args:
-            posts_count: 帖子数量
-            success: 是否成功
-            error_message: 错误信息
-            recipients: 收件人列表
-            editor_words: 编辑寄语
-            newsletter_title: Newsletter标题
+            days: 只刷新最近几天发送的帖子
+            refresh_interval_hours: 两次刷新的最小间隔（小时）
+            limit: 最多返回的数量（从未刷新的优先）
 
         Returns:
-            操作是否成功
+            帖子ID列表
         """
         try:
             cursor = self.connection.cursor()
-
             cursor.execute(
                 """
-                INSERT INTO newsletter_logs 
-                (posts_count, success, error_message, recipients, editor_words, newsletter_title)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                SELECT id FROM posts 
+                WHERE sent_at >= CURRENT_TIMESTAMP - MAKE_INTERVAL(days => %s)
+                  AND (score_refreshed_at IS NULL
+                       OR score_refreshed_at < CURRENT_TIMESTAMP - MAKE_INTERVAL(secs => %s))
+                ORDER BY score_refreshed_at NULLS FIRST, sent_at DESC
+                LIMIT %s
             """,
-                (
-                    posts_count,
-                    success,
-                    error_message,
-                    json.dumps(recipients) if recipients else None,
-                    editor_words,
-                    newsletter_title,
-                ),
+                (days, refresh_interval_hours * 3600, limit),
             )
-
+            post_ids = [row[0] for row in cursor.fetchall()]
             cursor.close()
-            return True
+            return post_ids
 
         except psycopg2.Error as e:
-            logger.error(f"Error logging newsletter send: {e}")
-            return False
+            logger.error(f"Error getting stale posts: {e}")
+            return []
 
-    def get_recent_posts(self, days: int = 7) -> List[Dict]:
+    @db_query("update_post_scores")
+    def update_post_scores(self, stats: List[Dict]) -> int:
         """
-        获取最近几天发送的帖子
+        用一条 UPDATE ... FROM (VALUES ...) 批量更新已发送帖子的分数和评论数（列和 data_json 中的值）
 
         Args:
-            days: 天数
+            stats: [{"id", "score", "num_comments"}]；score 为 None 的帖子（已删除或查不到）只记录刷新时间
 
         Returns:
-            帖子列表
+            更新的帖子数量
         """
-        try:
-            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        if not stats:
+            return 0
 
-            cursor.execute(
+        try:
+            cursor = self.connection.cursor()
+            psycopg2.extras.execute_values(
+                cursor,
                 """
-                SELECT * FROM posts 
-                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
-                ORDER BY sent_at DESC
+                UPDATE posts SET
+                    score = COALESCE(v.score, posts.score),
+                    num_comments = COALESCE(v.num_comments, posts.num_comments),
+                    data_json = CASE WHEN v.score IS NULL THEN posts.data_json
+                        ELSE COALESCE(posts.data_json, '{}'::jsonb)
+                            || JSONB_BUILD_OBJECT('score', v.score, 'num_comments', v.num_comments) END,
+                    score_refreshed_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(id, score, num_comments)
+                WHERE posts.id = v.id
             """,
-                (days,),
+                [(row["id"], row["score"], row["num_comments"]) for row in stats],
+                template="(%s, %s::integer, %s::integer)",
+                page_size=len(stats),
             )
-
-            rows = cursor.fetchall()
-
-            posts = []
-            for row in rows:
-                post_dict = dict(row)
-                if post_dict["data_json"]:
-                    try:
-                        additional_data = (
-                            json.loads(post_dict["data_json"])
-                            if isinstance(post_dict["data_json"], str)
-                            else post_dict["data_json"]
-                        )
-                        post_dict.update(additional_data)
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-                posts.append(post_dict)
-
+            updated = cursor.rowcount
             cursor.close()
-            return posts
+            return updated
 
         except psycopg2.Error as e:
-            logger.error(f"Error getting recent posts: {e}")
-            return []
+            logger.error(f"Error updating post scores: {e}")
+            return 0
 
-    def get_newsletter_stats(self, days: int = 30) -> Dict:
+    @db_query("upsert_candidates")
+    def upsert_candidates(self, posts: List[Dict]) -> int:
         """
-        获取Newsletter统计信息
+        写入或更新候选帖子（已有的帖子只刷新热度数据，保留已生成的评论和摘要）
 
         Args:
-            days: 统计天数
+            posts: 帖子列表
 
         Returns:
-            统计信息字典
+            写入的帖子数量
         """
+        if not posts:
+            return 0
+
         try:
             cursor = self.connection.cursor()
 
-            # 总发送次数
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM newsletter_logs 
-                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
-            """,
-                (days,),
-            )
-            total_sends = cursor.fetchone()[0]
-
-            # 成功发送次数
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM newsletter_logs 
-                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days' AND success = true
-            """,
-                (days,),
-            )
-            successful_sends = cursor.fetchone()[0]
-
-            # 总帖子数
-            cursor.execute(
+            rows = [
+                (
+                    post["id"],
+                    post["subreddit"],
+                    post["score"],
+                    post["num_comments"],
+                    datetime.fromtimestamp(post["created_utc"]),
+                    post["over_18"],
+                    json.dumps(post, ensure_ascii=False, default=json_default),
+                )
+                for post in posts
+            ]
+            psycopg2.extras.execute_values(
+                cursor,
                 """
-                SELECT COUNT(*) FROM posts 
-                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
+                INSERT INTO post_candidates
+                (id, subreddit, score, num_comments, created_utc, over_18, data_json)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    score = EXCLUDED.score,
+                    num_comments = EXCLUDED.num_comments,
+                    data_json = post_candidates.data_json || EXCLUDED.data_json,
+                    last_seen_at = CURRENT_TIMESTAMP
             """,
-                (days,),
-            )
-            total_posts = cursor.fetchone()[0]
-
-            # 最后发送时间
-            cursor.execute(
-                """
-                SELECT MAX(sent_at) FROM newsletter_logs 
-                WHERE success = true
-            """
+                rows,
             )
-            last_send_result = cursor.fetchone()
-            last_send = last_send_result[0] if last_send_result and last_send_result[0] else None
+            self._insert_snapshots(cursor, posts)
 
             cursor.close()
-
-            return {
-                "total_sends": total_sends,
-                "successful_sends": successful_sends,
-                "success_rate": successful_sends / total_sends if total_sends > 0 else 0,
-                "total_posts": total_posts,
-                "last_send": last_send,
-                "days": days,
-            }
+            logger.info(f"Upserted {len(rows)} candidate posts")
+            return len(rows)
 
         except psycopg2.Error as e:
-            logger.error(f"Error getting newsletter stats: {e}")
-            return {}
+            logger.error(f"Error upserting candidate posts: {e}")
+            return 0
 
-    def cleanup_old_data(self, days: int = 90):
+    def _insert_snapshots(self, cursor, posts: List[Dict]):
+        """一条 INSERT 写入全部帖子的当前分数和评论数"""
+        psycopg2.extras.execute_values(
+            cursor,
+            "INSERT INTO post_snapshots (post_id, score, num_comments) VALUES %s",
+            [(post["id"], post["score"], post["num_comments"]) for post in posts],
+            page_size=1000,
+        )
+
+    @db_query("record_snapshots")
+    def record_snapshots(self, posts: List[Dict]) -> int:
         """
-        清理旧数据
+        记录帖子的分数快照（每次抓取调用一次）
 
         Args:
-            days: 保留天数
+            posts: 帖子列表
+
+        Returns:
+            写入的快照数量
         """
+        if not posts:
+            return 0
+
         try:
             cursor = self.connection.cursor()
+            self._insert_snapshots(cursor, posts)
+            cursor.close()
+            return len(posts)
 
-            # 删除旧帖子记录
-            cursor.execute(
-                """
+        except psycopg2.Error as e:
+            logger.error(f"Error recording post snapshots: {e}")
+            return 0
+
+    @db_query("get_snapshot_windows")
+    def get_snapshot_windows(self, post_ids: List[str], window_hours: float) -> Dict[str, Dict]:
+        """
+        读取每个帖子在最近两个时间窗口内的分数快照锚点
+
+        Args:
+            post_ids: 帖子ID列表
+            window_hours: 窗口长度（小时）
+
+        Returns:
+            {post_id: {"last_ts", "last_score", "base_ts", "base_score", "prior_ts", "prior_score"}}，时间为 Unix 时间戳；
+            base 为一个窗口前（没有则为窗口内最早）的快照，prior 为两个窗口前（没有则为最早）的快照
+        """
+        if not post_ids:
+            return {}
+
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                WITH bounds AS (
+                    SELECT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - MAKE_INTERVAL(secs => %(window)s) AS recent,
+                           (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - MAKE_INTERVAL(secs => 2 * %(window)s) AS prior,
+                           (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - MAKE_INTERVAL(secs => 3 * %(window)s) AS lookback
+                )
+                SELECT s.post_id,
+                       EXTRACT(EPOCH FROM MAX(s.ts)) AS last_ts,
+                       (ARRAY_AGG(s.score ORDER BY s.ts DESC))[1] AS last_score,
+                       EXTRACT(EPOCH FROM COALESCE(MAX(s.ts) FILTER (WHERE s.ts <= b.recent), MIN(s.ts))) AS base_ts,
+                       COALESCE(
+                           (ARRAY_AGG(s.score ORDER BY s.ts DESC) FILTER (WHERE s.ts <= b.recent))[1],
+                           (ARRAY_AGG(s.score ORDER BY s.ts))[1]
+                       ) AS base_score,
+                       EXTRACT(EPOCH FROM COALESCE(MAX(s.ts) FILTER (WHERE s.ts <= b.prior), MIN(s.ts))) AS prior_ts,
+                       COALESCE(
+                           (ARRAY_AGG(s.score ORDER BY s.ts DESC) FILTER (WHERE s.ts <= b.prior))[1],
+                           (ARRAY_AGG(s.score ORDER BY s.ts))[1]
+                       ) AS prior_score
+                FROM post_snapshots s, bounds b
+                WHERE s.post_id = ANY(%(ids)s) AND s.ts >= b.lookback
+                GROUP BY s.post_id
+            """,
+                {"ids": list(post_ids), "window": window_hours * 3600},
+            )
+            windows = {row.pop("post_id"): {key: float(value) for key, value in row.items()} for row in cursor.fetchall()}
+            cursor.close()
+            return windows
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting post snapshots: {e}")
+            return {}
+
+    @db_query("get_candidates_to_enrich")
+    def get_candidates_to_enrich(
+        self,
+        limit: int = 10,
+        max_age_hours: int = 24,
+        include_nsfw: bool = False,
+        comment_min_delta: int = None,
+        comment_ratio: float = 0.5,
+    ) -> List[Dict]:
+        """
+        获取需要生成评论和摘要的候选帖子：尚未补充的优先（按热度），其次是评论数比上次获取评论时明显增加的
+
+        Args:
+            limit: 返回数量
+            max_age_hours: 只考虑该时间窗口内发布的帖子
+            include_nsfw: 是否包含NSFW帖子
+            comment_min_delta: 评论数至少增加 max(comment_min_delta, 水位 * comment_ratio) 才重新获取评论，为None时不重新获取
+            comment_ratio: 评论数相对水位的增长比例
+
+        Returns:
+            帖子列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            cursor.execute(
+                """
+                SELECT c.data_json FROM post_candidates c
+                WHERE (c.enriched_at IS NULL
+                       OR (%(min_delta)s IS NOT NULL AND c.comments_watermark IS NOT NULL
+                           AND c.num_comments - c.comments_watermark
+                               >= GREATEST(%(min_delta)s, c.comments_watermark * %(ratio)s)))
+                  AND c.created_utc >= %(since)s
+                  AND (%(nsfw)s OR NOT c.over_18)
+                  AND NOT EXISTS (SELECT 1 FROM posts p WHERE p.id = c.id)
+                ORDER BY c.enriched_at IS NOT NULL, c.score DESC
+                LIMIT %(limit)s
+            """,
+                {
+                    "min_delta": comment_min_delta,
+                    "ratio": comment_ratio,
+                    "since": datetime.now() - timedelta(hours=max_age_hours),
+                    "nsfw": include_nsfw,
+                    "limit": limit,
+                },
+            )
+
+            posts = [Post.from_dict(row["data_json"]) for row in cursor.fetchall()]
+            cursor.close()
+            return posts
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting candidates to enrich: {e}")
+            return []
+
+    @db_query("save_candidate_enrichment")
+    def save_candidate_enrichment(self, post: Dict) -> bool:
+        """
+        保存候选帖子的评论和GPT摘要
+
+        Args:
+            post: 已补充评论和摘要的帖子
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+
+            cursor.execute(
+                """
+                UPDATE post_candidates
+                SET data_json = %s, enriched_at = CURRENT_TIMESTAMP, comments_watermark = %s
+                WHERE id = %s
+            """,
+                (json.dumps(post, ensure_ascii=False, default=json_default), post.get("num_comments"), post["id"]),
+            )
+
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving candidate enrichment: {e}")
+            return False
+
+    @db_query("get_staged_candidates")
+    def get_staged_candidates(self, limit: int = 50, max_age_hours: int = 24, include_nsfw: bool = False) -> List[Dict]:
+        """
+        获取暂存区中未发送过的候选帖子（按热度排序）
+
+        Args:
+            limit: 返回数量
+            max_age_hours: 只考虑该时间窗口内发布的帖子
+            include_nsfw: 是否包含NSFW帖子
+
+        Returns:
+            帖子列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            cursor.execute(
+                """
+                SELECT c.data_json FROM post_candidates c
+                WHERE c.created_utc >= %s
+                  AND (%s OR NOT c.over_18)
+                  AND NOT EXISTS (SELECT 1 FROM posts p WHERE p.id = c.id)
+                ORDER BY c.score DESC
+                LIMIT %s
+            """,
+                (datetime.now() - timedelta(hours=max_age_hours), include_nsfw, limit),
+            )
+
+            posts = [Post.from_dict(row["data_json"]) for row in cursor.fetchall()]
+            cursor.close()
+            return posts
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting staged candidates: {e}")
+            return []
+
+    @db_query("get_candidates_by_ids")
+    def get_candidates_by_ids(self, post_ids: List[str]) -> List[Dict]:
+        """
+        按ID获取暂存区中的候选帖子
+
+        Args:
+            post_ids: 帖子ID列表
+
+        Returns:
+            帖子列表（保持传入的顺序）
+        """
+        if not post_ids:
+            return []
+
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("SELECT id, data_json FROM post_candidates WHERE id = ANY(%s)", (list(post_ids),))
+            by_id = {row["id"]: Post.from_dict(row["data_json"]) for row in cursor.fetchall()}
+            cursor.close()
+            return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting candidates by ids: {e}")
+            return []
+
+    # ==================== 任务队列 ====================
+
+    @db_query("enqueue_jobs")
+    def enqueue_jobs(
+        self, batch_id: str, kind: str, payloads: List[Dict], priority: int = 0, max_attempts: int = 3
+    ) -> int:
+        """
+        批量写入任务
+
+        Args:
+            batch_id: 批次ID，协调者用它等待整批任务完成
+            kind: 任务类型，如 fetch_subreddit / enrich_post
+            payloads: 每个任务的参数
+            priority: 优先级，数值越大越先被领取
+            max_attempts: 最大尝试次数，超过后进入死信状态
+
+        Returns:
+            写入的任务数量
+        """
+        if not payloads:
+            return 0
+
+        try:
+            cursor = self.connection.cursor()
+            psycopg2.extras.execute_values(
+                cursor,
+                "INSERT INTO job_queue (batch_id, kind, payload, priority, max_attempts) VALUES %s",
+                [(batch_id, kind, json.dumps(payload, ensure_ascii=False), priority, max_attempts) for payload in payloads],
+            )
+            cursor.close()
+            logger.info(f"Enqueued {len(payloads)} {kind} jobs (batch {batch_id})")
+            return len(payloads)
+
+        except psycopg2.Error as e:
+            logger.error(f"Error enqueueing jobs: {e}")
+            return 0
+
+    @db_query("claim_jobs")
+    def claim_jobs(self, worker_id: str, limit: int = 1, visibility_timeout: int = 300) -> List[Dict]:
+        """
+        领取待执行的任务（FOR UPDATE SKIP LOCKED，多个 worker 并发领取互不阻塞）
+
+        超过可见性超时仍未完成的任务视为 worker 已失联，会被重新领取。
+
+        Args:
+            worker_id: worker 标识
+            limit: 最多领取的任务数
+            visibility_timeout: 可见性超时（秒）
+
+        Returns:
+            任务列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            # 超时且已用完重试次数的任务直接进入死信
+            cursor.execute(
+                """
+                UPDATE job_queue
+                SET status = 'dead', last_error = COALESCE(last_error, 'visibility timeout exceeded'),
+                    locked_by = NULL, locked_until = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'running' AND locked_until < CURRENT_TIMESTAMP AND attempts >= max_attempts
+            """
+            )
+
+            cursor.execute(
+                """
+                UPDATE job_queue q
+                SET status = 'running',
+                    attempts = q.attempts + 1,
+                    locked_by = %s,
+                    locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE q.id IN (
+                    SELECT id FROM job_queue
+                    WHERE (status = 'pending' AND available_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'running' AND locked_until < CURRENT_TIMESTAMP)
+                    ORDER BY priority DESC, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING q.id, q.batch_id, q.kind, q.payload, q.attempts, q.max_attempts
+            """,
+                (worker_id, visibility_timeout, limit),
+            )
+
+            jobs = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
+            return jobs
+
+        except psycopg2.Error as e:
+            logger.error(f"Error claiming jobs: {e}")
+            return []
+
+    @db_query("complete_job")
+    def complete_job(self, job_id: int, worker_id: str) -> bool:
+        """
+        标记任务完成
+
+        Args:
+            job_id: 任务ID
+            worker_id: 领取该任务的 worker（锁已被他人接管时不覆盖）
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                UPDATE job_queue
+                SET status = 'done', locked_by = NULL, locked_until = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND locked_by = %s
+            """,
+                (job_id, worker_id),
+            )
+            updated = cursor.rowcount
+            cursor.close()
+            return updated == 1
+
+        except psycopg2.Error as e:
+            logger.error(f"Error completing job {job_id}: {e}")
+            return False
+
+    @db_query("fail_job")
+    def fail_job(self, job_id: int, worker_id: str, error: str, retry_delay: int = 30) -> bool:
+        """
+        标记任务失败：未用完重试次数则延迟后重新排队，否则进入死信
+
+        Args:
+            job_id: 任务ID
+            worker_id: 领取该任务的 worker
+            error: 错误信息
+            retry_delay: 重试延迟（秒），按尝试次数线性递增
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                UPDATE job_queue
+                SET status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END,
+                    available_at = CURRENT_TIMESTAMP + make_interval(secs => %s * attempts),
+                    last_error = %s,
+                    locked_by = NULL,
+                    locked_until = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND locked_by = %s
+            """,
+                (retry_delay, error[:1000], job_id, worker_id),
+            )
+            updated = cursor.rowcount
+            cursor.close()
+            return updated == 1
+
+        except psycopg2.Error as e:
+            logger.error(f"Error failing job {job_id}: {e}")
+            return False
+
+    @db_query("get_batch_status")
+    def get_batch_status(self, batch_id: str) -> Dict[str, int]:
+        """
+        获取批次中各状态的任务数量
+
+        Args:
+            batch_id: 批次ID
+
+        Returns:
+            {status: count}
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT status, COUNT(*) FROM job_queue WHERE batch_id = %s GROUP BY status", (batch_id,))
+            counts = {status: count for status, count in cursor.fetchall()}
+            cursor.close()
+            return counts
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting batch status: {e}")
+            return {}
+
+    @db_query("get_dead_jobs")
+    def get_dead_jobs(self, batch_id: str = None, limit: int = 50) -> List[Dict]:
+        """
+        获取死信任务
+
+        Args:
+            batch_id: 批次ID，为None时返回所有批次
+            limit: 返回记录数量限制
+
+        Returns:
+            任务列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT id, batch_id, kind, payload, attempts, last_error, updated_at
+                FROM job_queue
+                WHERE status = 'dead' AND (%s IS NULL OR batch_id = %s)
+                ORDER BY updated_at DESC
+                LIMIT %s
+            """,
+                (batch_id, batch_id, limit),
+            )
+            jobs = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
+            return jobs
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting dead jobs: {e}")
+            return []
+
+    @db_query("save_run_report")
+    def save_run_report(self, report: Dict) -> bool:
+        """
+        保存一次任务运行的计时报告
+
+        Args:
+            report: tracing.RunTrace.report() 生成的报告
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                INSERT INTO job_runs (run_id, job_name, started_at, duration_seconds, success, report)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (run_id) DO UPDATE SET
+                    duration_seconds = EXCLUDED.duration_seconds,
+                    success = EXCLUDED.success,
+                    report = EXCLUDED.report
+            """,
+                (
+                    report["run_id"],
+                    report["job_name"],
+                    report["started_at"],
+                    report["duration_seconds"],
+                    report["success"],
+                    json.dumps(report, ensure_ascii=False),
+                ),
+            )
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving run report: {e}")
+            return False
+
+    @db_query("get_run_reports")
+    def get_run_reports(self, limit: int = 10, job_name: str = None) -> List[Dict]:
+        """
+        获取最近的任务运行计时报告
+
+        Args:
+            limit: 返回记录数量限制
+            job_name: 只返回指定任务的报告
+
+        Returns:
+            报告列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT report FROM job_runs
+                WHERE (%s IS NULL OR job_name = %s)
+                ORDER BY started_at DESC
+                LIMIT %s
+            """,
+                (job_name, job_name, limit),
+            )
+            reports = [row["report"] for row in cursor.fetchall()]
+            cursor.close()
+            return reports
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting run reports: {e}")
+            return []
+
+    @db_query("create_job")
+    def create_job(self, job_id: str, kind: str, params: Dict = None) -> bool:
+        """
+        登记一个新任务（状态为 queued）
+
+        Args:
+            job_id: 任务ID
+            kind: 任务类型，如 scraper_run、newsletter_send
+            params: 任务参数
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "INSERT INTO jobs (id, kind, params) VALUES (%s, %s, %s)",
+                (job_id, kind, json.dumps(params or {}, ensure_ascii=False)),
+            )
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error creating job {job_id}: {e}")
+            return False
+
+    @db_query("update_job")
+    def update_job(
+        self,
+        job_id: str,
+        status: str = None,
+        stage: str = None,
+        progress: Dict = None,
+        stages: Dict = None,
+        result: Dict = None,
+        error: str = None,
+        owner: str = None,
+    ) -> bool:
+        """
+        更新任务状态和进度（为None的字段保持不变；progress 与已有进度合并）
+
+        Args:
+            job_id: 任务ID
+            status: queued / running / succeeded / failed
+            stage: 当前阶段
+            progress: 进度计数，如 {"posts_fetched": 120}
+            stages: 各阶段计时
+            result: 最终结果
+            error: 错误信息
+            owner: 执行任务的进程（主机名:PID）
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                UPDATE jobs SET
+                    status = COALESCE(%s, status),
+                    stage = COALESCE(%s, stage),
+                    progress = progress || COALESCE(%s::jsonb, '{}'::jsonb),
+                    stages = COALESCE(%s::jsonb, stages),
+                    result = COALESCE(%s::jsonb, result),
+                    error = COALESCE(%s, error),
+                    owner = COALESCE(%s, owner),
+                    started_at = CASE WHEN %s = 'running' THEN COALESCE(started_at, CURRENT_TIMESTAMP) ELSE started_at END,
+                    finished_at = CASE WHEN %s IN ('succeeded', 'failed') THEN CURRENT_TIMESTAMP ELSE finished_at END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """,
+                (
+                    status,
+                    stage,
+                    json.dumps(progress, ensure_ascii=False) if progress is not None else None,
+                    json.dumps(stages, ensure_ascii=False) if stages is not None else None,
+                    json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                    error,
+                    owner,
+                    status,
+                    status,
+                    job_id,
+                ),
+            )
+            updated = cursor.rowcount == 1
+            cursor.close()
+            return updated
+
+        except psycopg2.Error as e:
+            logger.error(f"Error updating job {job_id}: {e}")
+            return False
+
+    @db_query("get_job")
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        获取任务状态
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务字典（时间字段为 ISO 格式字符串），不存在时返回None
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("SELECT * FROM jobs WHERE id = %s", (job_id,))
+            row = cursor.fetchone()
+            cursor.close()
+            if row is None:
+                return None
+            job = dict(row)
+            for key in ("created_at", "started_at", "finished_at", "updated_at"):
+                if job[key] is not None:
+                    job[key] = job[key].isoformat()
+            return job
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting job {job_id}: {e}")
+            return None
+
+    @db_query("get_recent_jobs")
+    def get_recent_jobs(self, limit: int = 20, kind: str = None) -> List[Dict]:
+        """
+        获取最近登记的任务
+
+        Args:
+            limit: 返回记录数量限制
+            kind: 只返回指定类型的任务
+
+        Returns:
+            任务列表（不含 params 和 result）
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT id, kind, status, stage, progress, error, created_at, started_at, finished_at
+                FROM jobs
+                WHERE (%s IS NULL OR kind = %s)
+                ORDER BY created_at DESC
+                LIMIT %s
+            """,
+                (kind, kind, limit),
+            )
+            jobs = []
+            for row in cursor.fetchall():
+                job = dict(row)
+                for key in ("created_at", "started_at", "finished_at"):
+                    if job[key] is not None:
+                        job[key] = job[key].isoformat()
+                jobs.append(job)
+            cursor.close()
+            return jobs
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting recent jobs: {e}")
+            return []
+
+    @db_query("get_cached_listing")
+    def get_cached_listing(self, cache_key: str) -> Optional[Dict]:
+        """
+        读取共享的列表缓存
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            {"posts", "etag", "fetched_at"(Unix时间戳)}，不存在时返回None
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT posts, etag, EXTRACT(EPOCH FROM fetched_at) AS fetched_at
+                FROM listing_cache WHERE cache_key = %s
+            """,
+                (cache_key,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            if row is None:
+                return None
+            return {"posts": row["posts"], "etag": row["etag"], "fetched_at": float(row["fetched_at"])}
+
+        except psycopg2.Error as e:
+            logger.error(f"Error reading listing cache {cache_key}: {e}")
+            return None
+
+    @db_query("save_cached_listing")
+    def save_cached_listing(self, cache_key: str, posts: List[Dict], etag: str, fetched_at: float) -> bool:
+        """
+        写入共享的列表缓存
+
+        Args:
+            cache_key: 缓存键
+            posts: 帖子列表
+            etag: 内容 ETag
+            fetched_at: 抓取时间（Unix时间戳）
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                INSERT INTO listing_cache (cache_key, posts, etag, fetched_at)
+                VALUES (%s, %s, %s, TO_TIMESTAMP(%s) AT TIME ZONE 'UTC')
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    posts = EXCLUDED.posts,
+                    etag = EXCLUDED.etag,
+                    fetched_at = EXCLUDED.fetched_at
+                WHERE listing_cache.fetched_at < EXCLUDED.fetched_at
+            """,
+                (cache_key, json.dumps(posts, ensure_ascii=False, default=json_default), etag, fetched_at),
+            )
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving listing cache {cache_key}: {e}")
+            return False
+
+    @db_query("get_listing_cursor")
+    def get_listing_cursor(self, cursor_key: str) -> Optional[Dict]:
+        """
+        读取列表游标
+
+        Returns:
+            {"seen_ids": [帖子ID，按列表顺序], "fetched_at": Unix时间戳}，没有时返回None
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "SELECT seen_ids, EXTRACT(EPOCH FROM fetched_at) FROM listing_cursors WHERE cursor_key = %s",
+                (cursor_key,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            if row is None:
+                return None
+            return {"seen_ids": row[0], "fetched_at": float(row[1])}
+
+        except psycopg2.Error as e:
+            logger.error(f"Error reading listing cursor {cursor_key}: {e}")
+            return None
+
+    @db_query("save_listing_cursor")
+    def save_listing_cursor(self, cursor_key: str, seen_ids: List[str], fetched_at: float) -> bool:
+        """
+        写入列表游标
+
+        Args:
+            cursor_key: 游标键（subreddit + 列表类型）
+            seen_ids: 已见过的帖子ID（按列表顺序）
+            fetched_at: 抓取时间（Unix时间戳）
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                INSERT INTO listing_cursors (cursor_key, seen_ids, fetched_at)
+                VALUES (%s, %s, TO_TIMESTAMP(%s) AT TIME ZONE 'UTC')
+                ON CONFLICT (cursor_key) DO UPDATE SET
+                    seen_ids = EXCLUDED.seen_ids,
+                    fetched_at = EXCLUDED.fetched_at
+            """,
+                (cursor_key, json.dumps(seen_ids), fetched_at),
+            )
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving listing cursor {cursor_key}: {e}")
+            return False
+
+    @db_query("take_reddit_ratelimit")
+    def take_reddit_ratelimit(self, ratelimit_key: str, reserve: int) -> float:
+        """
+        从共享配额中原子地扣减一次请求
+
+        Args:
+            ratelimit_key: 配额键
+            reserve: 剩余配额不超过该值时不再扣减
+
+        Returns:
+            需要等待的秒数：0 表示已扣减（或还没有共享配额、窗口已经重置），否则为距离窗口重置的秒数
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                UPDATE reddit_ratelimit SET remaining = remaining - 1
+                WHERE ratelimit_key = %s
+                    AND remaining > %s
+                    AND reset_at > (CURRENT_TIMESTAMP AT TIME ZONE 'UTC')
+                RETURNING remaining
+            """,
+                (ratelimit_key, reserve),
+            )
+            if cursor.fetchone() is not None:
+                cursor.close()
+                return 0.0
+            cursor.execute(
+                """
+                SELECT EXTRACT(EPOCH FROM reset_at - (CURRENT_TIMESTAMP AT TIME ZONE 'UTC'))
+                FROM reddit_ratelimit WHERE ratelimit_key = %s
+            """,
+                (ratelimit_key,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            return max(float(row[0]), 0.0) if row is not None else 0.0
+
+        except psycopg2.Error as e:
+            # 共享层不可用时只按进程内的令牌桶限流
+            logger.error(f"Error taking Reddit rate limit {ratelimit_key}: {e}")
+            return 0.0
+
+    @db_query("save_reddit_ratelimit")
+    def save_reddit_ratelimit(self, ratelimit_key: str, remaining: float, reset_at: float) -> bool:
+        """
+        按响应头更新共享配额；同一个窗口内保留较小的剩余数（其他进程的请求可能还没有返回）
+
+        Args:
+            ratelimit_key: 配额键
+            remaining: X-Ratelimit-Remaining
+            reset_at: 窗口重置时间（Unix时间戳）
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                INSERT INTO reddit_ratelimit (ratelimit_key, remaining, reset_at)
+                VALUES (%s, %s, TO_TIMESTAMP(%s) AT TIME ZONE 'UTC')
+                ON CONFLICT (ratelimit_key) DO UPDATE SET
+                    remaining = CASE
+                        WHEN EXCLUDED.reset_at > reddit_ratelimit.reset_at + INTERVAL '2 seconds' THEN EXCLUDED.remaining
+                        ELSE LEAST(reddit_ratelimit.remaining, EXCLUDED.remaining)
+                    END,
+                    reset_at = GREATEST(reddit_ratelimit.reset_at, EXCLUDED.reset_at)
+            """,
+                (ratelimit_key, remaining, reset_at),
+            )
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving Reddit rate limit {ratelimit_key}: {e}")
+            return False
+
+    @db_query("upsert_subscriber")
+    def upsert_subscriber(self, email: str, subreddits: List[str]) -> Optional[int]:
+        """
+        新增或重新激活订阅者，并把订阅集合替换为 subreddits（单条语句完成）
+
+        Args:
+            email: 邮箱地址（已规范化）
+            subreddits: subreddit 名称列表（已规范化）
+
+        Returns:
+            订阅者ID，失败时返回None
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                WITH subscriber AS (
+                    INSERT INTO subscribers (email) VALUES (%s)
+                    ON CONFLICT (email) DO UPDATE SET active = TRUE, updated_at = CURRENT_TIMESTAMP
+                    RETURNING id
+                ), removed AS (
+                    DELETE FROM subscriptions
+                    WHERE subscriber_id = (SELECT id FROM subscriber) AND NOT (subreddit = ANY(%s))
+                ), added AS (
+                    INSERT INTO subscriptions (subscriber_id, subreddit)
+                    SELECT subscriber.id, UNNEST(%s::varchar[]) FROM subscriber
+                    ON CONFLICT DO NOTHING
+                )
+                SELECT id FROM subscriber
+            """,
+                (email, list(subreddits), list(subreddits)),
+            )
+            subscriber_id = cursor.fetchone()[0]
+            cursor.close()
+            return subscriber_id
+
+        except psycopg2.Error as e:
+            logger.error(f"Error saving subscriber {email}: {e}")
+            return None
+
+    @db_query("deactivate_subscriber")
+    def deactivate_subscriber(self, email: str) -> bool:
+        """
+        取消订阅（保留订阅记录，重新订阅时覆盖）
+
+        Args:
+            email: 邮箱地址
+
+        Returns:
+            订阅者是否存在
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                "UPDATE subscribers SET active = FALSE, updated_at = CURRENT_TIMESTAMP WHERE email = %s",
+                (email,),
+            )
+            found = cursor.rowcount == 1
+            cursor.close()
+            return found
+
+        except psycopg2.Error as e:
+            logger.error(f"Error unsubscribing {email}: {e}")
+            return False
+
+    @db_query("get_subscriber")
+    def get_subscriber(self, email: str) -> Optional[Dict]:
+        """
+        获取订阅者及其订阅的 subreddit
+
+        Args:
+            email: 邮箱地址
+
+        Returns:
+            {"email", "active", "subreddits", "created_at"}，不存在时返回None
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT sub.email, sub.active, sub.created_at,
+                       COALESCE(ARRAY_AGG(s.subreddit ORDER BY s.subreddit)
+                                FILTER (WHERE s.subreddit IS NOT NULL), '{}') AS subreddits
+                FROM subscribers sub
+                LEFT JOIN subscriptions s ON s.subscriber_id = sub.id
+                WHERE sub.email = %s
+                GROUP BY sub.id
+            """,
+                (email,),
+            )
+            row = cursor.fetchone()
+            cursor.close()
+            if row is None:
+                return None
+            subscriber = dict(row)
+            subscriber["created_at"] = subscriber["created_at"].isoformat()
+            return subscriber
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting subscriber {email}: {e}")
+            return None
+
+    @db_query("get_subscription_index")
+    def get_subscription_index(self) -> Dict[str, List[str]]:
+        """
+        获取 subreddit -> 订阅者邮箱 的倒排索引（只含有效订阅者）
+
+        Returns:
+            {subreddit: [email, ...]}
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(
+                """
+                SELECT s.subreddit, ARRAY_AGG(sub.email ORDER BY sub.email)
+                FROM subscriptions s
+                JOIN subscribers sub ON sub.id = s.subscriber_id
+                WHERE sub.active
+                GROUP BY s.subreddit
+            """
+            )
+            index = {subreddit: emails for subreddit, emails in cursor.fetchall()}
+            cursor.close()
+            return index
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting subscription index: {e}")
+            return {}
+
+    @db_query("log_newsletter_send")
+    def log_newsletter_send(
+        self,
+        posts_count: int,
+        success: bool,
+        error_message: str = None,
+        recipients: List[str] = None,
+        editor_words: str = None,
+        newsletter_title: str = None,
+    ) -> bool:
+        """
+        记录Newsletter发送日志
+
+        Args:
+            posts_count: 帖子数量
+            success: 是否成功
+            error_message: 错误信息
+            recipients: 收件人列表
+            editor_words: 编辑寄语
+            newsletter_title: Newsletter标题
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            cursor = self.connection.cursor()
+
+            cursor.execute(
+                """
+                INSERT INTO newsletter_logs 
+                (posts_count, success, error_message, recipients, editor_words, newsletter_title)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+                (
+                    posts_count,
+                    success,
+                    error_message,
+                    json.dumps(recipients) if recipients else None,
+                    editor_words,
+                    newsletter_title,
+                ),
+            )
+
+            cursor.close()
+            return True
+
+        except psycopg2.Error as e:
+            logger.error(f"Error logging newsletter send: {e}")
+            return False
+
+    @db_query("get_recent_posts")
+    def get_recent_posts(self, days: int = 7) -> List[Dict]:
+        """
+        获取最近几天发送的帖子
+
+        Args:
+            days: 天数
+
+        Returns:
+            帖子列表
+        """
+        try:
+            cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            cursor.execute(
+                """
+                SELECT * FROM posts 
+                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
+                ORDER BY sent_at DESC
+            """,
+                (days,),
+            )
+
+            rows = cursor.fetchall()
+
+            posts = []
+            for row in rows:
+                post_dict = dict(row)
+                if post_dict["data_json"]:
+                    try:
+                        additional_data = (
+                            json.loads(post_dict["data_json"])
+                            if isinstance(post_dict["data_json"], str)
+                            else post_dict["data_json"]
+                        )
+                        post_dict.update(additional_data)
+                    except (json.JSONDecodeError, TypeError):
+                        pass
+                posts.append(post_dict)
+
+            cursor.close()
+            return posts
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting recent posts: {e}")
+            return []
+
+    @db_query("get_newsletter_stats")
+    def get_newsletter_stats(self, days: int = 30) -> Dict:
+        """
+        获取Newsletter统计信息
+
+        Args:
+            days: 统计天数
+
+        Returns:
+            统计信息字典
+        """
+        try:
+            cursor = self.connection.cursor()
+
+            # 总发送次数
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM newsletter_logs 
+                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+            total_sends = cursor.fetchone()[0]
+
+            # 成功发送次数
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM newsletter_logs 
+                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days' AND success = true
+            """,
+                (days,),
+            )
+            successful_sends = cursor.fetchone()[0]
+
+            # 总帖子数
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM posts 
+                WHERE sent_at >= CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+            total_posts = cursor.fetchone()[0]
+
+            # 最后发送时间
+            cursor.execute(
+                """
+                SELECT MAX(sent_at) FROM newsletter_logs 
+                WHERE success = true
+            """
+            )
+            last_send_result = cursor.fetchone()
+            last_send = last_send_result[0] if last_send_result and last_send_result[0] else None
+
+            cursor.close()
+
+            return {
+                "total_sends": total_sends,
+                "successful_sends": successful_sends,
+                "success_rate": successful_sends / total_sends if total_sends > 0 else 0,
+                "total_posts": total_posts,
+                "last_send": last_send,
+                "days": days,
+            }
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting newsletter stats: {e}")
+            return {}
+
+    @db_query("cleanup_old_data")
+    def cleanup_old_data(self, days: int = 90):
+        """
+        清理旧数据
+
+        Args:
+            days: 保留天数
+        """
+        try:
+            cursor = self.connection.cursor()
+
+            # 删除旧帖子记录
+            cursor.execute(
+                """
                 DELETE FROM posts 
                 WHERE sent_at < CURRENT_TIMESTAMP - INTERVAL '%s days'
             """,
@@ -444,8 +1802,58 @@ class DatabaseManager:
             )
             deleted_logs = cursor.rowcount
 
+            # 删除过期的候选帖子
+            cursor.execute(
+                """
+                DELETE FROM post_candidates 
+                WHERE last_seen_at < CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+            deleted_candidates = cursor.rowcount
+
+            # 删除旧的分数快照（ts 存的是 UTC 时间）
+            cursor.execute(
+                """
+                DELETE FROM post_snapshots 
+                WHERE ts < (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+
+            # 删除已结束的旧任务（死信保留同样的天数以便排查）
+            cursor.execute(
+                """
+                DELETE FROM job_queue 
+                WHERE status IN ('done', 'dead') AND updated_at < CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+
+            cursor.execute(
+                """
+                DELETE FROM job_runs 
+                WHERE started_at < CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+
+            cursor.execute(
+                """
+                DELETE FROM jobs 
+                WHERE created_at < CURRENT_TIMESTAMP - INTERVAL '%s days'
+            """,
+                (days,),
+            )
+
+            # 列表缓存只需保留最近的数据（fetched_at 存的是 UTC 时间）
+            cursor.execute("DELETE FROM listing_cache WHERE fetched_at < (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - INTERVAL '1 day'")
+
             cursor.close()
-            logger.info(f"Cleanup completed: deleted {deleted_posts} post records and {deleted_logs} log records")
+            logger.info(
+                f"Cleanup completed: deleted {deleted_posts} post records, {deleted_logs} log records "
+                f"and {deleted_candidates} candidate records"
+            )
 
         except psycopg2.Error as e:
             logger.error(f"Error cleaning old data: {e}")
@@ -453,9 +1861,12 @@ class DatabaseManager:
     def close(self):
         """关闭数据库连接"""
         if self.connection:
+            if not self.connection.closed:
+                DB_CONNECTIONS.dec()
             self.connection.close()
             logger.info("PostgreSQL database connection closed")
 
+    @db_query("get_newsletter_history")
     def get_newsletter_history(self, limit: int = 10) -> List[Dict]:
         """
         获取Newsletter发送历史
@@ -504,6 +1915,7 @@ class DatabaseManager:
             logger.error(f"Error getting newsletter history: {e}")
             return []
 
+    @db_query("get_posts_with_summaries")
     def get_posts_with_summaries(self, limit: int = 20) -> List[Dict]:
         """
         获取带有GPT总结的帖子
@@ -554,6 +1966,7 @@ class DatabaseManager:
             logger.error(f"Error getting posts with summaries: {e}")
             return []
 
+    @db_query("get_total_posts_count")
     def get_total_posts_count(self) -> int:
         """获取数据库中总帖子数量"""
         try:
@@ -566,13 +1979,14 @@ class DatabaseManager:
             logger.error(f"Error getting total posts count: {e}")
             return 0
 
+    @db_query("clear_all_history")
     def clear_all_history(self):
         """清空所有历史记录"""
         try:
             cursor = self.connection.cursor()
 
             # 清空表数据
-            tables_to_clear = ["posts", "newsletter_logs", "settings"]
+            tables_to_clear = ["posts", "newsletter_logs", "settings", "post_candidates", "post_snapshots", "listing_cursors", "job_queue", "job_runs", "jobs", "listing_cache"]
 
             for table in tables_to_clear:
                 # 检查表是否存在
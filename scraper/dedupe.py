@@ -0,0 +1,186 @@
+"""Dedupe - 候选帖子的近似重复和转帖检测模块
+
+同一条新闻经常同时出现在 r/worldnews、r/technology、r/science，或者以转帖（crosspost）的形式指向同一个链接。
+按帖子ID去重（reddit_scraper.dedupe_posts）识别不出这些副本，每一份都会单独获取评论、调用两次 GPT，
+还可能同时进入一期 Newsletter。这里在补充评论和摘要之前把候选帖子聚类，每个簇只保留排序分数最高的帖子：
+
+- 链接：规范化后的 URL 相同（统一 https、去掉 www. / m. 前缀、跟踪参数和锚点，参数排序，youtu.be 与 redd.it 短链展开）
+- 转帖：crosspost_parent 指向的帖子，或链接本身就是另一个 Reddit 帖子
+- 标题：词集合的 MinHash 签名按 LSH_BANDS 段分桶，同一桶内的标题再用词集合的 Jaccard 相似度确认
+
+所有键都放进字典（哈希）分桶，桶内用并查集合并，整体近线性；同一个桶内只和尚未归入已有簇的代表比较。
+
+    candidates, scores = rank_unique(candidates, config)   # 每个簇的代表，按排序分数降序
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .ranking import Ranker
+from .sketches import MINHASH_PERMUTATIONS, minhash_many, title_features
+from .tracing import incr
+
+logger = logging.getLogger(__name__)
+
+# MinHash 签名分为 LSH_BANDS 段，每段 MINHASH_PERMUTATIONS / LSH_BANDS 个值；
+# 8 x 4 时 Jaccard 0.6 的标题有约 67% 的概率至少一段相同，0.8 时约 98.5%
+LSH_BANDS = 8
+
+# 标题词集合的 Jaccard 相似度达到该值视为同一内容；特征太少的标题（如 "Daily Discussion"）不参与标题聚类
+TITLE_SIMILARITY = 0.6
+MIN_TITLE_FEATURES = 3
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = frozenset(
+    ("fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "ref_url", "smid", "cmpid", "ocid", "si", "share_id")
+)
+_STRIPPED_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.", "old.", "new.")
+_REDDIT_POST = re.compile(r"/comments/([a-z0-9]+)")
+
+
+def canonical_url(url: str) -> Optional[str]:
+    """
+    规范化链接，用于判断两个帖子是否指向同一内容
+
+    Returns:
+        规范化的 URL；Reddit 帖子链接返回 "reddit:<帖子ID>"；无法解析时返回 None
+    """
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return None
+    if not host:
+        return None
+    for prefix in _STRIPPED_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+            break
+    path = parts.path.rstrip("/")
+
+    if host in ("reddit.com", "np.reddit.com"):
+        match = _REDDIT_POST.search(path.lower())
+        if match:
+            return f"reddit:{match.group(1)}"
+    if host == "redd.it" and path:
+        return f"reddit:{path.lstrip('/').lower()}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+    if host == "youtu.be" and path:
+        host, query, path = "youtube.com", [("v", path.lstrip("/"))], "/watch"
+    return f"https://{host}{path}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+
+def cluster_duplicates(posts: List[Dict]) -> List[int]:
+    """
+    把指向同一内容的帖子聚类
+
+    Returns:
+        每个帖子所属簇的编号（簇内最小的下标）
+    """
+    clusters = _UnionFind(len(posts))
+
+    # 链接和转帖：相同的键合并到第一次出现的帖子
+    owners: Dict[str, int] = {}
+    for index, post in enumerate(posts):
+        keys = [f"reddit:{post['id']}", canonical_url(post.get("url", ""))]
+        parent = post.get("crosspost_parent")
+        if parent:
+            keys.append(f"reddit:{parent.removeprefix('t3_')}")
+        for key in keys:
+            if key is None:
+                continue
+            if key in owners:
+                clusters.union(owners[key], index)
+            else:
+                owners[key] = index
+
+    # 标题：MinHash LSH 分桶，桶内确认 Jaccard 相似度
+    features = [frozenset(title_features(post.get("title", ""))) for post in posts]
+    signatures = minhash_many(post.get("title", "") for post in posts)
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    for band in range(LSH_BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        band_signatures = signatures[:, band * rows : (band + 1) * rows]
+        for index, words in enumerate(features):
+            if len(words) >= MIN_TITLE_FEATURES:
+                buckets.setdefault(band_signatures[index].tobytes(), []).append(index)
+        for members in buckets.values():
+            # 桶内每个帖子只与各个簇的第一个代表比较
+            representatives: List[int] = []
+            for index in members:
+                for representative in representatives:
+                    if clusters.find(index) == clusters.find(representative):
+                        break
+                    if _jaccard(features[index], features[representative]) >= TITLE_SIMILARITY:
+                        clusters.union(index, representative)
+                        break
+                else:
+                    representatives.append(index)
+
+    return [clusters.find(index) for index in range(len(posts))]
+
+
+def _jaccard(first: frozenset, second: frozenset) -> float:
+    return len(first & second) / len(first | second)
+
+
+def remove_duplicates(posts: List[Dict], scores: Sequence[float]) -> List[int]:
+    """
+    每个簇只保留排序分数最高的帖子
+
+    Args:
+        posts: 候选帖子（已按ID去重）
+        scores: 每个帖子的排序分数
+
+    Returns:
+        保留的帖子下标，按分数降序
+    """
+    best: Dict[int, int] = {}
+    for index, cluster in enumerate(cluster_duplicates(posts)):
+        if cluster not in best or scores[index] > scores[best[cluster]]:
+            best[cluster] = index
+    keep = sorted(best.values(), key=lambda index: -scores[index])
+    if len(keep) < len(posts):
+        incr("posts.duplicates_dropped", len(posts) - len(keep))
+        logger.info(f"Dropped {len(posts) - len(keep)} duplicate posts ({len(keep)} unique stories)")
+    return keep
+
+
+def rank_unique(posts: List[Dict], config) -> Tuple[List[Dict], List[float]]:
+    """
+    按当前配置计算排序分数并去掉重复
+
+    Returns:
+        (每个簇的代表帖子，按分数降序, 对应的排序分数)
+    """
+    if not posts:
+        return [], []
+    scores = Ranker(config).scores(posts).tolist()
+    keep = remove_duplicates(posts, scores)
+    return [posts[index] for index in keep], [scores[index] for index in keep]
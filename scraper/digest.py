@@ -0,0 +1,186 @@
+"""Digest - 按订阅者组装 Newsletter 的模块
+
+订阅关系以倒排索引 {subreddit: [email, ...]} 的形式读取（database_manager.get_subscription_index）。
+每个被订阅的 subreddit 按其 profile 只抓取一次，形成按排序分数（scraper/ranking.py，对全部候选统一计算）降序排列的共享候选池；每个订阅者的候选由其订阅的几个候选池
+做堆归并（heapq.merge）得到，只消费前 CANDIDATE_POOL_FACTOR * K 个元素，再经过多样性选择（scraper/selection.py，
+每个 subreddit 有上限、跳过标题相近的帖子）得到 top-K；标题草图对全部候选只计算一次。入选帖子的评论和摘要也只生成一次，由所有选中它的订阅者共用。
+
+Reddit 和 OpenAI 请求数只与不同 subreddit 的数量和入选帖子数有关，与订阅者数量无关；
+订阅集合相同的订阅者共用同一次归并。
+
+    builder = DigestBuilder(config, reddit, db)
+    digests = builder.build(db.get_subscription_index())
+    for recipients, posts in group_by_selection(digests):
+        ...
+"""
+
+import re
+import heapq
+import logging
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .reddit_scraper import dedupe_posts
+
+logger = logging.getLogger(__name__)
+
+# Reddit 的 subreddit 名称：字母、数字、下划线，最长 21 个字符
+SUBREDDIT_NAME = re.compile(r"^[a-z0-9][a-z0-9_]{1,20}$")
+
+
+def normalize_subreddits(names: Iterable[str]) -> List[str]:
+    """规范化 subreddit 名称（去掉 r/ 前缀、转小写、去重），跳过不合法的名称"""
+    normalized = []
+    for name in names:
+        name = name.strip().lower().removeprefix("/").removeprefix("r/")
+        if SUBREDDIT_NAME.match(name) and name not in normalized:
+            normalized.append(name)
+    return normalized
+
+
+def invert_index(index: Dict[str, List[str]]) -> Dict[str, Tuple[str, ...]]:
+    """把 subreddit -> 订阅者 的倒排索引还原为 订阅者 -> 订阅的 subreddit（排序后的元组，可作为字典键）"""
+    subscriptions: Dict[str, List[str]] = {}
+    for subreddit, emails in index.items():
+        for email in emails:
+            subscriptions.setdefault(email, []).append(subreddit)
+    return {email: tuple(sorted(subreddits)) for email, subreddits in subscriptions.items()}
+
+
+def _by_score_desc(post: Dict) -> int:
+    return -post["score"]
+
+
+def merge_top_k(pools: List[List[Dict]], k: int, key: Callable[[Dict], float] = _by_score_desc) -> List[Dict]:
+    """从多个按 key 升序（默认分数降序）排列的候选池中取出前 k 条（堆归并，不对整个并集排序）"""
+    return list(islice(heapq.merge(*pools, key=key), k))
+
+
+def group_by_selection(digests: Dict[str, List[Dict]]) -> List[Tuple[List[str], List[Dict]]]:
+    """把入选帖子完全相同的订阅者分为一组，每组只需渲染一次、生成一次编辑寄语
+
+    Returns:
+        [(订阅者邮箱列表, 帖子列表)]
+    """
+    groups: Dict[Tuple[str, ...], Tuple[List[str], List[Dict]]] = {}
+    for email, posts in digests.items():
+        key = tuple(post["id"] for post in posts)
+        groups.setdefault(key, ([], posts))[0].append(email)
+    return list(groups.values())
+
+
+class DigestBuilder:
+    """
+    按订阅者组装 Newsletter
+
+    Args:
+        config: 配置管理器
+        reddit: RedditScraper
+        db: DatabaseManager（用于过滤已发送的帖子），为None时不过滤
+    """
+
+    def __init__(self, config, reddit, db=None):
+        self.config = config
+        self.reddit = reddit
+        self.db = db
+        self._rank: Dict[str, float] = {}
+        self._sketches: Dict[str, int] = {}
+
+    def build_pools(self, subreddits: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        每个 subreddit 按其 profile 抓取一次，过滤 NSFW 和已发送的帖子
+
+        Returns:
+            {subreddit: 按排序分数降序排列的帖子列表}
+        """
+        fetched: Dict[str, List[Dict]] = {}
+        for subreddit in subreddits:
+            try:
+                fetched[subreddit] = self.reddit.fetch_subreddit_posts(subreddit)
+            except Exception as e:
+                logger.error(f"Error scraping r/{subreddit}: {e}")
+                fetched[subreddit] = []
+
+        candidates = dedupe_posts([post for posts in fetched.values() for post in posts])
+        if not self.config.get_include_nsfw():
+            candidates = [post for post in candidates if not post["over_18"]]
+        if self.db is not None:
+            self.db.record_snapshots(candidates)
+            candidates = self.db.filter_new_posts(candidates)
+
+        # 排序分数对全部候选统一计算一次（z-score 依赖整体分布），归并时按帖子ID查表；
+        # 多个 subreddit 中的同一内容只保留分数最高的一份，只出现在它所在 subreddit 的候选池中
+        from .dedupe import rank_unique
+        from .sketches import simhash_many
+
+        candidates, scores = rank_unique(candidates, self.config)
+        ids = [post["id"] for post in candidates]
+        self._rank = dict(zip(ids, scores))
+        self._sketches = dict(zip(ids, simhash_many(post["title"] for post in candidates)))
+
+        # 每个帖子只保留一个字典对象，补充评论和摘要后所有候选池都能看到
+        by_id = {post["id"]: post for post in candidates}
+        pools = {}
+        for subreddit, posts in fetched.items():
+            pool, seen = [], set()
+            for post in posts:
+                if post["id"] in by_id and post["id"] not in seen:
+                    seen.add(post["id"])
+                    pool.append(by_id[post["id"]])
+            pool.sort(key=self._rank_key)
+            pools[subreddit] = pool
+        return pools
+
+    def _rank_key(self, post: Dict) -> float:
+        return -self._rank[post["id"]]
+
+    def build(self, index: Dict[str, List[str]], limit: int = None, progress: Callable = None) -> Dict[str, List[Dict]]:
+        """
+        为每个订阅者选出 top-K 帖子，并为入选帖子补充评论和摘要（每个帖子只补充一次）
+
+        Args:
+            index: subreddit -> 订阅者邮箱 的倒排索引
+            limit: 每份 Newsletter 的帖子数，默认使用 NEWSLETTER_POSTS_LIMIT
+            progress: 进度回调 progress(stage=None, **counters)
+
+        Returns:
+            {email: 帖子列表}（没有可发送帖子的订阅者不在结果中）
+        """
+        from .selection import CANDIDATE_POOL_FACTOR, DiversitySelector
+
+        report = progress or (lambda stage=None, **counters: None)
+        limit = limit or self.config.get_newsletter_posts_limit()
+        selector = DiversitySelector(self.config)
+        subscribers = invert_index(index)
+
+        report("fetch")
+        pools = self.build_pools(sorted(index))
+        report(posts_fetched=sum(len(pool) for pool in pools.values()))
+
+        # 订阅集合相同的订阅者共用一次归并和选择
+        selections: Dict[Tuple[str, ...], List[Dict]] = {}
+        digests = {}
+        for email, subreddits in subscribers.items():
+            if subreddits not in selections:
+                merged = merge_top_k(
+                    [pools[subreddit] for subreddit in subreddits], limit * CANDIDATE_POOL_FACTOR, self._rank_key
+                )
+                selections[subreddits] = selector.select(
+                    merged,
+                    limit,
+                    scores=[self._rank[post["id"]] for post in merged],
+                    sketches=[self._sketches[post["id"]] for post in merged],
+                )
+            if selections[subreddits]:
+                digests[email] = selections[subreddits]
+
+        selected = dedupe_posts([post for posts in selections.values() for post in posts])
+        report("enrich", summaries_total=len(selected))
+        for done, post in enumerate(self.reddit.iter_enriched(selected), 1):
+            report(summaries_done=done)
+
+        logger.info(
+            f"Built {len(digests)} digests from {len(pools)} subreddits "
+            f"({len(selections)} distinct subscriptions, {len(selected)} posts enriched)"
+        )
+        return digests
@@ -0,0 +1,103 @@
+"""Executor - 有界线程池模块
+
+把阻塞调用（PRAW、psycopg2、SMTP、OpenAI 请求）从 asyncio 事件循环中移出去执行。
+线程池的排队长度有上限：正在执行和排队的任务总数达到上限时，submit 直接抛出 ExecutorOverloaded，
+由 API 转换为 429，而不是无限排队。
+
+    io_pool = BoundedExecutor("io", max_workers=8, max_queue=32)
+    healthy = await io_pool.run(db.test_connection)
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from .tracing import bind
+from .metrics import EXECUTOR_INFLIGHT, EXECUTOR_QUEUE_SECONDS, EXECUTOR_REJECTED
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(Exception):
+    """线程池已满（执行中 + 排队中的任务数达到上限）"""
+
+    def __init__(self, pool: str, capacity: int):
+        super().__init__(f"Executor '{pool}' is at capacity ({capacity} tasks running or queued)")
+        self.pool = pool
+        self.capacity = capacity
+
+
+class BoundedExecutor:
+    """带排队上限的线程池
+
+    Args:
+        name: 线程池名称（用于线程名和指标标签）
+        max_workers: 工作线程数
+        max_queue: 所有线程都忙时最多排队的任务数
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._inflight = EXECUTOR_INFLIGHT.labels(pool=name)
+        self._queue_seconds = EXECUTOR_QUEUE_SECONDS.labels(pool=name)
+        self._rejected = EXECUTOR_REJECTED.labels(pool=name)
+
+    @property
+    def pending(self) -> int:
+        """执行中 + 排队中的任务数"""
+        return self._pending
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+        self._inflight.dec()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交任务，线程池已满时立即抛出 ExecutorOverloaded（不阻塞调用方）
+
+        Returns:
+            concurrent.futures.Future
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected.inc()
+                raise ExecutorOverloaded(self.name, self.capacity)
+            self._pending += 1
+        self._inflight.inc()
+
+        submitted = time.perf_counter()
+        # 提交方有活动的 run 时，任务记录到同一个 run
+        fn = bind(fn)
+
+        def task():
+            self._queue_seconds.observe(time.perf_counter() - submitted)
+            return fn(*args, **kwargs)
+
+        try:
+            future = self._executor.submit(task)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """在线程池中执行并等待结果（供 async 接口使用）"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def status(self) -> dict:
+        return {"workers": self.max_workers, "capacity": self.capacity, "pending": self._pending}
+
+    def shutdown(self, wait: bool = False):
+        """停止接收新任务；wait=False 时不等待正在执行的任务结束"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        logger.info(f"Executor '{self.name}' shut down")
@@ -0,0 +1,96 @@
+"""Job Registry - 任务登记与进度跟踪模块
+
+API 触发的任务在 jobs 表中登记，执行过程中通过进度回调写入当前阶段、计数和各阶段耗时，
+因此任务状态在重启后仍可查询，多个副本也能看到同一个任务。
+
+    registry = JobRegistry(db)
+    job_id = registry.create("scraper_run")
+    tracker = registry.tracker(job_id)
+    tracker("fetch", posts_fetched=120)
+    tracker.finish(success=True)
+"""
+
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobTracker:
+    """单个任务的进度回调：tracker(stage, **counters)
+
+    切换阶段时记录上一阶段的耗时；计数与已有进度合并后写入数据库。
+    """
+
+    def __init__(self, db, job_id: str):
+        self.db = db
+        self.job_id = job_id
+        self.stage = None
+        self.stages: Dict[str, Dict] = {}
+        self._stage_start = None
+        self._lock = threading.Lock()
+
+    def _close_stage(self, now: float):
+        if self.stage is not None:
+            self.stages[self.stage]["seconds"] = round(now - self._stage_start, 3)
+
+    def __call__(self, stage: str = None, **counters):
+        with self._lock:
+            stages = None
+            if stage is not None and stage != self.stage:
+                now = time.monotonic()
+                self._close_stage(now)
+                self.stage, self._stage_start = stage, now
+                self.stages[stage] = {"started_at": time.time(), "seconds": None}
+                stages = dict(self.stages)
+            self.db.update_job(self.job_id, stage=stage, progress=counters or None, stages=stages)
+
+    def finish(self, success: bool, error: str = None, result: Dict = None):
+        """记录最终结果"""
+        with self._lock:
+            self._close_stage(time.monotonic())
+            self.db.update_job(
+                self.job_id,
+                status=JOB_SUCCEEDED if success else JOB_FAILED,
+                stages=dict(self.stages),
+                result=result,
+                error=error,
+            )
+        logger.info(f"Job {self.job_id} {'succeeded' if success else 'failed'}")
+
+
+class JobRegistry:
+    """基于 jobs 表的任务登记"""
+
+    def __init__(self, db):
+        self.db = db
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def create(self, kind: str, params: Dict = None) -> str:
+        """登记任务并返回任务ID"""
+        job_id = uuid.uuid4().hex
+        if not self.db.create_job(job_id, kind, params):
+            raise RuntimeError(f"Failed to register {kind} job")
+        return job_id
+
+    def tracker(self, job_id: str) -> JobTracker:
+        """标记任务开始执行，返回进度回调"""
+        self.db.update_job(job_id, status=JOB_RUNNING, owner=self.owner)
+        return JobTracker(self.db, job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.db.get_job(job_id)
+
+    def list(self, limit: int = 20, kind: str = None) -> List[Dict]:
+        return self.db.get_recent_jobs(limit, kind)
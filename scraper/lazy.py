@@ -0,0 +1,116 @@
+"""Lazy - 服务的延迟构造与启动计时模块
+
+服务（Reddit 客户端、数据库连接、发送器）在第一次使用时才构造，进程启动时只做最少的工作：
+
+    db_manager = Lazy("database", DatabaseManager)
+    db_manager().test_connection()   # 第一次调用时连接数据库
+
+StartupReport 记录启动各阶段的耗时（导入、启动钩子、第一次健康响应），写入日志和 /metrics。
+"""
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from .metrics import SERVICE_INIT_SECONDS, STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+
+class ServiceInitError(RuntimeError):
+    """服务构造失败（下一次调用会重试）"""
+
+    def __init__(self, name: str, error: Exception):
+        super().__init__(f"Failed to initialize {name}: {error}")
+        self.name = name
+
+
+class Lazy:
+    """
+    线程安全的延迟构造：第一次调用时执行 factory，之后返回同一个实例
+
+    Args:
+        name: 服务名称（用于日志和指标）
+        factory: 无参构造函数
+    """
+
+    def __init__(self, name: str, factory: Callable):
+        self.name = name
+        self.factory = factory
+        self.init_seconds: Optional[float] = None
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not _UNSET
+
+    def __call__(self):
+        value = self._value
+        if value is not _UNSET:
+            return value
+        with self._lock:
+            if self._value is _UNSET:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    logger.error(f"Failed to initialize {self.name}: {e}")
+                    raise ServiceInitError(self.name, e) from e
+                self.init_seconds = time.perf_counter() - start
+                SERVICE_INIT_SECONDS.labels(service=self.name).set(self.init_seconds)
+                logger.info(f"Initialized {self.name} in {self.init_seconds * 1000:.0f}ms")
+            return self._value
+
+    def reset(self):
+        """丢弃已构造的实例，返回它（供关闭时清理）"""
+        with self._lock:
+            value, self._value = self._value, _UNSET
+        return None if value is _UNSET else value
+
+
+class StartupReport:
+    """启动阶段计时：每次 mark 记录距上一次 mark 的耗时"""
+
+    def __init__(self, started_at: float = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._last = self.started_at
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str, once: bool = False) -> Optional[float]:
+        """
+        记录一个阶段结束
+
+        Args:
+            phase: 阶段名称
+            once: 为True时只记录第一次（如第一次健康响应）
+
+        Returns:
+            该阶段耗时（秒）；once=True 且已记录过时返回None
+        """
+        with self._lock:
+            if once and phase in self.phases:
+                return None
+            now = time.perf_counter()
+            seconds = now - self._last
+            self._last = now
+            self.phases[phase] = seconds
+        STARTUP_SECONDS.labels(phase=phase).set(seconds)
+        return seconds
+
+    def since_start(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            phases = {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+        return {"phases_ms": phases, "total_ms": round(sum(phases.values()), 1)}
+
+    def format(self) -> str:
+        report = self.to_dict()
+        phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in report["phases_ms"].items())
+        return f"Startup {report['total_ms']:.0f}ms ({phases})"
@@ -0,0 +1,216 @@
+"""Listing Cache - subreddit 列表的读穿透缓存模块
+
+两级缓存：进程内 LRU + 可选的 PostgreSQL 共享层（listing_cache 表，多个 API 副本共用）。
+缓存键由 subreddit、列表类型、时间范围和数量组成。
+
+- 未过期（age < ttl）：直接返回
+- 已过期但在 stale 窗口内（age < ttl + stale_ttl）：先返回旧数据，后台刷新
+- 更旧或不存在：同步抓取；同一个键的并发请求只抓取一次
+
+每个条目带有根据内容计算的 ETag，用于 If-None-Match / 304。
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .metrics import LISTING_CACHE_REQUESTS
+from .models import as_dict
+from .reddit_scraper import TIME_FILTERED_LISTINGS
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = "hit"
+CACHE_STALE = "stale"
+CACHE_MISS = "miss"
+
+
+def make_etag(posts: List[Dict]) -> str:
+    """根据列表内容计算强 ETag"""
+    digest = hashlib.sha1(json.dumps(posts, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 请求头是否匹配（支持多个值、弱校验前缀 W/ 和 *）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CachedListing:
+    """一个缓存条目"""
+
+    __slots__ = ("key", "posts", "etag", "fetched_at")
+
+    def __init__(self, key: str, posts: List[Dict], etag: str, fetched_at: float):
+        self.key = key
+        self.posts = posts
+        self.etag = etag
+        self.fetched_at = fetched_at
+
+    def age(self, now: float = None) -> float:
+        return (now or time.time()) - self.fetched_at
+
+
+class ListingCache:
+    """
+    subreddit 列表缓存
+
+    Args:
+        fetch: 抓取函数 fetch(subreddit, listing, time_filter, limit) -> 帖子列表
+        ttl: 新鲜时间（秒）
+        stale_ttl: 过期后仍可返回旧数据、同时后台刷新的时间（秒）
+        max_entries: 进程内 LRU 的最大条目数
+        store: 共享层（DatabaseManager，提供 get_cached_listing / save_cached_listing），为None时只用进程内缓存
+        refresh_executor: 执行后台刷新的线程池（提供 submit），为None时使用临时线程
+    """
+
+    def __init__(
+        self,
+        fetch: Callable,
+        ttl: int = 60,
+        stale_ttl: int = 300,
+        max_entries: int = 256,
+        store=None,
+        refresh_executor=None,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.store = store
+        self.refresh_executor = refresh_executor
+        self._entries: "OrderedDict[str, CachedListing]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(subreddit: str, listing: str, time_filter: str, limit: int) -> str:
+        # time_filter 只对 top / controversial 有意义，其他列表类型不区分
+        time_filter = time_filter if listing in TIME_FILTERED_LISTINGS else "-"
+        return f"{subreddit.lower()}:{listing}:{time_filter}:{limit}"
+
+    def get(
+        self, subreddit: str, listing: str = "hot", time_filter: str = "day", limit: int = 25
+    ) -> Tuple[CachedListing, str]:
+        """
+        读取列表（必要时抓取）
+
+        Returns:
+            (缓存条目, 命中状态 hit / stale / miss)
+        """
+        key = self.make_key(subreddit, listing, time_filter, limit)
+        args = (subreddit, listing, time_filter, limit)
+
+        entry = self._get_local(key)
+        tier = "local"
+        if entry is None and self.store is not None:
+            entry = self._get_shared(key)
+            tier = "shared"
+
+        if entry is not None:
+            age = entry.age()
+            if age < self.ttl:
+                LISTING_CACHE_REQUESTS.labels(result=CACHE_HIT, tier=tier).inc()
+                return entry, CACHE_HIT
+            if age < self.ttl + self.stale_ttl:
+                LISTING_CACHE_REQUESTS.labels(result=CACHE_STALE, tier=tier).inc()
+                self._refresh_in_background(key, args)
+                return entry, CACHE_STALE
+
+        LISTING_CACHE_REQUESTS.labels(result=CACHE_MISS, tier="none").inc()
+        return self._load(key, args), CACHE_MISS
+
+    def _get_local(self, key: str) -> Optional[CachedListing]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put_local(self, entry: CachedListing):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Optional[CachedListing]:
+        row = self.store.get_cached_listing(key)
+        if row is None:
+            return None
+        entry = CachedListing(key, row["posts"], row["etag"], row["fetched_at"])
+        self._put_local(entry)
+        return entry
+
+    def _load(self, key: str, args: Tuple) -> CachedListing:
+        """抓取并写入两级缓存；同一个键同时只有一个请求真正抓取，其他请求等待其结果"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            # 两级缓存和 API 响应都保存普通字典（fetch_listing 返回的是 Post 记录）
+            posts = [as_dict(post) for post in self.fetch(*args)]
+            entry = CachedListing(key, posts, make_etag(posts), time.time())
+            self._put_local(entry)
+            if self.store is not None:
+                self.store.save_cached_listing(key, posts, entry.etag, entry.fetched_at)
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: str, args: Tuple):
+        try:
+            self._load(key, args)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+
+    def _refresh_in_background(self, key: str, args: Tuple):
+        with self._lock:
+            if key in self._inflight:
+                return
+        try:
+            if self.refresh_executor is not None:
+                self.refresh_executor.submit(self._refresh, key, args)
+            else:
+                threading.Thread(target=self._refresh, args=(key, args), daemon=True).start()
+        except Exception as e:
+            # 线程池已满时继续返回旧数据，下一个请求再尝试刷新
+            logger.debug(f"Skipped background refresh of {key}: {e}")
+
+    def invalidate(self, key: str = None):
+        """清除进程内缓存（key 为None时全部清除）"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+            }
@@ -16,6 +16,7 @@ from .reddit_scraper import RedditScraper
 from .chatgpt_client import ChatGPTClient
 from .newsletter_sender import NewsletterSender
 from .database_manager import DatabaseManager
+from . import tracing, metrics
 
 # Configure logging
 log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'logs')
@@ -27,7 +28,8 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler(log_file, encoding='utf-8')
+        # Opened on the first record: a process that configured logging first never writes here
+        logging.FileHandler(log_file, encoding='utf-8', delay=True)
     ]
 )
 logger = logging.getLogger(__name__)
@@ -45,11 +47,9 @@ class NewsletterScraper:
             self.reddit = RedditScraper(self.config)
             self.gpt = ChatGPTClient(self.config)
             self.email = NewsletterSender(self.config)
-            self.db = DatabaseManager()
+            self.db = DatabaseManager(self.config)
             
             # Get configuration
-            self.subreddits = self.config.get_target_subreddits()
-            self.post_limit = self.config.get_posts_limit()
             self.time_filter = 'day'  # Default time filter
             
             logger.info(f"Initialized scraper for subreddits: {self.subreddits}")
@@ -57,42 +57,56 @@ class NewsletterScraper:
             logger.error(f"Failed to initialize scraper: {e}")
             raise
     
+    @property
+    def subreddits(self) -> List[str]:
+        """Target subreddits from the current settings snapshot (TARGET_SUBREDDITS edits apply on the next run)"""
+        return self.config.get_target_subreddits()
+    
     def scrape_and_send(self) -> None:
         """Main job: scrape Reddit, generate newsletter, and send"""
         logger.info("=== Starting newsletter generation job ===")
         start_time = datetime.now()
+        tracing.start_run("scrape_and_send")
+        failed = False
         
         try:
-            all_posts = []
-            
-            # Scrape each subreddit
-            for subreddit in self.subreddits:
-                subreddit = subreddit.strip()
-                logger.info(f"Scraping r/{subreddit}...")
-                
-                try:
-                    posts = self.reddit.get_hot_posts(limit=self.post_limit)
-                    all_posts.extend(posts)
-                    logger.info(f"Fetched {len(posts)} posts from r/{subreddit}")
-                    
-                except Exception as e:
-                    logger.error(f"Error scraping r/{subreddit}: {e}")
-                    continue
-            
-            if not all_posts:
-                logger.warning("No posts found. Skipping newsletter generation.")
-                return
+            self.reddit.reset_request_stats()
             
-            # Filter new posts and send newsletter
-            logger.info(f"Filtering {len(all_posts)} posts...")
-            new_posts = self.db.filter_new_posts(all_posts)
+            # Listings fetched in parallel and streamed through dedupe, score snapshots (scraper/trending.py)
+            # and the sent-posts filter into a bounded top-K candidate pool (scraper/pipeline.py)
+            from .pipeline import StreamingPipeline
             
-            if not new_posts:
-                logger.warning("No new posts to send.")
-                return
+            with StreamingPipeline(self.reddit) as pipeline:
+                with tracing.span("stage.fetch"):
+                    new_posts, scores = pipeline.candidates(
+                        self.reddit.iter_listing_batches(self.subreddits),
+                        keep=self.db.filter_new_posts,
+                        on_batch=self.db.record_snapshots,
+                    )
+                
+                if not pipeline.fetched:
+                    logger.warning("No posts found. Skipping newsletter generation.")
+                    return
+                logger.info(f"Kept {pipeline.kept} of {pipeline.fetched} posts as new")
+                
+                # Page deeper into short subreddits when too few new posts survive (DEEPEN_MAX_REQUESTS budget)
+                pooled = new_posts
+                with tracing.span("stage.deepen"):
+                    new_posts = self.reddit.deepen_candidates(new_posts, self.db.filter_new_posts)
+                
+                if not new_posts:
+                    logger.warning("No new posts to send.")
+                    return
+                
+                # Comments and GPT summaries only for the posts that make it into the newsletter
+                new_posts = self.reddit.select_posts(new_posts, scores=scores if new_posts is pooled else None)
+                with tracing.span("stage.enrich"):
+                    for _ in pipeline.iter_enriched(new_posts):
+                        pass
                 
             logger.info(f"Sending newsletter with {len(new_posts)} new posts...")
-            success, editor_words = self.email.send_newsletter(new_posts)
+            with tracing.span("stage.send"):
+                success, editor_words = self.email.send_newsletter(new_posts)
             
             if success:
                 # Mark posts as sent
@@ -106,12 +120,90 @@ class NewsletterScraper:
                     editor_words=editor_words
                 )
             
+            self.reddit.log_request_stats(self.subreddits)
+            
             # Log statistics
             duration = (datetime.now() - start_time).total_seconds()
             logger.info(f"=== Job completed in {duration:.2f}s ===")
             
         except Exception as e:
+            failed = True
             logger.error(f"Error in scrape_and_send job: {e}", exc_info=True)
+        finally:
+            tracing.publish_run(tracing.end_run(success=not failed), self.db, self.config.get_otel_exporter_endpoint())
+    
+    def ingest(self) -> None:
+        """Ingestion tick: upsert fresh candidates and enrich a bounded batch into staging"""
+        logger.info("=== Starting ingestion tick ===")
+        start_time = datetime.now()
+        
+        try:
+            self.reddit.reset_request_stats()
+            # Incremental: listing cursors stop paging at posts already staged on a previous tick
+            posts = self.reddit.collect_candidates(self.subreddits, db=self.db)
+            fetched = self.db.upsert_candidates(posts)
+            
+            # Enrich the highest scoring candidates that have no comments/summaries yet, then refresh
+            # comments of candidates whose comment count moved well past the last fetch (summary kept)
+            enrich_batch = self.config.get_ingest_enrich_batch()
+            min_delta = self.config.get_comment_refresh_min_delta()
+            enriched = 0
+            to_enrich = self.db.get_candidates_to_enrich(
+                limit=enrich_batch, include_nsfw=self.config.get_include_nsfw(),
+                comment_min_delta=min_delta or None, comment_ratio=self.config.get_comment_refresh_ratio()
+            )
+            for post in self.reddit.iter_enriched(to_enrich, keep_summary=True):
+                try:
+                    if self.db.save_candidate_enrichment(post):
+                        enriched += 1
+                except Exception as e:
+                    logger.warning(f"Failed to save enrichment of candidate {post['id']}: {e}")
+            
+            self.reddit.log_request_stats(self.subreddits)
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"=== Ingestion tick completed in {duration:.2f}s "
+                        f"({fetched} candidates upserted, {enriched} enriched) ===")
+            
+        except Exception as e:
+            logger.error(f"Error in ingest job: {e}", exc_info=True)
+    
+    def send_from_staging(self) -> None:
+        """Send-time assembly: rank and render already ingested candidates"""
+        logger.info("=== Starting newsletter assembly from staging ===")
+        start_time = datetime.now()
+        
+        try:
+            candidates = self.db.get_staged_candidates(include_nsfw=self.config.get_include_nsfw())
+            selected_posts = self.email.rank_candidates(candidates)
+            
+            if not selected_posts:
+                logger.warning("No staged candidates to send.")
+                return
+            
+            # Candidates the ingestion loop has not reached yet are enriched inline (bounded by the newsletter size)
+            late = [post for post in selected_posts if "top_comments" not in post]
+            if late:
+                logger.info(f"Enriching {len(late)} late candidates at send time")
+                self.reddit.enrich_posts(late)
+            
+            logger.info(f"Sending newsletter with {len(selected_posts)} staged posts...")
+            success, editor_words = self.email.send_newsletter(selected_posts)
+            
+            if success:
+                self.db.mark_posts_as_sent(selected_posts)
+                self.db.log_newsletter_send(
+                    posts_count=len(selected_posts),
+                    success=True,
+                    recipients=self.config.get_recipients(),
+                    editor_words=editor_words
+                )
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"=== Assembly completed in {duration:.2f}s ===")
+            
+        except Exception as e:
+            logger.error(f"Error in send_from_staging job: {e}", exc_info=True)
     
     def test_connection(self) -> bool:
         """Test all service connections"""
@@ -141,8 +233,19 @@ class NewsletterScraper:
             return False
 
 
-def run_scheduler(scraper: NewsletterScraper) -> None:
-    """Run the scheduler with configured intervals"""
+def run_scheduler(scraper: NewsletterScraper, ingest: bool = False) -> None:
+    """Run the scheduler with configured intervals
+    
+    When ``ingest`` is set, candidates are ingested every INGEST_INTERVAL_MINUTES
+    and the scheduled send only assembles the newsletter from staging.
+    """
+    send_job = scraper.send_from_staging if ingest else scraper.scrape_and_send
+    
+    if ingest:
+        interval = scraper.config.get_ingest_interval_minutes()
+        logger.info(f"Scheduling ingestion every {interval} minutes")
+        schedule.every(interval).minutes.do(scraper.ingest)
+        scraper.ingest()
     
     # Get schedule configuration from environment
     schedule_time = os.getenv('SCHEDULE_TIME', '09:00')  # Default 9 AM
@@ -154,24 +257,26 @@ def run_scheduler(scraper: NewsletterScraper) -> None:
     for day in schedule_days:
         day = day.strip().lower()
         if day == 'monday':
-            schedule.every().monday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().monday.at(schedule_time).do(send_job)
         elif day == 'tuesday':
-            schedule.every().tuesday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().tuesday.at(schedule_time).do(send_job)
         elif day == 'wednesday':
-            schedule.every().wednesday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().wednesday.at(schedule_time).do(send_job)
         elif day == 'thursday':
-            schedule.every().thursday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().thursday.at(schedule_time).do(send_job)
         elif day == 'friday':
-            schedule.every().friday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().friday.at(schedule_time).do(send_job)
         elif day == 'saturday':
-            schedule.every().saturday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().saturday.at(schedule_time).do(send_job)
         elif day == 'sunday':
-            schedule.every().sunday.at(schedule_time).do(scraper.scrape_and_send)
+            schedule.every().sunday.at(schedule_time).do(send_job)
     
     logger.info("Scheduler started. Waiting for scheduled times...")
     
     # Run scheduler loop
     while True:
+        # Pick up .env edits between runs (values are read per run; schedule times need a restart)
+        scraper.config.reload_if_changed()
         schedule.run_pending()
         time.sleep(60)  # Check every minute
 
@@ -183,17 +288,24 @@ def main():
     # Initialize scraper
     scraper = NewsletterScraper()
     
+    metrics_port = scraper.config.get_metrics_port()
+    if metrics_port:
+        metrics.start_http_server(metrics_port)
+    
     # Test connections on startup
     if not scraper.test_connection():
         logger.error("Connection tests failed. Exiting.")
         sys.exit(1)
     
     # Check if running in immediate mode
-    run_mode = os.getenv('RUN_MODE', 'schedule')  # 'schedule' or 'immediate'
+    run_mode = os.getenv('RUN_MODE', 'schedule')  # 'schedule', 'immediate' or 'ingest'
     
     if run_mode == 'immediate':
         logger.info("Running in IMMEDIATE mode - executing job once")
         scraper.scrape_and_send()
+    elif run_mode == 'ingest':
+        logger.info("Running in INGEST mode - continuous ingestion with send-time assembly")
+        run_scheduler(scraper, ingest=True)
     else:
         logger.info("Running in SCHEDULE mode")
         run_scheduler(scraper)
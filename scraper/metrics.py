@@ -0,0 +1,327 @@
+"""Metrics - Prometheus 格式的运行指标模块
+
+计数器和直方图按线程分片累加：每个线程第一次记录时注册自己的分片，之后的记录只写本线程的分片，不加锁；
+导出时再合并所有分片。因此可以在生产环境常驻开启。线程池和后台刷新会不断创建短命的线程，
+已结束线程的分片在导出或新线程注册时并入基础分片后丢弃，分片数只与存活的线程数有关。
+
+    REDDIT_REQUEST_SECONDS.labels(kind="listing").observe(0.42)
+    OPENAI_TOKENS.labels(model="gpt-4o-mini", type="prompt").inc(120)
+    print(render())
+"""
+
+import bisect
+import logging
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Sequence[str], key: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """指标基类：管理标签子对象和线程分片"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, "_Child"] = {}
+        # (线程, 分片)；线程结束后分片并入 _base
+        self._shards: List[Tuple[threading.Thread, Dict]] = []
+        self._base: Dict = {}
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+        REGISTRY.register(self)
+
+    @property
+    def family(self) -> str:
+        """导出时 # HELP / # TYPE 使用的名称，与样本名一致"""
+        return self.name
+
+    def labels(self, **labels) -> "_Child":
+        """获取指定标签取值的子对象（子对象会被缓存，热点路径可以预先取好）"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, _Child(self, key))
+        return child
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._fold_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_dead_shards(self):
+        """已结束线程的分片不会再写入，并入 _base 后丢弃（持有 _shards_lock 时调用）"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._base, shard)
+        self._shards = live
+
+    def _snapshot_shards(self) -> List[Dict]:
+        """基础分片的副本和存活线程的分片"""
+        with self._shards_lock:
+            self._fold_dead_shards()
+            base: Dict = {}
+            self._merge(base, self._base)
+            return [base] + [shard for _, shard in self._shards]
+
+    def _merge(self, total: Dict, shard: Dict):
+        """把一个分片累加到 total"""
+        raise NotImplementedError
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Child:
+    """绑定了标签取值的指标"""
+
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: _Metric, key: Tuple):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1):
+        self._metric._inc(self._key, amount)
+
+    def observe(self, value: float):
+        self._metric._observe(self._key, value)
+
+    def set(self, value: float):
+        self._metric._set(self._key, value)
+
+    def dec(self, amount: float = 1):
+        self._metric._inc(self._key, -amount)
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    kind = "counter"
+
+    def _inc(self, key: Tuple, amount: float):
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def inc(self, amount: float = 1):
+        self._inc((), amount)
+
+    def _merge(self, total: Dict, shard: Dict):
+        for key, value in list(shard.items()):
+            total[key] = total.get(key, 0) + value
+
+    def values(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshot_shards():
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    @property
+    def family(self) -> str:
+        # 与 prometheus_client 的 0.0.4 输出一致：计数器的样本和元数据都带 _total 后缀
+        return self.name if self.name.endswith("_total") else f"{self.name}_total"
+
+    def collect(self) -> List[str]:
+        name = self.family
+        return [f"{name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self.values().items()]
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值（直接赋值，不分片）"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _set(self, key: Tuple, value: float):
+        self._values[key] = value
+
+    def _inc(self, key: Tuple, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float):
+        self._set((), value)
+
+    def inc(self, amount: float = 1):
+        self._inc((), amount)
+
+    def dec(self, amount: float = 1):
+        self._inc((), -amount)
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _observe(self, key: Tuple, value: float):
+        shard = self._shard()
+        # [各桶计数..., +Inf 桶计数, 总和]
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def observe(self, value: float):
+        self._observe((), value)
+
+    def _merge(self, total: Dict, shard: Dict):
+        for key, counts in list(shard.items()):
+            merged = total.get(key)
+            if merged is None:
+                total[key] = list(counts)
+            else:
+                for i, value in enumerate(counts):
+                    merged[i] += value
+
+    def collect(self) -> List[str]:
+        merged: Dict[Tuple, List[float]] = {}
+        for shard in self._snapshot_shards():
+            self._merge(merged, shard)
+
+        lines = []
+        for key, counts in merged.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.family} {metric.documentation}")
+            lines.append(f"# TYPE {metric.family} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ==================== 指标定义 ====================
+
+REDDIT_REQUEST_SECONDS = Histogram("reddit_request_seconds", "Reddit API request latency", ["kind"])
+REDDIT_RATELIMIT_REMAINING = Gauge("reddit_ratelimit_remaining", "Reddit API requests remaining in the current window")
+REDDIT_RATELIMIT_WAIT_SECONDS = Histogram(
+    "reddit_ratelimit_wait_seconds", "Time Reddit requests wait for a rate-limit token", ["kind"]
+)
+
+OPENAI_REQUEST_SECONDS = Histogram("openai_request_seconds", "OpenAI chat completion latency", ["model"])
+OPENAI_TOKENS = Counter("openai_tokens", "OpenAI tokens used", ["model", "type"])
+OPENAI_FAILURES = Counter("openai_failures", "Failed OpenAI calls", ["reason"])
+
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "PostgreSQL query latency", ["query"])
+DB_CONNECTIONS = Gauge("db_connections_open", "Open PostgreSQL connections held by this process")
+
+SMTP_SEND_SECONDS = Histogram("smtp_send_seconds", "SMTP send latency")
+SMTP_FAILURES = Counter("smtp_failures", "Failed SMTP sends")
+
+JOB_DURATION_SECONDS = Histogram(
+    "job_duration_seconds", "Scraper job duration", ["job"], buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+JOB_RUNS = Counter("job_runs", "Scraper job runs", ["job", "status"])
+POSTS_PROCESSED = Counter("posts_processed", "Posts processed by stage", ["stage"])
+
+EXECUTOR_INFLIGHT = Gauge("executor_tasks_pending", "Tasks running or queued in a bounded executor", ["pool"])
+EXECUTOR_QUEUE_SECONDS = Histogram("executor_queue_wait_seconds", "Time tasks wait for a free executor thread", ["pool"])
+EXECUTOR_REJECTED = Counter("executor_rejected", "Tasks rejected because the executor was at capacity", ["pool"])
+
+LISTING_CACHE_REQUESTS = Counter("listing_cache_requests", "Subreddit listing cache lookups", ["result", "tier"])
+
+STARTUP_SECONDS = Gauge("startup_phase_seconds", "Duration of each process startup phase", ["phase"])
+SERVICE_INIT_SECONDS = Gauge("service_init_seconds", "Time taken to construct a lazily initialized service", ["service"])
+
+
+def start_http_server(port: int, host: str = "0.0.0.0"):
+    """在后台线程中启动 /metrics HTTP 服务（用于没有 API 的 scraper / worker 进程）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
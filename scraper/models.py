@@ -0,0 +1,227 @@
+"""Models - 帖子和评论的紧凑记录模块
+
+帖子在系统中一直以字典的形式流转，候选池很大时每条帖子都是一个带着十几个重复字符串键的字典（约 0.7 KB，
+不含字段值本身）。Post / Comment 用 __slots__ 保存字段，只有一个指针数组，没有逐个实例的哈希表：
+
+- 兼容字典的读写：post["score"]、post.get("top_comments")、"gpt_summary" in post、dict(post)、{**post}，
+  现有的排序、选择、数据库代码和模板（Jinja 的 post.title 先按属性读取）不需要修改
+- 补充字段（top_comments / gpt_summary / comment_summary）在赋值之前视为不存在，与字典的语义一致
+- 不认识的键（数据库读出的 sent_at 等）放在按需创建的 _extra 字典中
+- to_dict / from_dict 与 JSON 和数据库行互相转换；json.dumps 传入 default=json_default 即可直接序列化
+- 记录不是 dict：不经过 json_default 的序列化（如 JSONResponse、缓存）先用 as_dict 转换为普通字典
+
+    post = Post.from_dict(row["data_json"])
+    json.dumps(posts, default=json_default)
+"""
+
+from collections.abc import MutableMapping
+from operator import attrgetter
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class _Record(MutableMapping):
+    """按 FIELDS 声明的槽位保存字段、兼容字典接口的记录基类"""
+
+    __slots__ = ("_extra",)
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        # 一次取出全部必有字段（C 实现），缺字段的记录（如数据库读出的旧数据）退回逐个读取
+        required = getattr(cls, "REQUIRED_FIELDS", cls.FIELDS)
+        cls._required = required
+        cls._get_required = staticmethod(attrgetter(*required))
+        cls._optional = tuple(key for key in cls.FIELDS if key not in required)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Record":
+        """从字典（JSON、数据库的 data_json）创建记录"""
+        record = cls.__new__(cls)
+        fields, extra = cls._FIELD_SET, None
+        for key, value in data.items():
+            if key in fields:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record._extra = extra
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（嵌套的记录由 json_default 处理）"""
+        try:
+            data = dict(zip(self._required, self._get_required(self)))
+            optional = self._optional
+        except AttributeError:
+            data, optional = {}, self.FIELDS
+        for key in optional:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getitem__(self, key: str):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __setitem__(self, key: str, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self._FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.FIELDS if hasattr(self, key)) + len(self._extra or ())
+
+    def copy(self) -> "_Record":
+        """浅拷贝（与 dict.copy 一致，字段值共用）"""
+        return type(self).from_dict(self.to_dict())
+
+    __copy__ = copy
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Comment(_Record):
+    """热门评论"""
+
+    FIELDS = ("author", "body", "score", "created_utc")
+    __slots__ = FIELDS
+
+    def __init__(self, author: str, body: str, score: int, created_utc: Optional[float]):
+        self._extra = None
+        self.author = author
+        self.body = body
+        self.score = score
+        self.created_utc = created_utc
+
+
+class Post(_Record):
+    """
+    帖子：列表接口的基础字段总是存在；top_comments / gpt_summary / comment_summary 在补充之后才存在
+    """
+
+    BASE_FIELDS = (
+        "id",
+        "title",
+        "author",
+        "url",
+        "permalink",
+        "subreddit",
+        "score",
+        "num_comments",
+        "created_utc",
+        "selftext",
+        "is_video",
+        "over_18",
+        "subreddit_subscribers",
+        "crosspost_parent",
+    )
+    FIELDS = BASE_FIELDS + ("top_comments", "gpt_summary", "comment_summary")
+    REQUIRED_FIELDS = BASE_FIELDS
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        author: str,
+        url: str,
+        permalink: str,
+        subreddit: str,
+        score: int,
+        num_comments: int,
+        created_utc: float,
+        selftext: str = "",
+        is_video: bool = False,
+        over_18: bool = False,
+        subreddit_subscribers: Optional[int] = None,
+        crosspost_parent: Optional[str] = None,
+    ):
+        self._extra = None
+        self.id = id
+        self.title = title
+        self.author = author
+        self.url = url
+        self.permalink = permalink
+        self.subreddit = subreddit
+        self.score = score
+        self.num_comments = num_comments
+        self.created_utc = created_utc
+        self.selftext = selftext
+        self.is_video = is_video
+        self.over_18 = over_18
+        self.subreddit_subscribers = subreddit_subscribers
+        self.crosspost_parent = crosspost_parent
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Post":
+        """从字典创建帖子，top_comments 中的评论字典同时转换为 Comment"""
+        post = super().from_dict(data)
+        comments = data.get("top_comments")
+        if comments:
+            post.top_comments = [Comment.from_dict(c) if type(c) is dict else c for c in comments]
+        return post
+
+
+def as_dict(value):
+    """记录转换为普通字典（top_comments 中的评论同样转换），其他值原样返回"""
+    if not isinstance(value, _Record):
+        return value
+    data = value.to_dict()
+    comments = data.get("top_comments")
+    if comments:
+        data["top_comments"] = [as_dict(comment) for comment in comments]
+    return data
+
+
+def json_default(value):
+    """json.dumps 的 default：把 Post / Comment 转换为字典"""
+    if isinstance(value, _Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
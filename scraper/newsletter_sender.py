@@ -9,10 +9,12 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime
-from jinja2 import Template
 from typing import List, Dict
 import os
 
+from .tracing import span
+from .metrics import SMTP_SEND_SECONDS, SMTP_FAILURES, POSTS_PROCESSED
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,13 +24,18 @@ class NewsletterSender:
     def __init__(self, config):
         self.config = config
 
-    def send_newsletter(self, posts: List[Dict], editor_words: str = None) -> tuple[bool, str]:
+    def send_newsletter(
+        self, posts: List[Dict], editor_words: str = None, recipients: List[str] = None, unsubscribe_url: str = None
+    ) -> tuple[bool, str]:
         """发送Newsletter邮件
 
         Args:
             posts: 帖子列表
             editor_words: 编辑寄语（可选）。如果不提供，将根据配置自动生成
+            recipients: 收件人列表（可选），默认使用 EMAIL_RECIPIENTS
+            unsubscribe_url: 收件人的一键取消订阅地址（可选，写入 List-Unsubscribe 头）
         """
+        recipients = recipients or self.config.get_recipients()
         if editor_words is None:
             if self.config.get_enable_editor_summary():
                 from .chatgpt_client import ChatGPTClient
@@ -49,7 +56,10 @@ class NewsletterSender:
             msg = MIMEMultipart("alternative")
             msg["Subject"] = self._generate_subject()
             msg["From"] = self.config.get_smtp_from_email()
-            msg["To"] = ", ".join(self.config.get_recipients())
+            msg["To"] = ", ".join(recipients)
+            if unsubscribe_url:
+                msg["List-Unsubscribe"] = f"<{unsubscribe_url}>"
+                msg["List-Unsubscribe-Post"] = "List-Unsubscribe=One-Click"
 
             part1 = MIMEText(text_content, "plain", "utf-8")
             part2 = MIMEText(html_content, "html", "utf-8")
@@ -57,9 +67,10 @@ class NewsletterSender:
             msg.attach(part1)
             msg.attach(part2)
 
-            success = self._send_email(msg)
+            success = self._send_email(msg, recipients)
 
             if success:
+                POSTS_PROCESSED.labels(stage="sent").inc(len(posts))
                 logger.info(f"Newsletter sent successfully with {len(posts)} posts")
 
             return success, editor_words
@@ -68,8 +79,28 @@ class NewsletterSender:
             logger.error(f"Error sending newsletter: {e}")
             return False, editor_words
 
+    def rank_candidates(self, candidates: List[Dict], limit: int = None) -> List[Dict]:
+        """从暂存区候选帖子中选出本期Newsletter的帖子（去掉重复后按排序分数和多样性约束选取，不访问Reddit）
+
+        Args:
+            candidates: 候选帖子列表（已包含评论和摘要）
+            limit: 选取数量，默认使用 NEWSLETTER_POSTS_LIMIT
+        """
+        limit = limit or self.config.get_newsletter_posts_limit()
+        if not self.config.get_include_nsfw():
+            candidates = [post for post in candidates if not post.get("over_18")]
+        # 延迟导入：numpy 只在排序时加载
+        from .dedupe import rank_unique
+        from .selection import DiversitySelector
+
+        candidates, scores = rank_unique(candidates, self.config)
+        return DiversitySelector(self.config).select(candidates, limit, scores=scores)
+
     def _generate_newsletter_html(self, posts: List[Dict], editor_words: str) -> str:
         """生成HTML格式的Newsletter内容"""
+        # 延迟导入：构造发送器时不加载模板引擎
+        from jinja2 import Template
+
         template_path = os.path.join("templates", "newsletter_template2.html")
         try:
             with open(template_path, "r", encoding="utf-8") as f:
@@ -90,6 +121,8 @@ class NewsletterSender:
 
     def _generate_newsletter_text(self, posts: List[Dict], editor_words: str) -> str:
         """生成纯文本格式的Newsletter内容"""
+        from jinja2 import Template
+
         template_path = os.path.join("templates", "newsletter_template.txt")
         try:
             with open(template_path, "r", encoding="utf-8") as f:
@@ -133,33 +166,40 @@ class NewsletterSender:
         """生成邮件主题"""
         return f"🔥 Reddit热门帖子 Newsletter - {datetime.now().strftime('%Y-%m-%d')}"
 
-    def _send_email(self, msg: MIMEMultipart) -> bool:
+    def _send_email(self, msg: MIMEMultipart, recipients: List[str] = None) -> bool:
         """发送邮件"""
-        try:
-            # 创建SMTP连接
-            if self.config.get_smtp_use_ssl():
-                server = smtplib.SMTP_SSL(self.config.get_smtp_server(), self.config.get_smtp_port())
-            else:
-                server = smtplib.SMTP(self.config.get_smtp_server(), self.config.get_smtp_port())
-
-            if self.config.get_smtp_use_tls() and not self.config.get_smtp_use_ssl():
-                server.starttls()
-
-            # 登录
-            if self.config.get_smtp_username() and self.config.get_smtp_password():
-                server.login(self.config.get_smtp_username(), self.config.get_smtp_password())
-
-            # 发送邮件
-            recipients = self.config.get_recipients()
-            server.send_message(msg, to_addrs=recipients)
-            server.quit()
-
-            logger.info(f"Email sent successfully to {len(recipients)} recipients")
-            return True
-
-        except smtplib.SMTPException as e:
-            logger.error(f"SMTP send failed: {e}")
-            return False
+        with span("smtp.send", SMTP_SEND_SECONDS) as smtp_span:
+            try:
+                # 同一封邮件使用同一个配置快照
+                settings = self.config.settings
+
+                # 创建SMTP连接
+                if settings.smtp_use_ssl:
+                    server = smtplib.SMTP_SSL(settings.smtp_server, settings.smtp_port)
+                else:
+                    server = smtplib.SMTP(settings.smtp_server, settings.smtp_port)
+
+                if settings.smtp_use_tls and not settings.smtp_use_ssl:
+                    server.starttls()
+
+                # 登录
+                if settings.smtp_username and settings.smtp_password:
+                    server.login(settings.smtp_username, settings.smtp_password)
+
+                # 发送邮件
+                recipients = recipients or list(settings.recipients)
+                smtp_span.add_bytes(len(msg.as_bytes()))
+                server.send_message(msg, to_addrs=recipients)
+                server.quit()
+
+                logger.info(f"Email sent successfully to {len(recipients)} recipients")
+                return True
+
+            except smtplib.SMTPException as e:
+                smtp_span.set_error(str(e))
+                SMTP_FAILURES.inc()
+                logger.error(f"SMTP send failed: {e}")
+                return False
 
     def test_email_connection(self) -> bool:
         """测试邮件连接"""
@@ -0,0 +1,205 @@
+"""Pipeline - 从列表到补充的流式处理模块
+
+原来的流程先把所有 subreddit 的全部帖子收集到一个列表，去重、过滤、排序之后才开始获取评论和摘要：峰值内存与抓取的帖子总数成正比，
+最后一个列表返回之前什么都不会开始。这里把 抓取 -> 去重 -> 过滤 -> 排序 -> 补充 串成流式的阶段：
+
+- 抓取：各 subreddit 的列表并行抓取（RedditScraper.iter_listing_batches），哪个先抓完先处理哪个
+- 去重和过滤：按帖子ID去重只保留ID集合；NSFW、on_batch（如记录分数快照）和 keep（如 db.filter_new_posts）逐批处理
+- 排序：每批用 rank_scores 计算分数（分数和速度的 z-score 本来就按 subreddit 计算，一批就是一个 subreddit，跨批可比），
+  放进有界的最小堆 TopK，只保留 CANDIDATE_POOL_FACTOR * K 条候选，与选择阶段的候选池一致；
+  列表全部返回后只对这些候选做跨 subreddit 的去重（remove_duplicates）。候选保留逐批计算的分数：
+  只剩前几名的候选池分布不同，重新计算 z-score 会改变排序
+- 补充：每批中分数最高、同时进入当前前 K 的几个帖子（K 按 subreddit 数平均分配）立即在后台预取评论
+  （最多 PREFETCH_FACTOR * K 个帖子），与后面的列表抓取重叠；限流器中评论请求的优先级最低，不会拖慢列表请求。
+  入选之后用预取的评论生成摘要，没有预取的帖子再获取
+
+评论比和订阅人数归一化是跨 subreddit 的整体 z-score，逐批计算时只是近似（只在一个 subreddit 内比较）。
+内存占用为 O(K) 条候选加上正在处理的一批列表。只有评论预取与抓取重叠，GPT 摘要不做推测：摘要是按次计费的 OpenAI 调用，
+前 K 名要等所有列表返回、经过去重和多样性选择之后才确定，提前生成的摘要会浪费在最终落选的帖子上；落选帖子的预取只浪费一次评论请求。
+
+    with StreamingPipeline(reddit) as pipeline:
+        candidates, scores = pipeline.candidates(reddit.iter_listing_batches(), keep=db.filter_new_posts)
+        selected = reddit.select_posts(candidates, scores=scores)
+        for post in pipeline.iter_enriched(selected):
+            ...
+"""
+
+import math
+import heapq
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .dedupe import remove_duplicates
+from .ranking import rank_scores
+from .selection import CANDIDATE_POOL_FACTOR
+from .tracing import bind, incr
+
+logger = logging.getLogger(__name__)
+
+# 推测预取评论的帖子数上限（K 的倍数）；用完之后进入前 K 的帖子等入选后再获取评论
+PREFETCH_FACTOR = 2
+
+
+class TopK:
+    """
+    有界的最小堆：只保留分数最高的 k 个元素，每次加入 O(log k)
+
+    Args:
+        k: 保留的元素数
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._count = 0
+
+    def push(self, score: float, item) -> bool:
+        """加入一个元素，返回它是否留在堆中（可能挤出当前分数最低的元素）"""
+        if self.k <= 0:
+            return False
+        # 分数相同时先加入的元素优先：序号取负，越早加入越大
+        entry = (score, -self._count, item)
+        self._count += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def items(self) -> List[Tuple[float, Any]]:
+        """堆中的 (分数, 元素)，按分数降序"""
+        return [(score, item) for score, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class StreamingPipeline:
+    """
+    流式的候选收集和补充（一次运行使用一个实例）
+
+    Args:
+        scraper: RedditScraper
+        k: 本期帖子数，默认使用 NEWSLETTER_POSTS_LIMIT
+    """
+
+    def __init__(self, scraper, k: int = None):
+        self.scraper = scraper
+        self.config = scraper.config
+        self.k = k or self.config.get_newsletter_posts_limit()
+        # 去重、过滤 NSFW 之后的帖子数，以及其中通过 keep 的帖子数
+        self.fetched = 0
+        self.kept = 0
+        self.prefetched: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "StreamingPipeline":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def candidates(
+        self,
+        batches: Iterable[Tuple[str, List[Dict]]],
+        keep: Callable[[List[Dict]], List[Dict]] = None,
+        on_batch: Callable[[List[Dict]], Any] = None,
+    ) -> Tuple[List[Dict], List[float]]:
+        """
+        逐批去重、过滤和排序，只保留有界的候选池
+
+        Args:
+            batches: (subreddit名称, 帖子列表) 的迭代器，如 RedditScraper.iter_listing_batches()
+            keep: 逐批过滤帖子，如 db.filter_new_posts
+            on_batch: 每批去重之后、过滤之前调用，如 db.record_snapshots
+
+        Returns:
+            (候选帖子，每个簇的代表，按分数降序, 对应的排序分数)；分数可以直接传给 select_posts
+        """
+        profiles = self.config.get_subreddit_profiles()
+        ranking = self.config.get_ranking_settings()
+        include_nsfw = self.config.get_include_nsfw()
+        # 每批最多预取的帖子数：K 按 subreddit 数平均分配
+        share = math.ceil(self.k / max(len(self.config.get_target_subreddits()), 1))
+        pool = TopK(CANDIDATE_POOL_FACTOR * self.k)
+        leaders = TopK(self.k)
+        seen = set()
+
+        for subreddit_name, posts in batches:
+            batch = [post for post in posts if post["id"] not in seen]
+            seen.update(post["id"] for post in batch)
+            if not include_nsfw:
+                batch = [post for post in batch if not post["over_18"]]
+            if not batch:
+                continue
+            self.fetched += len(batch)
+            if on_batch is not None:
+                on_batch(batch)
+
+            scored = zip(rank_scores(batch, profiles, ranking).tolist(), batch)
+            if keep is not None:
+                kept_ids = {post["id"] for post in keep(batch)}
+                scored = [(score, post) for score, post in scored if post["id"] in kept_ids]
+            prefetch = TopK(share)
+            for score, post in scored:
+                self.kept += 1
+                # 进入前 K 的帖子一定也在候选池中
+                if pool.push(score, post) and leaders.push(score, post):
+                    prefetch.push(score, post)
+            for _, post in prefetch.items():
+                self._prefetch(post, profiles)
+
+        ranked = pool.items()
+        logger.info(
+            f"Streamed {self.fetched} posts ({self.kept} kept) into a pool of {len(ranked)} candidates, "
+            f"prefetching comments for {len(self.prefetched)}"
+        )
+        if not ranked:
+            return [], []
+        scores = [score for score, _ in ranked]
+        posts = [post for _, post in ranked]
+        keep_indices = remove_duplicates(posts, scores)
+        return [posts[index] for index in keep_indices], [scores[index] for index in keep_indices]
+
+    def _prefetch(self, post: Dict, profiles):
+        """在后台预取帖子的评论（不超过 PREFETCH_FACTOR * K 个帖子）"""
+        if len(self.prefetched) >= PREFETCH_FACTOR * self.k or post["id"] in self.prefetched:
+            return
+        profile = profiles.get(post["subreddit"])
+        if not profile.enrich or profile.comment_limit <= 0:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.get_comment_fetch_concurrency(), thread_name_prefix="reddit-prefetch"
+            )
+        self.prefetched[post["id"]] = self._executor.submit(
+            bind(self.scraper._get_top_comments), post["id"], profile.comment_limit
+        )
+
+    def iter_enriched(self, posts: List[Dict], keep_summary: bool = False) -> Iterator[Dict]:
+        """
+        逐个补充入选帖子的评论和GPT摘要（使用预取的评论），全部补充完后结束预取
+
+        Args:
+            posts: 入选的帖子
+            keep_summary: 同 RedditScraper.enrich_post
+        """
+        try:
+            yield from self.scraper.iter_enriched(posts, keep_summary=keep_summary, prefetched=self.prefetched)
+        finally:
+            self.close(posts)
+
+    def close(self, selected: List[Dict] = None):
+        """取消还没有开始的预取，统计预取的命中数；可以重复调用"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        used = sum(1 for post in selected or () if post["id"] in self.prefetched)
+        incr("reddit.comments_prefetched", len(self.prefetched))
+        incr("reddit.comments_prefetch_used", used)
+        logger.info(f"Prefetched comments for {len(self.prefetched)} posts, {used} of them selected")
@@ -0,0 +1,123 @@
+"""Profiles - 按 subreddit 的抓取配置模块
+
+各个 subreddit 的规模差别很大：小版块按全局 POSTS_LIMIT 抓取会抓回大量过期帖子，大版块又采样不足。
+SUBREDDIT_PROFILES_FILE 指向一个 JSON 文件，为每个 subreddit 指定列表类型、抓取数量、时间窗口、评论数、
+排序权重以及是否补充评论和 GPT 摘要；没有列出的 subreddit 使用 "default"（未指定的字段取全局配置）。
+
+    {
+        "default": {"listing": "hot", "max_age_hours": 24, "comment_limit": 5},
+        "subreddits": {
+            "AskReddit": {"limit": 50, "comment_limit": 3, "weight": 0.8},
+            "MachineLearning": {"listing": "top", "time_filter": "day", "limit": 15, "weight": 1.5},
+            "pics": {"enrich": false}
+        }
+    }
+
+profiles 文件和 .env 一样由 SettingsStore 加载，是 Settings 快照的一部分，修改后随 reload_if_changed() 生效。
+"""
+
+import json
+from dataclasses import dataclass, field, fields, replace
+from typing import Dict, List
+
+# 支持的列表类型；top / controversial 需要 time_filter
+LISTING_TYPES = ("hot", "new", "rising", "top", "controversial")
+TIME_FILTERED_LISTINGS = ("top", "controversial")
+TIME_FILTERS = ("hour", "day", "week", "month", "year", "all")
+
+
+@dataclass(frozen=True)
+class SubredditProfile:
+    """一个 subreddit 的抓取配置"""
+
+    listing: str = "hot"
+    time_filter: str = "day"
+    limit: int = 25  # 列表抓取数量
+    max_age_hours: float = 24  # 只保留该时间窗口内发布的帖子
+    comment_limit: int = 5  # 入选帖子获取的热门评论数，0 表示不获取
+    weight: float = 1.0  # 排序权重（scraper/ranking.py）
+    enrich: bool = True  # 入选后是否获取评论、生成 GPT 摘要
+
+
+def _check_field(name: str, value, errors: List[str], where: str):
+    """校验单个字段，返回是否合法"""
+    if name in ("listing", "time_filter"):
+        allowed = LISTING_TYPES if name == "listing" else TIME_FILTERS
+        ok = value in allowed
+        expected = "one of " + ", ".join(allowed)
+    elif name == "enrich":
+        ok = isinstance(value, bool)
+        expected = "true or false"
+    elif name in ("limit", "comment_limit"):
+        minimum = 1 if name == "limit" else 0
+        ok = isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+        expected = f"an integer >= {minimum}"
+    else:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+        expected = "a number > 0"
+    if not ok:
+        errors.append(f"{where}.{name}={value!r} must be {expected}")
+    return ok
+
+
+def _parse_profile(raw, base: SubredditProfile, errors: List[str], where: str) -> SubredditProfile:
+    """在 base 的基础上应用一个 JSON 对象中的字段"""
+    if not isinstance(raw, dict):
+        errors.append(f"{where} must be an object")
+        return base
+    known = {f.name for f in fields(SubredditProfile)}
+    changes = {}
+    for name, value in raw.items():
+        if name not in known:
+            errors.append(f"{where}.{name} is not a profile field")
+        elif _check_field(name, value, errors, where):
+            changes[name] = value
+    return replace(base, **changes)
+
+
+@dataclass(frozen=True)
+class SubredditProfiles:
+    """全部 subreddit 的抓取配置（不可变），按小写名称查找"""
+
+    default: SubredditProfile = SubredditProfile()
+    overrides: Dict[str, SubredditProfile] = field(default_factory=dict)
+    path: str = ""
+
+    def get(self, subreddit: str) -> SubredditProfile:
+        return self.overrides.get(subreddit.lower(), self.default)
+
+    @classmethod
+    def load(cls, path: str, default: SubredditProfile, errors: List[str]) -> "SubredditProfiles":
+        """
+        读取 profiles 文件，错误追加到 errors
+
+        Args:
+            path: JSON 文件路径，为空时所有 subreddit 使用 default
+            default: 由全局配置得到的默认配置，文件中的 "default" 在其基础上覆盖
+            errors: 错误列表（与 .env 的错误一起抛出）
+        """
+        if not path:
+            return cls(default=default)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            errors.append(f"SUBREDDIT_PROFILES_FILE={path!r} could not be read: {e}")
+            return cls(default=default, path=path)
+        if not isinstance(data, dict):
+            errors.append(f"{path} must contain a JSON object")
+            return cls(default=default, path=path)
+
+        for key in data:
+            if key not in ("default", "subreddits"):
+                errors.append(f"{path}: unknown key {key!r}")
+        default = _parse_profile(data.get("default", {}), default, errors, f"{path}: default")
+        subreddits = data.get("subreddits", {})
+        if not isinstance(subreddits, dict):
+            errors.append(f"{path}: subreddits must be an object")
+            subreddits = {}
+        overrides = {
+            name.lower(): _parse_profile(raw, default, errors, f"{path}: subreddits.{name}")
+            for name, raw in subreddits.items()
+        }
+        return cls(default=default, overrides=overrides, path=path)
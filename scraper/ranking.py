@@ -0,0 +1,144 @@
+"""Ranking - 候选帖子批量排序模块
+
+按原始分数排序时，大版块（如 r/AskReddit）的帖子总是排在小版块前面，只能靠多抓取来弥补。
+这里用 NumPy 一次性为全部候选帖子计算排序分数，特征为：
+
+- 分数：log(1 + score)，按 subreddit 做 z-score（zscore），或减去 log(订阅人数) 后整体 z-score（subscribers）
+- 速度：发布以来每小时获得的分数 log(1 + score / 小时数)，与分数使用相同的标准化
+- 评论比：log(1 + num_comments / (score + 1))，整体 z-score，衡量讨论热度
+- subreddit 权重：profile 的 weight，以 log(weight) 加到结果上（权重 2 约等于提高 0.69 个标准差）
+
+    rank = score_weight * 分数 + velocity_weight * 速度 + comment_weight * 评论比 + log(weight)
+
+RANKING_NORMALIZATION=none 时按 分数 × 权重 排序。数万条候选的排序只需要几毫秒，可以放心扩大候选池。
+
+    ranker = Ranker(config)
+    selected = ranker.top_k(candidates, 10)
+"""
+
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .profiles import SubredditProfiles
+from .settings import RankingSettings
+
+# 刚发布的帖子按 15 分钟计算速度，避免除以接近 0 的时间
+MIN_AGE_HOURS = 0.25
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    return (values - values.mean()) / (std if std > 0 else 1.0)
+
+
+def _grouped_zscore(values: np.ndarray, groups: np.ndarray, group_count: int) -> np.ndarray:
+    """按组做 z-score；只有一条帖子或方差为 0 的组结果为 0"""
+    counts = np.bincount(groups, minlength=group_count)
+    mean = np.bincount(groups, weights=values, minlength=group_count) / counts
+    centered = values - mean[groups]
+    std = np.sqrt(np.bincount(groups, weights=centered * centered, minlength=group_count) / counts)
+    std[std == 0] = 1.0
+    return centered / std[groups]
+
+
+def _subreddit_groups(posts: List[Dict]) -> Tuple[np.ndarray, List[str]]:
+    """
+    subreddit 名称（不区分大小写）编码为连续整数，分组统计用 bincount
+
+    Returns:
+        (每个帖子的组号, 组号对应的小写名称)
+    """
+    # 先按原名编码，再合并大小写不同的名称
+    raw_codes: Dict[str, int] = {}
+    raw_groups = np.fromiter(
+        (raw_codes.setdefault(post["subreddit"], len(raw_codes)) for post in posts), dtype=np.intp, count=len(posts)
+    )
+    codes: Dict[str, int] = {}
+    groups = np.array([codes.setdefault(name.lower(), len(codes)) for name in raw_codes], dtype=np.intp)[raw_groups]
+    return groups, list(codes)
+
+
+def rank_scores(posts: List[Dict], profiles: SubredditProfiles, ranking: RankingSettings, now: float = None) -> np.ndarray:
+    """
+    计算每个帖子的排序分数（越大越靠前）
+
+    Args:
+        posts: 帖子字典列表
+        profiles: subreddit profiles（提供权重）
+        ranking: 排序参数
+        now: 计算速度使用的当前时间戳，默认 time.time()
+
+    Returns:
+        与 posts 等长的分数数组
+    """
+    count = len(posts)
+    if not count:
+        return np.empty(0)
+
+    groups, names = _subreddit_groups(posts)
+    weights = np.array([profiles.get(name).weight for name in names], dtype=np.float64)[groups]
+    score = np.maximum(np.fromiter((post["score"] for post in posts), dtype=np.float64, count=count), 0)
+    if ranking.normalization == "none":
+        return score * weights
+
+    now = time.time() if now is None else now
+    created = np.fromiter((post["created_utc"] for post in posts), dtype=np.float64, count=count)
+    comments = np.fromiter((post.get("num_comments", 0) for post in posts), dtype=np.float64, count=count)
+    hours = np.maximum((now - created) / 3600.0, MIN_AGE_HOURS)
+
+    log_score = np.log1p(score)
+    velocity = np.log1p(score / hours)
+    score_feature = _grouped_zscore(log_score, groups, len(names))
+    velocity_feature = _grouped_zscore(velocity, groups, len(names))
+
+    if ranking.normalization == "subscribers":
+        subscribers = np.fromiter((post.get("subreddit_subscribers") or 0 for post in posts), dtype=np.float64, count=count)
+        # 没有订阅人数的帖子保留按 subreddit 的 z-score
+        known = subscribers > 0
+        if known.any():
+            log_subscribers = np.log(subscribers[known])
+            score_feature[known] = _zscore(log_score[known] - log_subscribers)
+            velocity_feature[known] = _zscore(velocity[known] - log_subscribers)
+
+    comment_feature = _zscore(np.log1p(comments / (score + 1)))
+    return (
+        ranking.score_weight * score_feature
+        + ranking.velocity_weight * velocity_feature
+        + ranking.comment_weight * comment_feature
+        + np.log(weights)
+    )
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """分数最高的 k 个下标（按分数降序）；只对前 k 个排序"""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+    return np.argsort(-scores, kind="stable")
+
+
+class Ranker:
+    """
+    按当前配置快照（RANKING_* 和 subreddit profiles）为候选帖子排序
+
+    Args:
+        config: 配置管理器
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def scores(self, posts: List[Dict], now: float = None) -> np.ndarray:
+        return rank_scores(posts, self.config.get_subreddit_profiles(), self.config.get_ranking_settings(), now)
+
+    def top_k(self, posts: List[Dict], k: int, now: float = None) -> List[Dict]:
+        """选出排序分数最高的 k 个帖子（按分数降序）"""
+        return [posts[i] for i in top_k_indices(self.scores(posts, now), k)]
+
+    def rank(self, posts: List[Dict], now: float = None) -> List[Dict]:
+        """全部帖子按排序分数降序排列"""
+        return self.top_k(posts, len(posts), now)
@@ -0,0 +1,241 @@
+"""Rate Limit - 按响应头驱动的 Reddit 令牌桶限流模块
+
+PRAW 只在单个请求前按上一次响应头隐式 sleep，多个线程（或进程）同时请求时彼此看不到对方用掉的配额，
+突发请求要么触发 429，要么白白空着余量。这里把全部 Reddit 请求收口到一个令牌桶：
+
+- 每次响应读取 X-Ratelimit-Remaining / X-Ratelimit-Reset，把剩余配额（留出 RATELIMIT_RESERVE）平均分配到窗口剩余的时间，
+  作为令牌补充速率；桶容量为 burst，允许短时间的小突发
+- 还没有响应头或窗口已经重置时按 DEFAULT_RATE 补充
+- 等待令牌的请求按优先级排队：列表 > info > 评论，有更高优先级的请求在等待时低优先级的请求不取令牌，
+  评论请求再多也不会饿死列表请求
+- 可选的 PostgreSQL 共享层（reddit_ratelimit 表）：多个进程共用同一个账号的剩余配额，取令牌时原子地扣减；
+  跨进程只共享配额，不共享优先级
+
+通过 prawcore 的 requestor 接入，PRAW 发出的每个 OAuth 请求都会先取令牌，响应的字节数按线程计入 ResponseMeter：
+
+    limiter, meter = RedditRateLimiter(burst=10), ResponseMeter()
+    reddit = praw.Reddit(..., requestor_class=RateLimitedRequestor, requestor_kwargs={"limiter": limiter, "meter": meter})
+    limiter.stats()   # 本次运行各类请求数、等待时间和配额使用率
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from prawcore.requestor import Requestor
+
+from .metrics import REDDIT_RATELIMIT_REMAINING, REDDIT_RATELIMIT_WAIT_SECONDS
+from .tracing import incr
+
+logger = logging.getLogger(__name__)
+
+# 请求类型，按优先级从高到低
+REQUEST_KINDS = ("listing", "info", "comments")
+_PRIORITY = {kind: index for index, kind in enumerate(REQUEST_KINDS)}
+
+# 令牌桶不动用的配额：剩余配额不超过该值时停止发放令牌，给同一账号的其他任务留出余量
+RATELIMIT_RESERVE = 10
+
+# 没有响应头时的补充速率：OAuth 客户端每分钟 100 次
+DEFAULT_RATE = 100 / 60.0
+
+# 等待令牌时最长睡眠的秒数（之后重新检查，响应头可能已经更新）
+MAX_WAIT_STEP = 1.0
+
+
+def request_kind(url: str) -> str:
+    """按请求路径区分列表、info 和评论请求"""
+    path = urlsplit(url).path
+    if "/comments/" in path or path.startswith("/api/morechildren"):
+        return "comments"
+    if path.startswith("/api/info"):
+        return "info"
+    return "listing"
+
+
+class RedditRateLimiter:
+    """
+    进程内共享的 Reddit 令牌桶（线程安全）
+
+    Args:
+        burst: 桶容量（允许的突发请求数）
+        reserve: 剩余配额不超过该值时停止发放令牌
+        store: 跨进程共享层（DatabaseManager，提供 take_reddit_ratelimit / save_reddit_ratelimit），为None时只在进程内限流
+        key: 共享层中的配额键（同一个 Reddit 账号或应用的进程使用相同的键）
+    """
+
+    def __init__(self, burst: int = 10, reserve: int = RATELIMIT_RESERVE, store=None, key: str = "reddit"):
+        self.burst = burst
+        self.reserve = reserve
+        self.store = store
+        self.key = key
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._rate = DEFAULT_RATE
+        self._refilled_at = time.time()
+        self._reset_at: Optional[float] = None
+        self._waiting = [0] * len(REQUEST_KINDS)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """重置本次运行的统计"""
+        with self._cond:
+            self._requests = dict.fromkeys(REQUEST_KINDS, 0)
+            self._wait_seconds = dict.fromkeys(REQUEST_KINDS, 0.0)
+            self._min_remaining: Optional[float] = None
+            self._peak_used: Optional[float] = None
+            self._window_quota: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self._reset_at is not None and now >= self._reset_at:
+            # 配额窗口已经重置，下一次响应头之前按默认速率补充
+            self._reset_at = None
+            self._rate = DEFAULT_RATE
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    def acquire(self, kind: str = "listing") -> float:
+        """
+        取得一个令牌，令牌不足或有更高优先级的请求在等待时阻塞
+
+        Args:
+            kind: 请求类型（REQUEST_KINDS 之一）
+
+        Returns:
+            等待的秒数
+        """
+        priority = _PRIORITY[kind]
+        start = time.time()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(now)
+                    if self._tokens >= 1 and not any(self._waiting[:priority]):
+                        self._tokens -= 1
+                        break
+                    if self._rate > 0:
+                        delay = max(1 - self._tokens, 0) / self._rate
+                    else:
+                        delay = (self._reset_at or now) - now
+                    # 更高优先级的请求取走令牌或响应头更新时会被提前唤醒
+                    self._cond.wait(min(max(delay, 0.01), MAX_WAIT_STEP))
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+        if self.store is not None:
+            self._acquire_shared()
+        waited = time.time() - start
+        with self._cond:
+            self._requests[kind] += 1
+            self._wait_seconds[kind] += waited
+        REDDIT_RATELIMIT_WAIT_SECONDS.labels(kind=kind).observe(waited)
+        if waited >= 0.001:
+            incr("reddit.ratelimit_wait_ms", round(waited * 1000))
+        return waited
+
+    def _acquire_shared(self):
+        """在共享层扣减一次配额；其他进程已经用完时等到窗口重置"""
+        while True:
+            delay = self.store.take_reddit_ratelimit(self.key, self.reserve)
+            if delay <= 0:
+                return
+            time.sleep(min(delay, MAX_WAIT_STEP))
+
+    def update(self, headers, now: float = None):
+        """
+        按响应头更新剩余配额和补充速率
+
+        Args:
+            headers: 响应头（不区分大小写的映射）
+            now: 收到响应的时间戳，默认 time.time()
+        """
+        remaining, reset = headers.get("x-ratelimit-remaining"), headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset, used = float(remaining), float(reset), float(headers.get("x-ratelimit-used") or 0)
+        except ValueError:
+            return
+        now = time.time() if now is None else now
+        reset_at = now + reset
+
+        with self._cond:
+            self._refill(now)
+            available = max(remaining - self.reserve, 0)
+            self._reset_at = reset_at
+            self._rate = available / max(reset, 1.0)
+            self._tokens = min(self._tokens, available)
+            self._min_remaining = remaining if self._min_remaining is None else min(self._min_remaining, remaining)
+            self._peak_used = used if self._peak_used is None else max(self._peak_used, used)
+            self._window_quota = used + remaining
+            self._cond.notify_all()
+        REDDIT_RATELIMIT_REMAINING.set(remaining)
+        if self.store is not None:
+            self.store.save_reddit_ratelimit(self.key, remaining, reset_at)
+
+    def stats(self) -> Dict:
+        """
+        本次运行的限流统计
+
+        Returns:
+            {"requests": {类型: 请求数}, "wait_seconds": {类型: 等待秒数}, "min_remaining", "window_quota",
+             "utilization"(窗口内已用配额的峰值占比，没有响应头时为None)}
+        """
+        with self._cond:
+            utilization = None
+            if self._window_quota:
+                utilization = round(self._peak_used / self._window_quota, 4)
+            return {
+                "requests": dict(self._requests),
+                "wait_seconds": {kind: round(seconds, 3) for kind, seconds in self._wait_seconds.items()},
+                "min_remaining": self._min_remaining,
+                "window_quota": self._window_quota,
+                "utilization": utilization,
+            }
+
+
+class ResponseMeter:
+    """按线程累计 Reddit 响应的字节数（解压后的响应体），调用方在请求前后取差值"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def add(self, nbytes: int):
+        self._local.total = self.total() + nbytes
+
+    def total(self) -> int:
+        """当前线程累计的字节数"""
+        return getattr(self._local, "total", 0)
+
+
+class RateLimitedRequestor(Requestor):
+    """
+    每个 OAuth 请求先从限流器取令牌、收到响应后用响应头更新限流器的 prawcore requestor（获取 token 的请求不限流）
+
+    Args:
+        limiter: 令牌桶，为None时不限流（回放录制的请求）
+        meter: 响应字节数的计数器，为None时不统计
+    """
+
+    def __init__(self, *args, limiter: Optional[RedditRateLimiter], meter: Optional[ResponseMeter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+        self.meter = meter
+
+    def request(self, *args, **kwargs):
+        url = args[1]
+        if not url.startswith(self.oauth_url):
+            return super().request(*args, **kwargs)
+        if self.limiter is not None:
+            self.limiter.acquire(request_kind(url))
+        response = super().request(*args, **kwargs)
+        if self.limiter is not None:
+            self.limiter.update(response.headers)
+        if self.meter is not None:
+            self.meter.add(len(response.content))
+        return response
@@ -1,18 +1,62 @@
 """Reddit Scraper - Reddit API集成模块"""
 
-import praw
+import math
+import time
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Callable, Collection, Iterable, Iterator, List, Dict, Optional, Tuple
+
+from .comments import CommentFetcher
+from .models import Post
+from .tracing import bind, span, incr
+from .metrics import REDDIT_REQUEST_SECONDS, REDDIT_RATELIMIT_REMAINING, POSTS_PROCESSED
+from .profiles import LISTING_TYPES, TIME_FILTERED_LISTINGS
 
 logger = logging.getLogger(__name__)
 
+# Reddit 列表接口每页最多返回 100 条
+LISTING_PAGE_SIZE = 100
+
+# /api/info 每次请求最多查询 100 个 fullname
+INFO_BATCH_SIZE = 100
+
+LISTING_SECONDS = REDDIT_REQUEST_SECONDS.labels(kind="listing")
+COMMENTS_SECONDS = REDDIT_REQUEST_SECONDS.labels(kind="comments")
+INFO_SECONDS = REDDIT_REQUEST_SECONDS.labels(kind="info")
+
+
+def dedupe_posts(posts: List[Dict]) -> List[Dict]:
+    """按帖子ID去重（保留第一次出现的帖子），用于合并多个来源的候选帖子"""
+    seen = set()
+    unique_posts = []
+    for post in posts:
+        if post["id"] not in seen:
+            seen.add(post["id"])
+            unique_posts.append(post)
+    return unique_posts
+
 
 class RedditScraper:
     """Reddit帖子抓取器"""
 
-    def __init__(self, config):
+    def __init__(self, config, read_only: bool = None):
+        """
+        Args:
+            config: 配置管理器
+            read_only: 只读模式（仅用 client_id/secret 的应用认证，不登录、不发起验证请求），
+                       为None时使用 REDDIT_READ_ONLY 配置；未配置用户名密码时总是只读
+        """
         self.config = config
+        self.read_only = self.config.get_reddit_read_only() if read_only is None else read_only
+        self.request_stats = {"listing": 0, "comments": 0, "info": 0, "deepen": 0}
+        # 本次运行每个列表下一页的 after 游标（列表已取完时为None），用于 deepen_candidates
+        self.listing_after: Dict[Tuple[str, str], Optional[str]] = {}
+        self.ratelimiter = None
+        self.meter = None
+        # 评论在多个线程中并行获取，请求计数加锁
+        self._stats_lock = threading.Lock()
         self.reddit = self._initialize_reddit_client()
         self.gpt_client = None
         if self.config.get_enable_gpt_summaries():
@@ -22,13 +66,57 @@ class RedditScraper:
 
     def _initialize_reddit_client(self):
         """初始化Reddit客户端"""
+        # 延迟导入：praw 导入较慢，只在真正构造客户端时加载
+        import praw
+        from .cassette import get_cassette
+        from .ratelimit import RateLimitedRequestor, RedditRateLimiter, ResponseMeter
+
+        self.meter = ResponseMeter()
+        cassette = get_cassette(self.config)
+        if cassette is not None and cassette.mode == "replay":
+            # 回放不消耗真实配额，不经过令牌桶
+            limited = {
+                "requestor_class": RateLimitedRequestor,
+                "requestor_kwargs": {"limiter": None, "meter": self.meter, "session": cassette.session()},
+            }
+        else:
+            # 全部请求经过同一个令牌桶（线程共享，可选跨进程共享；Reddit 按应用和登录用户分别计算配额）
+            ratelimit_key = self.config.get_reddit_client_id()
+            if not self.read_only and self.config.get_reddit_username():
+                ratelimit_key += f":{self.config.get_reddit_username()}"
+            self.ratelimiter = RedditRateLimiter(
+                self.config.get_reddit_ratelimit_burst(), store=self._ratelimit_store(), key=ratelimit_key
+            )
+            limited = {
+                "requestor_class": RateLimitedRequestor,
+                "requestor_kwargs": {"limiter": self.ratelimiter, "meter": self.meter},
+            }
+            if cassette is not None:
+                limited["requestor_kwargs"]["session"] = cassette.session()
+
         try:
+            username = self.config.get_reddit_username()
+            password = self.config.get_reddit_password()
+            if self.read_only or not (username and password):
+                # 应用认证：构造时不发起网络请求，第一次列表请求时才获取 token
+                reddit = praw.Reddit(
+                    client_id=self.config.get_reddit_client_id(),
+                    client_secret=self.config.get_reddit_client_secret(),
+                    user_agent=self.config.get_reddit_user_agent(),
+                    **limited,
+                )
+                reddit.read_only = True
+                self.read_only = True
+                logger.info("Reddit API client created (read-only)")
+                return reddit
+
             reddit = praw.Reddit(
                 client_id=self.config.get_reddit_client_id(),
                 client_secret=self.config.get_reddit_client_secret(),
                 user_agent=self.config.get_reddit_user_agent(),
-                username=self.config.get_reddit_username(),
-                password=self.config.get_reddit_password(),
+                username=username,
+                password=password,
+                **limited,
             )
 
             reddit.user.me()
@@ -39,133 +127,587 @@ class RedditScraper:
             logger.error(f"Failed to connect to Reddit API: {e}")
             raise
 
-    def _get_top_comments(self, post, limit: int = 5) -> List[Dict]:
-        """获取帖子的热门评论"""
+    def _ratelimit_store(self):
+        """REDDIT_RATELIMIT_SHARED 时用单独的数据库连接与其他进程共享配额；连接失败时只在进程内限流"""
+        if not self.config.get_reddit_ratelimit_shared():
+            return None
         try:
-            # 获取评论，按最佳排序
-            post.comment_sort = "best"
-            post.comments.replace_more(limit=0)  # 不展开"more comments"
-
-            top_comments = []
-            for comment in post.comments[:limit]:
-                if hasattr(comment, "body") and comment.body != "[deleted]":
-                    comment_data = {
-                        "author": str(comment.author) if comment.author else "[deleted]",
-                        "body": comment.body[:300],  # 限制评论长度
-                        "score": comment.score,
-                        "created_utc": comment.created_utc,
-                    }
-                    top_comments.append(comment_data)
-
-            logger.info(f"Retrieved {len(top_comments)} comments (post: {post.id})")
-            return top_comments
+            from .database_manager import DatabaseManager
 
+            return DatabaseManager(self.config)
         except Exception as e:
-            logger.warning(f"Failed to get comments (post: {post.id}): {e}")
+            logger.error(f"Shared Reddit rate limit unavailable, limiting per process: {e}")
+            return None
+
+    def reset_request_stats(self):
+        """重置本次运行的Reddit请求计数、列表游标和限流统计"""
+        self.request_stats = {"listing": 0, "comments": 0, "info": 0, "deepen": 0}
+        self.listing_after = {}
+        if self.ratelimiter is not None:
+            self.ratelimiter.reset_stats()
+
+    def get_request_stats(self) -> Dict[str, int]:
+        """获取本次运行的Reddit请求计数"""
+        return {**self.request_stats, "total": sum(self.request_stats.values())}
+
+    def log_request_stats(self, subreddits: List[str]):
+        """输出本次运行的Reddit请求数；列表请求超过每个subreddit一轮时告警（防止重复抓取的回归）"""
+        stats = self.get_request_stats()
+        logger.info(
+            f"Reddit requests this run: {stats['listing']} listing, {stats['comments']} comments, "
+            f"{stats['info']} info, {stats['deepen']} deepen, {stats['total']} total"
+        )
+        if self.ratelimiter is not None:
+            limits = self.ratelimiter.stats()
+            if limits["utilization"] is not None:
+                waited = sum(limits["wait_seconds"].values())
+                logger.info(
+                    f"Reddit quota: {limits['utilization']:.0%} of {limits['window_quota']:.0f} per window used at peak, "
+                    f"lowest remaining {limits['min_remaining']:.0f}, waited {waited:.1f}s for tokens "
+                    f"({', '.join(f'{kind} {seconds:.1f}s' for kind, seconds in limits['wait_seconds'].items())})"
+                )
+
+        expected_listing = sum(
+            max(1, math.ceil(self.config.get_subreddit_profile(name).limit / LISTING_PAGE_SIZE)) for name in subreddits
+        )
+        if stats["listing"] > expected_listing:
+            logger.warning(
+                f"Listing requests ({stats['listing']}) exceed the expected {expected_listing} "
+                f"for {len(subreddits)} subreddits - subreddits fetched more than once?"
+            )
+
+    def _update_ratelimit_gauge(self):
+        """根据PRAW记录的最近一次响应头更新剩余配额指标"""
+        try:
+            remaining = self.reddit.auth.limits.get("remaining")
+        except AttributeError:
+            return
+        if remaining is not None:
+            REDDIT_RATELIMIT_REMAINING.set(remaining)
+
+    def _get_top_comments(self, post_id: str, limit: int = 5) -> List[Dict]:
+        """获取帖子的热门顶层评论（只请求浅的评论树切片，scraper/comments.py；limit 为 0 时不发起请求）"""
+        if limit <= 0:
+            return []
+        fetcher = CommentFetcher(
+            self.reddit,
+            self.meter,
+            depth=self.config.get_comment_depth(),
+            sort=self.config.get_comment_sort(),
+            more_requests=self.config.get_comment_more_requests(),
+        )
+        with span("reddit.comments", COMMENTS_SECONDS, post=post_id) as comments_span:
+            try:
+                top_comments, stats = fetcher.fetch(post_id, limit)
+            except Exception as e:
+                with self._stats_lock:
+                    self.request_stats["comments"] += 1
+                comments_span.set_error(str(e))
+                logger.warning(f"Failed to get comments (post: {post_id}): {e}")
+                return []
+
+            with self._stats_lock:
+                self.request_stats["comments"] += stats["requests"]
+            comments_span.add_bytes(stats["bytes"])
+            incr("reddit.comment_bytes", stats["bytes"])
+            self._update_ratelimit_gauge()
+            logger.info(
+                f"Retrieved {len(top_comments)} comments (post: {post_id}, {stats['requests']} requests, "
+                f"{stats['bytes']} bytes, {stats['expanded']} from more)"
+            )
+            return top_comments
+
+    def iter_top_comments(self, posts: Iterable[Dict], prefetched: Dict[str, Future] = None) -> Iterator[List[Dict]]:
+        """
+        并行获取多个帖子的热门评论（COMMENT_FETCH_CONCURRENCY 个线程，请求仍经过同一个令牌桶），按帖子顺序逐个返回；
+        评论数由 subreddit 的 profile 决定，不补充评论的帖子返回空列表
+
+        Args:
+            posts: 帖子字典
+            prefetched: 已经在后台获取的评论 {帖子ID: Future}（StreamingPipeline 预取），这些帖子不再请求
+        """
+        profiles = self.config.get_subreddit_profiles()
+        prefetched = prefetched or {}
+        get_top_comments = bind(self._get_top_comments)
+        with ThreadPoolExecutor(
+            max_workers=self.config.get_comment_fetch_concurrency(), thread_name_prefix="reddit-comments"
+        ) as pool:
+            futures = []
+            for post_data in posts:
+                future = prefetched.get(post_data["id"])
+                if future is None or future.cancelled():
+                    profile = profiles.get(post_data["subreddit"])
+                    limit = profile.comment_limit if profile.enrich else 0
+                    future = pool.submit(get_top_comments, post_data["id"], limit)
+                futures.append(future)
+            for future in futures:
+                yield future.result()
+
+    def _build_post_data(self, post, subreddit_name: str) -> Post:
+        """将PRAW帖子对象转换为帖子记录（scraper/models.py，兼容字典接口；不含评论和GPT摘要）"""
+        fields = vars(post)
+        return Post(
+            id=post.id,
+            title=post.title,
+            author=str(post.author),
+            url=post.url,
+            permalink=f"https://reddit.com{post.permalink}",
+            subreddit=subreddit_name,
+            score=post.score,
+            num_comments=post.num_comments,
+            created_utc=post.created_utc,
+            selftext=post.selftext[:500] if post.selftext else "",
+            is_video=post.is_video,
+            over_18=post.over_18,
+            # 列表接口返回的订阅人数，用于跨 subreddit 的分数归一化
+            # （只读已有的字段：PRAW 访问不存在的属性会额外请求一次完整的帖子）
+            subreddit_subscribers=fields.get("subreddit_subscribers"),
+            # 转帖指向的原帖（"t3_<id>"），用于去重
+            crosspost_parent=fields.get("crosspost_parent"),
+        )
+
+    def fetch_listing(
+        self,
+        subreddit_name: str,
+        listing: str = "hot",
+        time_filter: str = "day",
+        limit: int = None,
+        known: Collection[str] = None,
+        after: str = None,
+    ) -> List[Dict]:
+        """抓取subreddit的一个列表（hot / new / rising / top / controversial），只返回基础字段
+
+        Args:
+            subreddit_name: subreddit名称
+            listing: 列表类型
+            time_filter: top / controversial 的时间范围
+            limit: 列表抓取数量，默认使用 POSTS_LIMIT
+            known: 上次已抓取过的帖子ID；new 列表遇到第一个已知帖子即停止（不返回它及之后的帖子），
+                其他列表在整页都是已知帖子时停止翻页
+            after: 从该 fullname 之后继续抓取（上一次抓取记录在 listing_after 中）
+
+        Returns:
+            帖子列表（按列表顺序）
+        """
+        if listing not in LISTING_TYPES:
+            raise ValueError(f"Unsupported listing type: {listing}")
+        limit = limit or self.config.get_posts_limit()
+        kwargs = {"limit": limit}
+        if listing in TIME_FILTERED_LISTINGS:
+            kwargs["time_filter"] = time_filter
+        if after:
+            kwargs["params"] = {"after": after}
+        known = known or ()
+
+        subreddit = self.reddit.subreddit(subreddit_name)
+        posts = []
+        seen = page_known = 0
+        last_id = None
+        # 列表是惰性加载的，每 LISTING_PAGE_SIZE 条一次请求，发生在迭代过程中；提前退出即不再请求下一页
+        with span("reddit.listing", LISTING_SECONDS, subreddit=subreddit_name, listing=listing):
+            for post in getattr(subreddit, listing)(**kwargs):
+                seen += 1
+                last_id = post.id
+                if post.id in known:
+                    if listing == "new":
+                        # 之后的帖子都更早，已经抓取过
+                        last_id = None
+                        break
+                    page_known += 1
+                posts.append(self._build_post_data(post, subreddit_name))
+                if seen % LISTING_PAGE_SIZE == 0:
+                    if page_known == LISTING_PAGE_SIZE:
+                        break
+                    page_known = 0
+        with self._stats_lock:
+            self.request_stats["deepen" if after else "listing"] += max(1, math.ceil(seen / LISTING_PAGE_SIZE))
+            # 返回的条数不足 limit 说明列表已经取完
+            self.listing_after[(subreddit_name.lower(), listing)] = f"t3_{last_id}" if last_id and seen >= limit else None
+        self._update_ratelimit_gauge()
+        return posts
+
+    def fetch_subreddit_posts(self, subreddit_name: str, limit: int = None, max_age_hours: float = None) -> List[Dict]:
+        """按subreddit的profile抓取一个列表（默认hot），只返回基础字段，不获取评论、不调用GPT
+
+        Args:
+            subreddit_name: subreddit名称
+            limit: 列表抓取数量，默认使用profile的 limit
+            max_age_hours: 只保留该时间窗口内发布的帖子，默认使用profile的 max_age_hours
+
+        Returns:
+            帖子列表
+        """
+        profile = self.config.get_subreddit_profile(subreddit_name)
+        listing = self.fetch_listing(subreddit_name, profile.listing, profile.time_filter, limit or profile.limit)
+        return self._filter_recent(subreddit_name, listing, max_age_hours or profile.max_age_hours)
+
+    def _filter_recent(self, subreddit_name: str, listing: List[Dict], max_age_hours: float) -> List[Dict]:
+        """只保留 max_age_hours 内发布的帖子"""
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).timestamp()
+        posts = [post for post in listing if post["created_utc"] >= cutoff]
+        incr("reddit.posts_fetched", len(posts))
+        POSTS_PROCESSED.labels(stage="fetched").inc(len(posts))
+
+        logger.info(f"Fetched {len(posts)} posts from r/{subreddit_name}")
+        return posts
+
+    def fetch_post_stats(self, post_ids: List[str]) -> List[Dict]:
+        """
+        批量查询帖子当前的分数和评论数（/api/info，每 INFO_BATCH_SIZE 个帖子一次请求）
+
+        Args:
+            post_ids: 帖子ID列表（不带 t3_ 前缀）
+
+        Returns:
+            [{"id", "score", "num_comments"}]，已删除或查不到的帖子不返回
+        """
+        stats = []
+        for start in range(0, len(post_ids), INFO_BATCH_SIZE):
+            batch = post_ids[start : start + INFO_BATCH_SIZE]
+            # 请求由 RedditRateLimiter 的令牌桶统一限流（scraper/ratelimit.py）
+            with self._stats_lock:
+                self.request_stats["info"] += 1
+            with span("reddit.info", INFO_SECONDS, posts=len(batch)):
+                for post in self.reddit.info(fullnames=[f"t3_{post_id}" for post_id in batch]):
+                    stats.append({"id": post.id, "score": post.score, "num_comments": post.num_comments})
+            self._update_ratelimit_gauge()
+        return stats
+
+    def fetch_subreddit_changes(self, subreddit_name: str, db) -> List[Dict]:
+        """增量抓取：按数据库中的列表游标只取上次之后变化的部分，抓取后更新游标
+
+        已知帖子已经在候选暂存表中，只用于暂存模式（ingest / worker）。游标早于 profile 的 max_age_hours 时完整抓取。
+
+        Args:
+            subreddit_name: subreddit名称
+            db: 数据库管理器
+
+        Returns:
+            帖子列表
+        """
+        profile = self.config.get_subreddit_profile(subreddit_name)
+        cursor_key = f"{subreddit_name.lower()}:{profile.listing}"
+        if profile.listing in TIME_FILTERED_LISTINGS:
+            cursor_key += f":{profile.time_filter}"
+
+        fetched_at = time.time()
+        state = db.get_listing_cursor(cursor_key)
+        known = ()
+        if state is not None and fetched_at - state["fetched_at"] < profile.max_age_hours * 3600:
+            known = frozenset(state["seen_ids"])
+        listing = self.fetch_listing(subreddit_name, profile.listing, profile.time_filter, profile.limit, known)
+
+        # 新的游标：本次列表中的帖子在前（包括超出时间窗口的），再接上旧游标中的帖子
+        seen_ids = [post["id"] for post in listing]
+        if known:
+            fresh = set(seen_ids)
+            seen_ids += [post_id for post_id in state["seen_ids"] if post_id not in fresh]
+        db.save_listing_cursor(cursor_key, seen_ids[: max(profile.limit, LISTING_PAGE_SIZE)], fetched_at)
+        return self._filter_recent(subreddit_name, listing, profile.max_age_hours)
+
+    def enrich_post(self, post_data: Dict, top_comments: List[Dict] = None, keep_summary: bool = False) -> Dict:
+        """为帖子补充热门评论和GPT摘要（评论数和是否补充由subreddit的profile决定）
+
+        Args:
+            post_data: 帖子字典
+            top_comments: 已经获取的热门评论（iter_enriched 预先并行获取），为None时在这里获取
+            keep_summary: 帖子已有GPT摘要时保留，只重新获取评论和评论摘要（评论数增加后刷新）
+
+        Returns:
+            补充后的帖子字典（原地修改）
+        """
+        profile = self.config.get_subreddit_profile(post_data["subreddit"])
+        if not profile.enrich:
+            post_data["top_comments"] = []
+            post_data["gpt_summary"] = ""
+            post_data["comment_summary"] = ""
+            return post_data
+
+        # 获取热门评论
+        if top_comments is None:
+            top_comments = self._get_top_comments(post_data["id"], profile.comment_limit)
+        post_data["top_comments"] = top_comments
+
+        if self.config.get_enable_gpt_summaries():
+            try:
+                if not (keep_summary and post_data.get("gpt_summary")):
+                    post_data["gpt_summary"] = self.gpt_client.summarize_and_analyze(post_data["title"], post_data["selftext"])
+                # 如果有评论，生成评论摘要
+                if post_data["top_comments"]:
+                    post_data["comment_summary"] = self.gpt_client.summarize_comments(post_data["top_comments"])
+                else:
+                    post_data["comment_summary"] = ""
+            except Exception as e:
+                post_data["gpt_summary"] = f"[分析失败: {e}]"
+                post_data["comment_summary"] = ""
+        else:
+            post_data["gpt_summary"] = ""
+            post_data["comment_summary"] = ""
+
+        POSTS_PROCESSED.labels(stage="enriched").inc()
+        return post_data
+
+    def iter_listing_batches(
+        self,
+        subreddits: List[str] = None,
+        limit: int = None,
+        db=None,
+        listing: str = None,
+        time_filter: str = "day",
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        """并行抓取各subreddit的列表（LISTING_FETCH_CONCURRENCY 个线程，请求仍经过同一个令牌桶），哪个先抓完先返回哪个；
+        抓取失败的subreddit记录错误后跳过
+
+        Args:
+            subreddits: subreddit列表，默认使用 TARGET_SUBREDDITS
+            limit: 每个subreddit的列表抓取数量，默认使用各自profile的 limit
+            db: 数据库管理器；传入时按列表游标增量抓取（fetch_subreddit_changes，只用于暂存模式）
+            listing: 指定列表类型时不按profile的列表和时间窗口抓取（如趋势的 top 列表）
+            time_filter: listing 为 top / controversial 时的时间范围
+
+        Returns:
+            (subreddit名称, 帖子列表) 的迭代器
+        """
+        subreddits = [name.strip() for name in subreddits or self.config.get_target_subreddits()]
+
+        def fetch(subreddit_name: str) -> List[Dict]:
+            logger.info(f"Scraping hot posts from r/{subreddit_name}...")
+            if listing is not None:
+                profile_limit = self.config.get_subreddit_profile(subreddit_name).limit
+                return self.fetch_listing(subreddit_name, listing, time_filter, limit or profile_limit)
+            if db is not None:
+                return self.fetch_subreddit_changes(subreddit_name, db)
+            return self.fetch_subreddit_posts(subreddit_name, limit=limit)
+
+        with ThreadPoolExecutor(
+            max_workers=self.config.get_listing_fetch_concurrency(), thread_name_prefix="reddit-listings"
+        ) as pool:
+            fetch = bind(fetch)
+            futures = {pool.submit(fetch, subreddit_name): subreddit_name for subreddit_name in subreddits}
+            for future in as_completed(futures):
+                subreddit_name = futures[future]
+                try:
+                    posts = future.result()
+                except Exception as e:
+                    logger.error(f"Error scraping r/{subreddit_name}: {e}")
+                    continue
+                yield subreddit_name, posts
+
+    def collect_candidates(self, subreddits: List[str] = None, limit: int = None, db=None) -> List[Dict]:
+        """抓取全部候选帖子，去掉重复和转帖（scraper/dedupe.py）后按排序分数排序（不获取评论、不调用GPT）
+
+        只保留有界候选池的流式版本见 scraper/pipeline.py。
+
+        Args:
+            subreddits: subreddit列表，默认使用 TARGET_SUBREDDITS
+            limit: 每个subreddit的列表抓取数量，默认使用各自profile的 limit
+            db: 数据库管理器；传入时按列表游标增量抓取（fetch_subreddit_changes，只用于暂存模式）
+
+        Returns:
+            候选帖子列表
+        """
+        subreddits = [name.strip() for name in subreddits or self.config.get_target_subreddits()]
+        fetched = dict(self.iter_listing_batches(subreddits, limit, db))
+
+        # 按 subreddit 的顺序合并，结果与各列表抓取完成的先后无关
+        candidates = dedupe_posts([post for name in subreddits for post in fetched.get(name, ())])
+        if not self.config.get_include_nsfw():
+            candidates = [post for post in candidates if not post["over_18"]]
+        # 延迟导入：numpy 只在排序时加载
+        from .dedupe import rank_unique
+
+        candidates, _ = rank_unique(candidates, self.config)
+
+        logger.info(f"Collected {len(candidates)} unique candidates from {len(subreddits)} subreddits")
+        return candidates
+
+    def _listing_after(self, subreddit_name: str) -> Optional[str]:
+        """本次运行中subreddit的profile列表下一页的 after 游标（没有抓取过或已取完时为None）"""
+        profile = self.config.get_subreddit_profile(subreddit_name)
+        return self.listing_after.get((subreddit_name.lower(), profile.listing))
+
+    def fetch_deeper(self, subreddit_name: str) -> List[Dict]:
+        """按本次运行记录的 after 游标再抓取subreddit列表的下一页（一次请求），列表已取完时返回空列表"""
+        after = self._listing_after(subreddit_name)
+        if not after:
             return []
+        profile = self.config.get_subreddit_profile(subreddit_name)
+        listing = self.fetch_listing(subreddit_name, profile.listing, profile.time_filter, LISTING_PAGE_SIZE, after=after)
+        return self._filter_recent(subreddit_name, listing, profile.max_age_hours)
+
+    def deepen_candidates(
+        self, candidates: List[Dict], keep: Callable[[List[Dict]], List[Dict]], target: int = None
+    ) -> List[Dict]:
+        """过滤后候选不足时，只为候选不足的subreddit向列表深处翻页，直到满足数量或用完请求预算
+
+        每个subreddit的目标数量是 target 按subreddit平均分配（不超过 SELECTION_SUBREDDIT_CAP），分数不低于
+        DEEPEN_MIN_SCORE 的帖子才计入。不足的subreddit轮流翻页；翻出的一页没有合格的新帖子或列表已取完时不再翻页。
+
+        Args:
+            candidates: 已过滤的候选帖子（collect_candidates 之后，同一次运行）
+            keep: 对新翻出的帖子做同样的过滤，如 db.filter_new_posts
+            target: 目标数量，默认使用 NEWSLETTER_POSTS_LIMIT
+
+        Returns:
+            补足后的候选帖子（去重后按排序分数排序）；不需要补足时原样返回
+        """
+        target = target or self.config.get_newsletter_posts_limit()
+        budget = self.config.get_deepen_max_requests()
+        min_score = self.config.get_deepen_min_score()
+        counts: Dict[str, int] = {}
+        for post in candidates:
+            if post["score"] >= min_score:
+                counts[post["subreddit"].lower()] = counts.get(post["subreddit"].lower(), 0) + 1
+        total = sum(counts.values())
+        if budget <= 0 or total >= target:
+            return candidates
+
+        subreddits = [name.strip() for name in self.config.get_target_subreddits()]
+        if not subreddits:
+            return candidates
+        quota = math.ceil(target / len(subreddits))
+        subreddit_cap = self.config.get_selection_settings().subreddit_cap
+        if subreddit_cap:
+            quota = min(quota, subreddit_cap)
+        short = [name for name in subreddits if counts.get(name.lower(), 0) < quota]
+        logger.info(f"Only {total}/{target} candidates after filtering, paging deeper into {len(short)} subreddits")
+
+        seen = {post["id"] for post in candidates}
+        deeper: List[Dict] = []
+        requests = 0
+        while short and requests < budget and total < target:
+            for subreddit_name in list(short):
+                if requests >= budget or total >= target:
+                    break
+                if not self._listing_after(subreddit_name):
+                    short.remove(subreddit_name)
+                    continue
+                requests += 1
+                try:
+                    page = self.fetch_deeper(subreddit_name)
+                except Exception as e:
+                    logger.error(f"Error paging deeper into r/{subreddit_name}: {e}")
+                    short.remove(subreddit_name)
+                    continue
+
+                page = [post for post in page if post["id"] not in seen]
+                seen.update(post["id"] for post in page)
+                if not self.config.get_include_nsfw():
+                    page = [post for post in page if not post["over_18"]]
+                page = keep(page) if page else []
+                added = sum(1 for post in page if post["score"] >= min_score)
+                deeper.extend(page)
+                counts[subreddit_name.lower()] = counts.get(subreddit_name.lower(), 0) + added
+                total += added
+                if not added or counts[subreddit_name.lower()] >= quota:
+                    short.remove(subreddit_name)
+
+        logger.info(f"Paged deeper with {requests} requests: {len(deeper)} more candidates, {total}/{target} qualified")
+        if not deeper:
+            return candidates
+        incr("reddit.posts_deepened", len(deeper))
+        # 延迟导入：numpy 只在排序时加载
+        from .dedupe import rank_unique
+
+        candidates, _ = rank_unique(candidates + deeper, self.config)
+        return candidates
+
+    def select_posts(self, candidates: List[Dict], limit: int = None, scores: List[float] = None) -> List[Dict]:
+        """从候选帖子中选出本期Newsletter的帖子（每个subreddit有上限，跳过标题相近的帖子，见 scraper/selection.py）
+
+        Args:
+            candidates: 候选帖子列表
+            limit: 选取数量，默认使用 NEWSLETTER_POSTS_LIMIT
+            scores: 候选帖子的排序分数，为None时重新计算
+        """
+        # 延迟导入：numpy 只在选择时加载
+        from .selection import DiversitySelector
+
+        limit = limit or self.config.get_newsletter_posts_limit()
+        return DiversitySelector(self.config).select(candidates, limit, scores=scores)
+
+    def iter_enriched(
+        self, posts: List[Dict], keep_summary: bool = False, prefetched: Dict[str, Future] = None
+    ) -> Iterator[Dict]:
+        """
+        逐个补充评论和GPT摘要，补充完一个返回一个：后面帖子的评论在生成前面帖子摘要的同时并行下载
+
+        Args:
+            posts: 帖子字典列表
+            keep_summary: 同 enrich_post
+            prefetched: 同 iter_top_comments
+        """
+        for post_data, top_comments in zip(posts, self.iter_top_comments(posts, prefetched)):
+            yield self.enrich_post(post_data, top_comments, keep_summary=keep_summary)
+
+    def enrich_posts(self, posts: List[Dict]) -> List[Dict]:
+        """为选中的帖子批量补充评论和GPT摘要"""
+        for _ in self.iter_enriched(posts):
+            pass
+        return posts
 
     def get_hot_posts(self, limit: int = None) -> List[Dict]:
-        """获取热门帖子"""
+        """获取热门帖子（流式处理，只保留有界的候选池，只为最终入选的帖子获取评论和GPT摘要）"""
+        # 延迟导入：numpy 只在排序时加载
+        from .pipeline import StreamingPipeline
+
         try:
-            limit = limit or self.config.get_posts_limit()
-            subreddits = self.config.get_target_subreddits()
-            all_posts = []
-
-            for subreddit_name in subreddits:
-                logger.info(f"Scraping hot posts from r/{subreddit_name}...")
-                subreddit = self.reddit.subreddit(subreddit_name)
-                posts = subreddit.hot(limit=limit)
-
-                for post in posts:
-                    post_time = datetime.fromtimestamp(post.created_utc)
-                    if datetime.now() - post_time <= timedelta(hours=24):
-                        post_data = {
-                            "id": post.id,
-                            "title": post.title,
-                            "author": str(post.author),
-                            "url": post.url,
-                            "permalink": f"https://reddit.com{post.permalink}",
-                            "subreddit": subreddit_name,
-                            "score": post.score,
-                            "num_comments": post.num_comments,
-                            "created_utc": post.created_utc,
-                            "selftext": post.selftext[:500] if post.selftext else "",
-                            "is_video": post.is_video,
-                            "over_18": post.over_18,
-                        }
-
-                        # 获取热门评论
-                        post_data["top_comments"] = self._get_top_comments(post)
-
-                        if self.config.get_enable_gpt_summaries():
-                            try:
-                                post_data["gpt_summary"] = self.gpt_client.summarize_and_analyze(
-                                    post.title, post_data["selftext"]
-                                )
-                                # 如果有评论，生成评论摘要
-                                if post_data["top_comments"]:
-                                    post_data["comment_summary"] = self.gpt_client.summarize_comments(
-                                        post_data["top_comments"]
-                                    )
-                                else:
-                                    post_data["comment_summary"] = ""
-                            except Exception as e:
-                                post_data["gpt_summary"] = f"[分析失败: {e}]"
-                                post_data["comment_summary"] = ""
-                        else:
-                            post_data["gpt_summary"] = ""
-                            post_data["comment_summary"] = ""
-
-                        all_posts.append(post_data)
-
-            all_posts.sort(key=lambda x: x["score"], reverse=True)
-            if not self.config.get_include_nsfw():
-                all_posts = [post for post in all_posts if not post["over_18"]]
-
-            logger.info(f"共抓取到 {len(all_posts)} 个热门帖子")
-            return all_posts[: self.config.get_newsletter_posts_limit()]
+            with StreamingPipeline(self) as pipeline:
+                candidates, scores = pipeline.candidates(self.iter_listing_batches(limit=limit))
+                selected_posts = self.select_posts(candidates, scores=scores)
+                for _ in pipeline.iter_enriched(selected_posts):
+                    pass
+
+            logger.info(f"共抓取到 {pipeline.fetched} 个热门帖子")
+            return selected_posts
 
         except Exception as e:
             logger.error(f"抓取Reddit帖子时出错: {e}")
             return []
 
-    def get_trending_posts(self, time_filter: str = "day") -> List[Dict]:
-        """获取趋势帖子"""
+    def get_trending_posts(self, time_filter: str = "day", db=None) -> List[Dict]:
+        """获取趋势帖子
+
+        Args:
+            time_filter: top 列表的时间范围（不传 db 时使用）
+            db: 数据库管理器；传入时按各 subreddit 的 profile 抓取，记录分数快照并按上升势头排序（scraper/trending.py）
+        """
+        # 延迟导入：numpy 只在排序时加载
+        from .pipeline import StreamingPipeline
+
+        if db is not None:
+            return self._get_momentum_posts(db)
+
         try:
-            subreddits = self.config.get_target_subreddits()
-            all_posts = []
-
-            for subreddit_name in subreddits:
-                subreddit = self.reddit.subreddit(subreddit_name)
-                posts = subreddit.top(time_filter=time_filter, limit=self.config.get_posts_limit())
-
-                for post in posts:
-                    post_data = {
-                        "id": post.id,
-                        "title": post.title,
-                        "author": str(post.author),
-                        "url": post.url,
-                        "permalink": f"https://reddit.com{post.permalink}",
-                        "subreddit": subreddit_name,
-                        "score": post.score,
-                        "num_comments": post.num_comments,
-                        "created_utc": post.created_utc,
-                        "selftext": post.selftext[:500] if post.selftext else "",
-                        "is_video": post.is_video,
-                        "over_18": post.over_18,
-                    }
-
-                    # 获取热门评论
-                    post_data["top_comments"] = self._get_top_comments(post)
-
-                    all_posts.append(post_data)
-
-            all_posts.sort(key=lambda x: x["score"], reverse=True)
-            if not self.config.get_include_nsfw():
-                all_posts = [post for post in all_posts if not post["over_18"]]
-
-            return all_posts[: self.config.get_newsletter_posts_limit()]
+            # 各 subreddit 的 top 列表流式进入有界的候选池，转帖和同一内容的多个副本只保留一个，再选出入选帖子
+            with StreamingPipeline(self) as pipeline:
+                candidates, scores = pipeline.candidates(self.iter_listing_batches(listing="top", time_filter=time_filter))
+                selected_posts = self.select_posts(candidates, scores=scores)
+                # 只为入选的帖子获取热门评论（前 K 的帖子已经在抓取列表时预取）
+                top_comments = self.iter_top_comments(selected_posts, pipeline.prefetched)
+                for post_data, comments in zip(selected_posts, top_comments):
+                    post_data["top_comments"] = comments
+                pipeline.close(selected_posts)
+
+            return selected_posts
 
         except Exception as e:
             logger.error(f"Error getting trending posts: {e}")
             return []
+
+    def _get_momentum_posts(self, db) -> List[Dict]:
+        """按分数快照的速度和加速度选出趋势帖子"""
+        from .trending import MomentumRanker
+
+        try:
+            candidates = self.collect_candidates()
+            db.record_snapshots(candidates)
+            scores = MomentumRanker(self.config, db).scores(candidates)
+            selected_posts = self.select_posts(candidates, scores=scores.tolist())
+            for post_data, top_comments in zip(selected_posts, self.iter_top_comments(selected_posts)):
+                post_data["top_comments"] = top_comments
+            return selected_posts
+
+        except Exception as e:
+            logger.error(f"Error getting trending posts by momentum: {e}")
+            return []
@@ -1,22 +1,34 @@
 #!/usr/bin/env python3
 """
 Standalone scraper job entry point
-Usage: python scraper/run_job.py [--test]
+Usage: python scraper/run_job.py [--test] [--distributed | --digest | --refresh] [--record DIR | --replay DIR]
+
+--distributed: enqueue work for `python -m scraper.worker` processes and wait for them
+--digest: send each subscriber a digest of their own subreddits (see scraper/digest.py)
+--refresh: refresh scores and comment counts of recently sent posts (100 posts per Reddit request)
+--record DIR / --replay DIR: record the Reddit and OpenAI HTTP traffic to a cassette, or replay it offline
+                             (see scraper/cassette.py; HTTP_CASSETTE_LATENCY sets the replay latency)
 """
 
 import sys
 import os
+import time
+import argparse
+import uuid
 import logging
 from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scraper.config_manager import ConfigManager
-from scraper.reddit_scraper import RedditScraper
-from scraper.chatgpt_client import ChatGPTClient
-from scraper.newsletter_sender import NewsletterSender
-from scraper.database_manager import DatabaseManager
+from scraper import tracing
+
+# Service modules (praw, psycopg2, jinja2) are imported when a job starts, not when this module is imported
+if TYPE_CHECKING:
+    from scraper.newsletter_sender import NewsletterSender
+    from scraper.database_manager import DatabaseManager
 
 # Configure logging
 logging.basicConfig(
@@ -30,19 +42,40 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_scraper_job(test_mode=False):
-    """Run a single scraper job"""
+def _no_progress(stage=None, **counters):
+    pass
+
+
+def run_scraper_job(test_mode=False, progress=None, exit_on_error=True):
+    """Run a single scraper job
+    
+    progress: optional callback progress(stage=None, **counters) for stage changes and counts
+              (see scraper.job_registry.JobTracker)
+    exit_on_error: exit the process on failure (CLI); when False the exception is re-raised
+    
+    Returns a summary dict (None in test mode)
+    """
     start_time = datetime.now()
     logger.info("=== Starting scraper job ===")
+    tracing.start_run("run_scraper_job")
+    report = progress or _no_progress
+    summary = {'posts_fetched': 0, 'new_posts': 0, 'posts_sent': 0, 'sent': False, 'error': None}
+    config = db = None
+    failed = False
     
     try:
         # Initialize services
         logger.info("Initializing services...")
-        config = ConfigManager()
-        reddit = RedditScraper(config)
-        chatgpt = ChatGPTClient(config)
-        sender = NewsletterSender(config)
-        db = DatabaseManager()
+        report("init")
+        with tracing.span("stage.init"):
+            from scraper.reddit_scraper import RedditScraper
+            from scraper.newsletter_sender import NewsletterSender
+            from scraper.database_manager import DatabaseManager
+            
+            config = ConfigManager()
+            reddit = RedditScraper(config)
+            sender = NewsletterSender(config)
+            db = DatabaseManager(config)
         
         logger.info("All services initialized successfully")
         
@@ -61,90 +94,390 @@ def run_scraper_job(test_mode=False):
             logger.info("All connections successful!")
             return
         
-        # Get hot posts from Reddit
+        # Get hot posts from Reddit: listings fetched in parallel and streamed through dedupe, score snapshots
+        # (scraper/trending.py) and the sent-posts filter into a bounded top-K candidate pool (scraper/pipeline.py)
+        from scraper.pipeline import StreamingPipeline
+        
         logger.info("Fetching hot posts from Reddit...")
-        posts_limit = config.get_posts_limit()
-        posts = reddit.get_hot_posts(limit=posts_limit)
-        logger.info(f"Fetched {len(posts)} posts from Reddit")
+        report("fetch")
+        reddit.reset_request_stats()
+        subreddits = config.get_target_subreddits()
+        with StreamingPipeline(reddit) as pipeline:
+            with tracing.span("stage.fetch"):
+                new_posts, scores = pipeline.candidates(
+                    reddit.iter_listing_batches(subreddits), keep=db.filter_new_posts, on_batch=db.record_snapshots
+                )
+            summary['posts_fetched'] = pipeline.fetched
+            report(posts_fetched=pipeline.fetched)
+            logger.info(f"Fetched {pipeline.fetched} posts from Reddit")
+            
+            # Page deeper into short subreddits when too few new posts survive (DEEPEN_MAX_REQUESTS budget)
+            pooled = new_posts
+            with tracing.span("stage.deepen"):
+                new_posts = reddit.deepen_candidates(new_posts, db.filter_new_posts)
+            summary['new_posts'] = pipeline.kept + len(new_posts) - len(pooled)
+            report(new_posts=summary['new_posts'])
+            logger.info(f"Found {summary['new_posts']} new posts")
+            
+            if not new_posts:
+                logger.info("No new posts to send")
+                return summary
+            
+            # Limit posts for newsletter
+            # Per-subreddit caps and title diversity (scraper/selection.py)
+            # Streamed scores rank each subreddit against its whole listing; re-ranked only when deepening added posts
+            selected_posts = reddit.select_posts(new_posts, scores=scores if new_posts is pooled else None)
+            logger.info(f"Selected {len(selected_posts)} posts for newsletter")
+            
+            # Fetch comments and generate GPT summaries for the selected posts only
+            logger.info("Enriching selected posts...")
+            report("enrich", summaries_total=len(selected_posts))
+            with tracing.span("stage.enrich"):
+                # Comments prefetched while listings were fetched; the rest download while earlier posts are summarized
+                for done, post in enumerate(pipeline.iter_enriched(selected_posts), 1):
+                    report(summaries_done=done)
         
-        # Filter new posts
-        logger.info("Filtering new posts...")
-        new_posts = db.filter_new_posts(posts)
-        logger.info(f"Found {len(new_posts)} new posts")
+        # Editor words are generated by the sender according to ENABLE_EDITOR_SUMMARY
+        report("send")
+        with tracing.span("stage.send"):
+            sent = send_and_record(config, sender, db, selected_posts)
+        if sent:
+            summary.update(posts_sent=len(selected_posts), sent=True)
+            report(messages_sent=len(config.get_recipients()))
+            tracing.incr("posts.sent", len(selected_posts))
+        else:
+            summary['error'] = "Failed to send newsletter"
+        reddit.log_request_stats(subreddits)
         
-        if not new_posts:
-            logger.info("No new posts to send")
-            return
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"=== Job completed in {duration:.2f}s ===")
+        return summary
         
-        # Limit posts for newsletter
-        newsletter_limit = config.get_newsletter_posts_limit()
-        selected_posts = new_posts[:newsletter_limit]
-        logger.info(f"Selected {len(selected_posts)} posts for newsletter")
+    except Exception as e:
+        failed = True
+        logger.error(f"Error in scraper job: {e}", exc_info=True)
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.error(f"=== Job failed after {duration:.2f}s ===")
+        if not exit_on_error:
+            raise
+        sys.exit(1)
+    finally:
+        tracing.publish_run(
+            tracing.end_run(success=not failed), db, config.get_otel_exporter_endpoint() if config else ""
+        )
+
+
+def run_digest_job(progress=None, exit_on_error=True):
+    """Build and send per-subscriber digests
+    
+    Every subscribed subreddit is fetched once and every selected post enriched once;
+    subscribers with identical selections share one editor note. Each subscriber gets their own message.
+    
+    Returns a summary dict
+    """
+    start_time = datetime.now()
+    logger.info("=== Starting digest job ===")
+    tracing.start_run("run_digest_job")
+    report = progress or _no_progress
+    summary = {'subscribers': 0, 'subreddits': 0, 'digests': 0, 'messages_sent': 0, 'posts_sent': 0, 'error': None}
+    config = db = None
+    failed = False
+    
+    try:
+        report("init")
+        with tracing.span("stage.init"):
+            from scraper.reddit_scraper import RedditScraper
+            from scraper.newsletter_sender import NewsletterSender
+            from scraper.database_manager import DatabaseManager
+            from scraper.digest import DigestBuilder, group_by_selection
+            from scraper.subscriber_token import unsubscribe_url
+            
+            config = ConfigManager()
+            reddit = RedditScraper(config)
+            sender = NewsletterSender(config)
+            db = DatabaseManager(config)
+        
+        index = db.get_subscription_index()
+        summary['subreddits'] = len(index)
+        summary['subscribers'] = len({email for emails in index.values() for email in emails})
+        if not index:
+            logger.info("No active subscribers")
+            return summary
+        logger.info(f"{summary['subscribers']} subscribers across {summary['subreddits']} subreddits")
+        
+        reddit.reset_request_stats()
+        with tracing.span("stage.fetch"):
+            digests = DigestBuilder(config, reddit, db).build(index, progress=report)
+        summary['digests'] = len(digests)
         
-        # Generate summaries using ChatGPT
-        if config.get_enable_gpt_summaries():
-            logger.info("Generating GPT summaries...")
-            for post in selected_posts:
-                try:
-                    summary = chatgpt.summarize_and_analyze(post)
-                    post['gpt_summary'] = summary
-                    logger.info(f"Generated summary for: {post['title'][:50]}...")
-                except Exception as e:
-                    logger.warning(f"Failed to generate summary for {post['id']}: {e}")
-                    post['gpt_summary'] = None
-        
-        # Generate editor words
-        if config.get_enable_editor_summary():
-            logger.info("Generating editor words...")
-            try:
-                editor_words = chatgpt.generate_editor_words(selected_posts)
-            except Exception as e:
-                logger.warning(f"Failed to generate editor words: {e}")
+        report("send")
+        sent_posts = {}
+        failures = 0
+        with tracing.span("stage.send"):
+            for recipients, posts in group_by_selection(digests):
                 editor_words = None
-        else:
-            editor_words = None
+                delivered = []
+                for email in recipients:
+                    success, editor_words = sender.send_newsletter(
+                        posts, editor_words, recipients=[email],
+                        unsubscribe_url=unsubscribe_url(config.get_public_base_url(), email, config.get_web_secret_key())
+                    )
+                    if success:
+                        delivered.append(email)
+                    else:
+                        failures += 1
+                if delivered:
+                    sent_posts.update((post['id'], post) for post in posts)
+                    summary['messages_sent'] += len(delivered)
+                    report(messages_sent=summary['messages_sent'])
+                db.log_newsletter_send(
+                    posts_count=len(posts),
+                    success=len(delivered) == len(recipients),
+                    error_message=None if len(delivered) == len(recipients) else "Failed to send digest",
+                    recipients=recipients,
+                    editor_words=editor_words,
+                    newsletter_title=config.get_newsletter_title()
+                )
         
-        # Send newsletter
-        logger.info("Sending newsletter...")
-        success = sender.send_newsletter(selected_posts, editor_words)
+        if sent_posts:
+            db.mark_posts_as_sent(list(sent_posts.values()))
+            tracing.incr("posts.sent", len(sent_posts))
+        summary['posts_sent'] = len(sent_posts)
+        if failures:
+            summary['error'] = f"Failed to send {failures} digests"
+        reddit.log_request_stats(list(index))
         
-        if success:
-            # Mark posts as sent
-            logger.info("Marking posts as sent in database...")
-            db.mark_posts_as_sent(selected_posts)
-            
-            # Log newsletter send
-            recipients = config.get_email_recipients()
-            db.log_newsletter_send(
-                posts_count=len(selected_posts),
-                success=True,
-                recipients=recipients,
-                editor_words=editor_words,
-                newsletter_title=config.get_newsletter_title()
-            )
-            
-            logger.info("Newsletter sent successfully")
-        else:
-            logger.error("Failed to send newsletter")
-            db.log_newsletter_send(
-                posts_count=len(selected_posts),
-                success=False,
-                error_message="Failed to send newsletter",
-                recipients=config.get_email_recipients()
-            )
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"=== Digest job completed in {duration:.2f}s: {summary['messages_sent']} messages ===")
+        return summary
         
+    except Exception as e:
+        failed = True
+        logger.error(f"Error in digest job: {e}", exc_info=True)
         duration = (datetime.now() - start_time).total_seconds()
-        logger.info(f"=== Job completed in {duration:.2f}s ===")
+        logger.error(f"=== Job failed after {duration:.2f}s ===")
+        if not exit_on_error:
+            raise
+        sys.exit(1)
+    finally:
+        tracing.publish_run(
+            tracing.end_run(success=not failed), db, config.get_otel_exporter_endpoint() if config else ""
+        )
+
+
+def wait_for_batch(db: "DatabaseManager", batch_id: str, timeout: int, poll_interval: float) -> Dict[str, int]:
+    """Block until no job in the batch is pending or running (or the timeout expires)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        counts = db.get_batch_status(batch_id)
+        if not counts.get('pending') and not counts.get('running'):
+            return counts
+        if time.monotonic() >= deadline:
+            logger.warning(f"Timed out waiting for batch {batch_id}: {counts}")
+            return counts
+        time.sleep(poll_interval)
+
+
+def send_and_record(config: ConfigManager, sender: "NewsletterSender", db: "DatabaseManager",
+                    selected_posts: List[Dict], editor_words: str = None) -> bool:
+    """Send the newsletter and record the outcome in the database"""
+    logger.info("Sending newsletter...")
+    success, editor_words = sender.send_newsletter(selected_posts, editor_words)
+    recipients = config.get_recipients()
+    
+    if success:
+        logger.info("Marking posts as sent in database...")
+        db.mark_posts_as_sent(selected_posts)
+        db.log_newsletter_send(
+            posts_count=len(selected_posts),
+            success=True,
+            recipients=recipients,
+            editor_words=editor_words,
+            newsletter_title=config.get_newsletter_title()
+        )
+        logger.info("Newsletter sent successfully")
+    else:
+        logger.error("Failed to send newsletter")
+        db.log_newsletter_send(
+            posts_count=len(selected_posts),
+            success=False,
+            error_message="Failed to send newsletter",
+            recipients=recipients
+        )
+    return success
+
+
+def run_refresh_job(progress=None, exit_on_error=True):
+    """Refresh scores and comment counts of sent posts
+    
+    Posts sent in the last SCORE_REFRESH_DAYS days that were not refreshed within SCORE_REFRESH_INTERVAL_HOURS
+    are looked up INFO_BATCH_SIZE at a time through /api/info; each batch is written back with one bulk UPDATE
+    and recorded as score snapshots. Requests are paced only by the shared token bucket (scraper/ratelimit.py).
+    
+    Returns a summary dict
+    """
+    start_time = datetime.now()
+    logger.info("=== Starting score refresh job ===")
+    tracing.start_run("run_refresh_job")
+    report = progress or _no_progress
+    summary = {'stale_posts': 0, 'refreshed': 0, 'requests': 0}
+    config = db = None
+    failed = False
+    
+    try:
+        report("init")
+        from scraper.reddit_scraper import RedditScraper, INFO_BATCH_SIZE
+        from scraper.database_manager import DatabaseManager
+        
+        config = ConfigManager()
+        reddit = RedditScraper(config)
+        db = DatabaseManager(config)
+        
+        post_ids = db.get_stale_post_ids(config.get_score_refresh_days(), config.get_score_refresh_interval_hours())
+        summary['stale_posts'] = len(post_ids)
+        report("refresh", stale_posts=len(post_ids))
+        logger.info(f"Refreshing {len(post_ids)} sent posts")
+        
+        reddit.reset_request_stats()
+        with tracing.span("stage.refresh"):
+            for start in range(0, len(post_ids), INFO_BATCH_SIZE):
+                batch = post_ids[start:start + INFO_BATCH_SIZE]
+                stats = reddit.fetch_post_stats(batch)
+                # Deleted posts keep their last known values but are not looked up again until the next interval
+                found = {row['id'] for row in stats}
+                missing = [{'id': post_id, 'score': None, 'num_comments': None} for post_id in batch if post_id not in found]
+                db.update_post_scores(stats + missing)
+                db.record_snapshots(stats)
+                summary['refreshed'] += len(stats)
+                report(refreshed=summary['refreshed'])
+        summary['requests'] = reddit.get_request_stats()['info']
+        tracing.incr("posts.refreshed", summary['refreshed'])
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"=== Score refresh completed in {duration:.2f}s "
+                    f"({summary['refreshed']} posts, {summary['requests']} requests) ===")
+        return summary
         
     except Exception as e:
-        logger.error(f"Error in scraper job: {e}", exc_info=True)
+        failed = True
+        logger.error(f"Error in score refresh job: {e}", exc_info=True)
         duration = (datetime.now() - start_time).total_seconds()
         logger.error(f"=== Job failed after {duration:.2f}s ===")
+        if not exit_on_error:
+            raise
         sys.exit(1)
+    finally:
+        tracing.publish_run(
+            tracing.end_run(success=not failed), db, config.get_otel_exporter_endpoint() if config else ""
+        )
 
 
-if __name__ == "__main__":
-    # Check for test flag
-    test_mode = "--test" in sys.argv
+def run_distributed_job():
+    """Coordinator: fan scraping and enrichment out to queue workers, then assemble and send"""
+    start_time = datetime.now()
+    logger.info("=== Starting distributed scraper job ===")
+    tracing.start_run("run_distributed_job")
+    config = db = None
+    failed = False
     
-    run_scraper_job(test_mode=test_mode)
+    try:
+        from scraper.newsletter_sender import NewsletterSender
+        from scraper.database_manager import DatabaseManager
+        from scraper.worker import JOB_FETCH_SUBREDDIT, JOB_ENRICH_POST
+        
+        config = ConfigManager()
+        sender = NewsletterSender(config)
+        db = DatabaseManager(config)
+        
+        batch_id = f"job-{start_time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        timeout = config.get_queue_wait_timeout()
+        poll_interval = config.get_worker_poll_interval()
+        max_attempts = config.get_queue_max_attempts()
+        
+        # Stage 1: one fetch job per subreddit (listing fetches outrank enrichment)
+        subreddits = config.get_target_subreddits()
+        db.enqueue_jobs(
+            batch_id,
+            JOB_FETCH_SUBREDDIT,
+            [{'subreddit': subreddit} for subreddit in subreddits],
+            priority=10,
+            max_attempts=max_attempts
+        )
+        with tracing.span("stage.fetch"):
+            counts = wait_for_batch(db, batch_id, timeout, poll_interval)
+        logger.info(f"Fetch stage finished: {counts}")
+        
+        # Stage 2: rank staged candidates, enrich only the selected ones
+        candidates = db.get_staged_candidates(include_nsfw=config.get_include_nsfw())
+        selected_posts = sender.rank_candidates(candidates)
+        if not selected_posts:
+            logger.info("No new posts to send")
+            return
+        
+        to_enrich = [post['id'] for post in selected_posts if 'top_comments' not in post]
+        db.enqueue_jobs(batch_id, JOB_ENRICH_POST, [{'post_id': post_id} for post_id in to_enrich],
+                        max_attempts=max_attempts)
+        with tracing.span("stage.enrich"):
+            counts = wait_for_batch(db, batch_id, timeout, poll_interval)
+        logger.info(f"Enrich stage finished: {counts}")
+        if counts.get('dead'):
+            logger.warning(f"{counts['dead']} jobs dead-lettered in batch {batch_id}")
+        
+        selected_posts = db.get_candidates_by_ids([post['id'] for post in selected_posts])
+        logger.info(f"Selected {len(selected_posts)} posts for newsletter")
+        with tracing.span("stage.send"):
+            send_and_record(config, sender, db, selected_posts)
+        tracing.incr("posts.sent", len(selected_posts))
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.info(f"=== Distributed job completed in {duration:.2f}s ===")
+        
+    except Exception as e:
+        failed = True
+        logger.error(f"Error in distributed job: {e}", exc_info=True)
+        duration = (datetime.now() - start_time).total_seconds()
+        logger.error(f"=== Job failed after {duration:.2f}s ===")
+        sys.exit(1)
+    finally:
+        tracing.publish_run(
+            tracing.end_run(success=not failed), db, config.get_otel_exporter_endpoint() if config else ""
+        )
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse the command line (argv defaults to sys.argv[1:]); invalid arguments print the usage and exit with status 2"""
+    parser = argparse.ArgumentParser(description="Run one scraper / newsletter job")
+    parser.add_argument('--test', action='store_true', help="test mode for the default scrape-and-send job")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--distributed', action='store_true', help="enqueue work for scraper.worker processes and wait")
+    mode.add_argument('--digest', action='store_true', help="send each subscriber a digest of their own subreddits")
+    mode.add_argument('--refresh', action='store_true', help="refresh scores and comment counts of recently sent posts")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record', metavar='DIR', help="record the Reddit and OpenAI HTTP traffic to a cassette")
+    cassette.add_argument('--replay', metavar='DIR', help="replay a recorded cassette offline")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    """Main entry point"""
+    args = parse_args(argv)
+    
+    # Record or replay the HTTP traffic; set before the settings are parsed
+    for mode in ('record', 'replay'):
+        path = getattr(args, mode)
+        if path is not None:
+            os.environ['HTTP_CASSETTE_MODE'] = mode
+            os.environ['HTTP_CASSETTE'] = path
+    
+    if args.distributed:
+        run_distributed_job()
+    elif args.digest:
+        run_digest_job()
+    elif args.refresh:
+        run_refresh_job()
+    else:
+        run_scraper_job(test_mode=args.test)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Selection - 带多样性约束的 top-K 选择模块
+
+按排序分数直接截取前 K 条时，经常选出同一个 subreddit 的多条几乎相同的帖子。这里在排序之后增加一个选择阶段：
+
+- 每个 subreddit 最多入选 SELECTION_SUBREDDIT_CAP 条（0 表示不限制）；其他 subreddit 的候选不够时，
+  再按顺序用超出配额的帖子补足（只订阅一个 subreddit 时不会少于 K 条）
+- MMR（maximal marginal relevance）：每一步选出 λ * 相关度 - (1 - λ) * 与已入选帖子的最大标题相似度 最高的帖子，
+  相关度是排序分数线性缩放到 [0, 1]，λ = SELECTION_MMR_LAMBDA（1 表示只按分数）
+- 与已入选帖子标题相似度达到 NEAR_DUPLICATE_SIMILARITY 的帖子直接跳过
+
+标题相似度用预先计算的 SimHash 草图（scraper/sketches.py）。MMR 分数只会随着入选帖子增加而下降，所以用最大堆做
+惰性贪心：弹出堆顶时只和上次计算之后新入选的帖子比较，分数仍不低于其他候选的旧分数时直接入选，否则更新后放回。
+每个候选最多与 K 个入选帖子比较，不做 O(n²) 的两两比较；候选池先按排序分数截取前 CANDIDATE_POOL_FACTOR * K 条。
+
+    selector = DiversitySelector(config)
+    selected = selector.select(candidates, 10)
+"""
+
+import heapq
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .ranking import Ranker, top_k_indices
+from .sketches import similarity, simhash_many
+
+# 标题草图相似度达到该值视为同一内容
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+# 参与多样性选择的候选数（K 的倍数）；分数排在更后面的帖子即使标题独特也很难入选
+CANDIDATE_POOL_FACTOR = 10
+
+
+def _relevance(scores: Sequence[float]) -> List[float]:
+    """排序分数线性缩放到 [0, 1]（全部相同时为 1）"""
+    low, high = min(scores), max(scores)
+    if high <= low:
+        return [1.0] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+
+def select_diverse(
+    subreddits: Sequence[str],
+    scores: Sequence[float],
+    sketches: Sequence[int],
+    k: int,
+    subreddit_cap: int = 0,
+    mmr_lambda: float = 1.0,
+) -> List[int]:
+    """
+    惰性贪心的 MMR 选择
+
+    Args:
+        subreddits: 每个候选的 subreddit
+        scores: 每个候选的排序分数（越大越好）
+        sketches: 每个候选标题的 SimHash 草图
+        k: 选择数量
+        subreddit_cap: 每个 subreddit 最多入选的数量，0 表示不限制
+        mmr_lambda: 相关度的权重（1 表示只按分数，仍会跳过近似重复的标题）
+
+    Returns:
+        入选候选的下标（按入选顺序）
+    """
+    if k <= 0 or not scores:
+        return []
+    relevance = _relevance(scores)
+    penalty = 1.0 - mmr_lambda
+    # 每个候选与已入选帖子的最大相似度，以及计算到第几个入选帖子
+    max_similarity = [0.0] * len(scores)
+    heap = [(-mmr_lambda * rel, index, 0) for index, rel in enumerate(relevance)]
+    heapq.heapify(heap)
+
+    selected: List[int] = []
+    over_cap: List[int] = []
+    per_subreddit: Dict[str, int] = {}
+    while heap and len(selected) < k:
+        _, index, seen = heapq.heappop(heap)
+        subreddit = subreddits[index].lower()
+        if subreddit_cap and per_subreddit.get(subreddit, 0) >= subreddit_cap:
+            over_cap.append(index)
+            continue
+        if seen < len(selected):
+            for chosen in selected[seen:]:
+                max_similarity[index] = max(max_similarity[index], similarity(sketches[index], sketches[chosen]))
+            if max_similarity[index] >= NEAR_DUPLICATE_SIMILARITY:
+                continue
+            # 分数下降了，放回堆中与其他候选重新比较
+            heapq.heappush(heap, (-(mmr_lambda * relevance[index] - penalty * max_similarity[index]), index, len(selected)))
+            continue
+        selected.append(index)
+        per_subreddit[subreddit] = per_subreddit.get(subreddit, 0) + 1
+
+    # 其他 subreddit 的候选不够时，用超出配额的帖子补足（同样跳过近似重复）
+    for index in over_cap:
+        if len(selected) >= k:
+            break
+        if all(similarity(sketches[index], sketches[chosen]) < NEAR_DUPLICATE_SIMILARITY for chosen in selected):
+            selected.append(index)
+    return selected
+
+
+class DiversitySelector:
+    """
+    按当前配置快照（SELECTION_* 和排序参数）从候选帖子中选出 top-K
+
+    Args:
+        config: 配置管理器
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def select(self, posts: List[Dict], k: int, scores: Sequence[float] = None, sketches: Sequence[int] = None) -> List[Dict]:
+        """
+        Args:
+            posts: 候选帖子
+            k: 选择数量
+            scores: 排序分数（与 posts 对应），为None时用 Ranker 计算
+            sketches: 标题草图（与 posts 对应），为None时只为候选池中的帖子计算
+
+        Returns:
+            入选帖子（按入选顺序，即分数从高到低的大致顺序）
+        """
+        if not posts or k <= 0:
+            return []
+        scores = Ranker(self.config).scores(posts) if scores is None else np.asarray(scores, dtype=np.float64)
+        pool = top_k_indices(scores, k * CANDIDATE_POOL_FACTOR).tolist()
+        if sketches is None:
+            pool_sketches = simhash_many(posts[index]["title"] for index in pool)
+        else:
+            pool_sketches = [sketches[index] for index in pool]
+
+        settings = self.config.get_selection_settings()
+        chosen = select_diverse(
+            [posts[index]["subreddit"] for index in pool],
+            scores[pool].tolist(),
+            pool_sketches,
+            k,
+            settings.subreddit_cap,
+            settings.mmr_lambda,
+        )
+        return [posts[pool[index]] for index in chosen]
@@ -0,0 +1,503 @@
+"""Settings - 不可变的配置快照模块
+
+配置在进程内只解析一次：读取 .env 和环境变量，校验类型和取值范围后生成冻结的 Settings 对象，
+所有组件共享同一个快照，热路径上的配置读取只是属性访问。
+
+.env 或 subreddit profiles 文件（scraper/profiles.py）修改后不会自动生效，需要显式调用 reload_if_changed()（按文件修改时间判断）；
+调度循环、worker 轮询和 API 后台任务会定期调用。已经在环境变量中设置的值（如 Docker --env-file）优先于 .env。
+
+    store = get_store(".env")
+    settings = store.settings
+    settings.posts_limit          # int，已校验
+    store.reload_if_changed()     # .env 修改后重新加载
+"""
+
+import os
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from dotenv import dotenv_values
+
+from .comments import COMMENT_SORTS
+from .profiles import SubredditProfile, SubredditProfiles
+
+logger = logging.getLogger(__name__)
+
+
+class SettingsError(ValueError):
+    """配置值无法解析或超出范围"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("Invalid configuration: " + "; ".join(errors))
+        self.errors = errors
+
+
+class _EnvParser:
+    """从环境变量字典读取并校验配置值，错误收集后统一抛出"""
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.errors: List[str] = []
+
+    def text(self, key: str, default: str = "") -> str:
+        return self.environ.get(key, default)
+
+    def flag(self, key: str, default: bool) -> bool:
+        return self.environ.get(key, "true" if default else "false").lower() == "true"
+
+    def items(self, key: str, default: str = "") -> Tuple[str, ...]:
+        return tuple(item.strip() for item in self.environ.get(key, default).split(",") if item.strip())
+
+    def choice(self, key: str, default: str, allowed: Tuple[str, ...]) -> str:
+        value = self.environ.get(key, default).strip().lower() or default
+        if value not in allowed:
+            self.errors.append(f"{key}={value!r} must be one of {', '.join(allowed)}")
+            return default
+        return value
+
+    def integer(self, key: str, default: int, minimum: int = None, maximum: int = None) -> int:
+        return self._number(int, key, default, minimum, maximum)
+
+    def number(self, key: str, default: float, minimum: float = None, maximum: float = None) -> float:
+        return self._number(float, key, default, minimum, maximum)
+
+    def _number(self, kind, key, default, minimum, maximum):
+        raw = self.environ.get(key)
+        if raw is None or raw.strip() == "":
+            return default
+        try:
+            value = kind(raw)
+        except ValueError:
+            self.errors.append(f"{key}={raw!r} is not a valid {kind.__name__}")
+            return default
+        if minimum is not None and value < minimum:
+            self.errors.append(f"{key}={value} must be >= {minimum}")
+        elif maximum is not None and value > maximum:
+            self.errors.append(f"{key}={value} must be <= {maximum}")
+        return value
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """PostgreSQL 连接配置"""
+
+    host: Optional[str]
+    port: int
+    database: str
+    user: Optional[str]
+    password: Optional[str]
+    sslmode: str
+
+    @classmethod
+    def from_env(cls, env: _EnvParser) -> "DatabaseSettings":
+        # 优先使用 DATABASE_URL (Azure PostgreSQL / Supabase 格式)
+        database_url = env.text("DATABASE_URL")
+        if database_url:
+            parsed = urlparse(database_url)
+            try:
+                port = parsed.port or 5432
+            except ValueError:
+                env.errors.append("DATABASE_URL has an invalid port")
+                port = 5432
+            return cls(
+                host=parsed.hostname,
+                port=port,
+                database=parsed.path[1:] if parsed.path else "postgres",
+                user=parsed.username,
+                password=parsed.password,
+                sslmode="require",
+            )
+        return cls(
+            host=env.text("DB_HOST", "localhost"),
+            port=env.integer("DB_PORT", 5432, 1, 65535),
+            database=env.text("DB_NAME", "reddit_newsletter"),
+            user=env.text("DB_USER", "postgres"),
+            password=env.text("DB_PASSWORD"),
+            sslmode=env.text("DB_SSLMODE", "require"),
+        )
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class RankingSettings:
+    """候选帖子排序参数（scraper/ranking.py）"""
+
+    normalization: str  # zscore / subscribers / none
+    score_weight: float
+    velocity_weight: float
+    comment_weight: float
+
+    @classmethod
+    def from_env(cls, env: _EnvParser) -> "RankingSettings":
+        return cls(
+            normalization=env.choice("RANKING_NORMALIZATION", "zscore", ("zscore", "subscribers", "none")),
+            score_weight=env.number("RANKING_SCORE_WEIGHT", 1.0, 0),
+            velocity_weight=env.number("RANKING_VELOCITY_WEIGHT", 0.5, 0),
+            comment_weight=env.number("RANKING_COMMENT_WEIGHT", 0.2, 0),
+        )
+
+
+@dataclass(frozen=True)
+class SelectionSettings:
+    """Newsletter 帖子选择参数（scraper/selection.py）"""
+
+    subreddit_cap: int  # 每个 subreddit 最多入选的帖子数，0 表示不限制
+    mmr_lambda: float  # 相关度与多样性的权衡，1 表示只按分数
+
+    @classmethod
+    def from_env(cls, env: _EnvParser) -> "SelectionSettings":
+        return cls(
+            subreddit_cap=env.integer("SELECTION_SUBREDDIT_CAP", 3, 0),
+            mmr_lambda=env.number("SELECTION_MMR_LAMBDA", 0.7, 0, 1),
+        )
+
+
+@dataclass(frozen=True)
+class TrendingSettings:
+    """按分数快照检测上升趋势的参数（scraper/trending.py）"""
+
+    window_hours: float  # 速度按最近一个窗口计算，加速度比较最近两个窗口
+    acceleration_weight: float
+
+    @classmethod
+    def from_env(cls, env: _EnvParser) -> "TrendingSettings":
+        return cls(
+            window_hours=env.number("TRENDING_WINDOW_HOURS", 3.0, 0.25, 168),
+            acceleration_weight=env.number("TRENDING_ACCELERATION_WEIGHT", 0.5, 0),
+        )
+
+
+@dataclass(frozen=True)
+class CassetteSettings:
+    """Reddit / OpenAI HTTP 请求的录制和回放（scraper/cassette.py）"""
+
+    mode: str  # off / record / replay
+    path: str
+    latency_scale: float  # 回放延迟 = 录制时的耗时 × latency_scale + latency_ms
+    latency_ms: float
+
+    @classmethod
+    def from_env(cls, env: _EnvParser) -> "CassetteSettings":
+        mode = env.choice("HTTP_CASSETTE_MODE", "off", ("off", "record", "replay"))
+        path = env.text("HTTP_CASSETTE")
+        if mode != "off" and not path:
+            env.errors.append(f"HTTP_CASSETTE must be set when HTTP_CASSETTE_MODE={mode}")
+        # original（录制时的耗时）、none（不等待）、2x（录制耗时的倍数）或 50（固定毫秒数）
+        latency = env.text("HTTP_CASSETTE_LATENCY", "original").strip().lower()
+        scale, fixed_ms = {"original": (1.0, 0.0), "none": (0.0, 0.0)}.get(latency, (None, None))
+        if scale is None:
+            try:
+                if latency.endswith("x"):
+                    scale, fixed_ms = float(latency[:-1]), 0.0
+                else:
+                    scale, fixed_ms = 0.0, float(latency)
+                if scale < 0 or fixed_ms < 0:
+                    raise ValueError(latency)
+            except ValueError:
+                env.errors.append(f"HTTP_CASSETTE_LATENCY={latency!r} must be original, none, a factor (2x) or milliseconds")
+                scale, fixed_ms = 1.0, 0.0
+        return cls(mode=mode, path=path, latency_scale=scale, latency_ms=fixed_ms)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """解析并校验后的全部配置（不可变）"""
+
+    # Reddit
+    reddit_client_id: str
+    reddit_client_secret: str
+    reddit_user_agent: str
+    reddit_username: str
+    reddit_password: str
+    reddit_read_only: bool
+    reddit_ratelimit_burst: int
+    reddit_ratelimit_shared: bool
+    target_subreddits: Tuple[str, ...]
+    posts_limit: int
+    newsletter_posts_limit: int
+    include_nsfw: bool
+    deepen_max_requests: int
+    deepen_min_score: int
+    comment_depth: int
+    comment_sort: str
+    comment_more_requests: int
+    comment_fetch_concurrency: int
+    listing_fetch_concurrency: int
+    subreddit_profiles_file: str
+    subreddit_profiles: SubredditProfiles
+    ranking: RankingSettings
+    selection: SelectionSettings
+    trending: TrendingSettings
+
+    # SMTP
+    smtp_server: str
+    smtp_port: int
+    smtp_use_tls: bool
+    smtp_use_ssl: bool
+    smtp_username: str
+    smtp_password: str
+    smtp_from_email: str
+    recipients: Tuple[str, ...]
+
+    # 定时任务、增量采集、任务队列
+    schedule_time: str
+    run_immediately: bool
+    ingest_interval_minutes: int
+    ingest_enrich_batch: int
+    score_refresh_days: int
+    score_refresh_interval_hours: float
+    comment_refresh_min_delta: int
+    comment_refresh_ratio: float
+    queue_visibility_timeout: int
+    queue_max_attempts: int
+    queue_wait_timeout: int
+    worker_poll_interval: float
+
+    # API
+    api_io_workers: int
+    api_io_queue: int
+    api_job_workers: int
+    api_job_queue: int
+    listing_cache_ttl: int
+    listing_cache_stale: int
+    listing_cache_max_entries: int
+    listing_cache_shared: bool
+
+    # 监控
+    otel_exporter_endpoint: str
+    metrics_port: int
+    settings_reload_interval: int
+
+    # 数据库
+    database: DatabaseSettings
+
+    # HTTP 录制和回放
+    cassette: CassetteSettings
+
+    # GPT/OpenAI
+    openai_api_key: str
+    chatgpt_api_key: str
+    openai_api_base: str
+    openai_model: str
+    enable_gpt_summaries: bool
+    enable_editor_summary: bool
+
+    # Newsletter 编辑
+    newsletter_editor_name: str
+    newsletter_title: str
+
+    # Web服务
+    web_host: str
+    web_port: int
+    web_debug: bool
+    web_secret_key: str
+    public_base_url: str  # API 的公网地址，用于邮件中的取消订阅链接
+    enable_web_service: bool
+
+    @classmethod
+    def from_env(cls, environ=None) -> "Settings":
+        """
+        从环境变量解析配置
+
+        Raises:
+            SettingsError: 有配置项无法解析或超出范围（包含全部错误）
+        """
+        env = _EnvParser(os.environ if environ is None else environ)
+        smtp_username = env.text("SMTP_USERNAME")
+        openai_api_key = env.text("OPENAI_API_KEY")
+        posts_limit = env.integer("POSTS_LIMIT", 25, 1)
+        subreddit_profiles_file = env.text("SUBREDDIT_PROFILES_FILE")
+        settings = cls(
+            reddit_client_id=env.text("REDDIT_CLIENT_ID"),
+            reddit_client_secret=env.text("REDDIT_CLIENT_SECRET"),
+            reddit_user_agent=env.text("REDDIT_USER_AGENT", "Reddit Newsletter Bot v1.0"),
+            reddit_username=env.text("REDDIT_USERNAME"),
+            reddit_password=env.text("REDDIT_PASSWORD"),
+            reddit_read_only=env.flag("REDDIT_READ_ONLY", False),
+            reddit_ratelimit_burst=env.integer("REDDIT_RATELIMIT_BURST", 10, 1),
+            reddit_ratelimit_shared=env.flag("REDDIT_RATELIMIT_SHARED", False),
+            target_subreddits=env.items("TARGET_SUBREDDITS", "AskReddit,todayilearned,worldnews,technology,science"),
+            posts_limit=posts_limit,
+            newsletter_posts_limit=env.integer("NEWSLETTER_POSTS_LIMIT", 10, 1),
+            include_nsfw=env.flag("INCLUDE_NSFW", False),
+            deepen_max_requests=env.integer("DEEPEN_MAX_REQUESTS", 10, 0),
+            deepen_min_score=env.integer("DEEPEN_MIN_SCORE", 10, 0),
+            comment_depth=env.integer("COMMENT_DEPTH", 1, 1),
+            comment_sort=env.choice("COMMENT_SORT", "best", COMMENT_SORTS),
+            comment_more_requests=env.integer("COMMENT_MORE_REQUESTS", 1, 0),
+            comment_fetch_concurrency=env.integer("COMMENT_FETCH_CONCURRENCY", 4, 1),
+            listing_fetch_concurrency=env.integer("LISTING_FETCH_CONCURRENCY", 4, 1),
+            subreddit_profiles_file=subreddit_profiles_file,
+            # 没有单独配置的字段使用全局 POSTS_LIMIT
+            subreddit_profiles=SubredditProfiles.load(
+                subreddit_profiles_file, SubredditProfile(limit=posts_limit), env.errors
+            ),
+            ranking=RankingSettings.from_env(env),
+            selection=SelectionSettings.from_env(env),
+            trending=TrendingSettings.from_env(env),
+            smtp_server=env.text("SMTP_SERVER", "smtp.gmail.com"),
+            smtp_port=env.integer("SMTP_PORT", 587, 1, 65535),
+            smtp_use_tls=env.flag("SMTP_USE_TLS", True),
+            smtp_use_ssl=env.flag("SMTP_USE_SSL", False),
+            smtp_username=smtp_username,
+            smtp_password=env.text("SMTP_PASSWORD"),
+            smtp_from_email=env.text("SMTP_FROM_EMAIL", smtp_username),
+            recipients=env.items("EMAIL_RECIPIENTS"),
+            schedule_time=env.text("SCHEDULE_TIME", "09:00"),
+            run_immediately=env.flag("RUN_IMMEDIATELY", False),
+            ingest_interval_minutes=env.integer("INGEST_INTERVAL_MINUTES", 30, 1),
+            ingest_enrich_batch=env.integer("INGEST_ENRICH_BATCH", 10, 0),
+            score_refresh_days=env.integer("SCORE_REFRESH_DAYS", 7, 1),
+            score_refresh_interval_hours=env.number("SCORE_REFRESH_INTERVAL_HOURS", 6.0, 0),
+            comment_refresh_min_delta=env.integer("COMMENT_REFRESH_MIN_DELTA", 20, 0),
+            comment_refresh_ratio=env.number("COMMENT_REFRESH_RATIO", 0.5, 0),
+            queue_visibility_timeout=env.integer("QUEUE_VISIBILITY_TIMEOUT", 300, 1),
+            queue_max_attempts=env.integer("QUEUE_MAX_ATTEMPTS", 3, 1),
+            queue_wait_timeout=env.integer("QUEUE_WAIT_TIMEOUT", 1800, 1),
+            worker_poll_interval=env.number("WORKER_POLL_INTERVAL", 2.0, 0),
+            api_io_workers=env.integer("API_IO_WORKERS", 8, 1),
+            api_io_queue=env.integer("API_IO_QUEUE", 32, 0),
+            api_job_workers=env.integer("API_JOB_WORKERS", 1, 1),
+            api_job_queue=env.integer("API_JOB_QUEUE", 2, 0),
+            listing_cache_ttl=env.integer("LISTING_CACHE_TTL", 60, 0),
+            listing_cache_stale=env.integer("LISTING_CACHE_STALE", 300, 0),
+            listing_cache_max_entries=env.integer("LISTING_CACHE_MAX_ENTRIES", 256, 1),
+            listing_cache_shared=env.flag("LISTING_CACHE_SHARED", False),
+            otel_exporter_endpoint=env.text("OTEL_EXPORTER_OTLP_ENDPOINT"),
+            metrics_port=env.integer("METRICS_PORT", 0, 0, 65535),
+            settings_reload_interval=env.integer("SETTINGS_RELOAD_INTERVAL", 10, 0),
+            database=DatabaseSettings.from_env(env),
+            cassette=CassetteSettings.from_env(env),
+            openai_api_key=openai_api_key,
+            # 兼容 chatgpt_client.py，优先 CHATGPT_API_KEY，其次 OPENAI_API_KEY
+            chatgpt_api_key=env.text("CHATGPT_API_KEY", openai_api_key),
+            openai_api_base=env.text("OPENAI_API_BASE", "https://api.openai.com/v1"),
+            openai_model=env.text("OPENAI_MODEL", "gpt-3.5-turbo"),
+            enable_gpt_summaries=env.flag("ENABLE_GPT_SUMMARIES", True),
+            enable_editor_summary=env.flag("ENABLE_EDITOR_SUMMARY", True),
+            newsletter_editor_name=env.text("NEWSLETTER_EDITOR_NAME", "Reddit Newsletter Team"),
+            newsletter_title=env.text("NEWSLETTER_TITLE", "Reddit 热门精选"),
+            web_host=env.text("WEB_HOST", "127.0.0.1"),
+            web_port=env.integer("WEB_PORT", 5000, 1, 65535),
+            web_debug=env.flag("WEB_DEBUG", False),
+            web_secret_key=env.text("WEB_SECRET_KEY", "dev-secret-key-change-in-production"),
+            public_base_url=env.text("PUBLIC_BASE_URL").rstrip("/"),
+            enable_web_service=env.flag("ENABLE_WEB_SERVICE", False),
+        )
+        if env.errors:
+            raise SettingsError(env.errors)
+        return settings
+
+
+def _file_mtime(path: str) -> Optional[int]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class SettingsStore:
+    """
+    一个 .env 文件对应的共享配置快照（包括 .env 中 SUBREDDIT_PROFILES_FILE 指向的 profiles 文件）
+
+    Args:
+        config_file: .env 文件路径
+    """
+
+    def __init__(self, config_file: str = ".env"):
+        self.config_file = config_file
+        self.settings: Optional[Settings] = None
+        self.loaded_mtime: Optional[int] = None
+        self.loaded_profiles_mtime: Optional[int] = None
+        # 上一次从 .env 写入环境变量的值，用于区分 .env 的值和进程自身的环境变量
+        self._dotenv_applied: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _mtime(self) -> Optional[int]:
+        return _file_mtime(self.config_file)
+
+    def _profiles_mtime(self) -> Optional[int]:
+        return _file_mtime(os.environ.get("SUBREDDIT_PROFILES_FILE", ""))
+
+    def _apply_dotenv(self, mtime: Optional[int]):
+        """把 .env 的值写入环境变量；进程启动时已有或运行中被改过的变量保持不变"""
+        try:
+            values = dotenv_values(self.config_file) if mtime is not None else {}
+        except Exception as e:
+            logger.warning(f"Failed to load config file: {e}, using environment variables or defaults")
+            return
+        applied = {}
+        for key, value in values.items():
+            if value is None:
+                continue
+            current = os.environ.get(key)
+            if current is None or current == self._dotenv_applied.get(key):
+                os.environ[key] = value
+                applied[key] = value
+        # 从 .env 删除的变量也从环境变量中移除
+        for key, value in self._dotenv_applied.items():
+            if key not in applied and os.environ.get(key) == value:
+                del os.environ[key]
+        self._dotenv_applied = applied
+        if mtime is not None:
+            logger.info(f"Config file {self.config_file} loaded successfully")
+
+    def load(self) -> Settings:
+        """重新读取 .env 和环境变量并替换快照；解析失败时抛出 SettingsError，保留旧快照"""
+        with self._lock:
+            mtime = self._mtime()
+            self._apply_dotenv(mtime)
+            profiles_mtime = self._profiles_mtime()
+            self.settings = Settings.from_env()
+            self.loaded_mtime = mtime
+            self.loaded_profiles_mtime = profiles_mtime
+            return self.settings
+
+    def get(self) -> Settings:
+        """当前快照（第一次调用时加载）"""
+        return self.settings or self.load()
+
+    def reload_if_changed(self) -> bool:
+        """
+        .env 或 profiles 文件的修改时间变化时重新加载
+
+        Returns:
+            是否加载了新的快照（新配置无效时记录错误并继续使用旧快照）
+        """
+        if self._mtime() == self.loaded_mtime and self._profiles_mtime() == self.loaded_profiles_mtime:
+            return False
+        try:
+            self.load()
+        except SettingsError as e:
+            # 记录本次修改时间，避免每次检查都重复报错
+            self.loaded_mtime = self._mtime()
+            self.loaded_profiles_mtime = self._profiles_mtime()
+            logger.error(f"Keeping previous settings: {e}")
+            return False
+        logger.info(f"Settings reloaded from {self.config_file}")
+        return True
+
+
+_stores: Dict[str, SettingsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(config_file: str = ".env") -> SettingsStore:
+    """进程内每个 .env 路径共享一个 SettingsStore"""
+    path = os.path.abspath(config_file)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SettingsStore(config_file)
+    return store
+
+
+def get_settings(config_file: str = ".env") -> Settings:
+    return get_store(config_file).get()
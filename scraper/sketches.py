@@ -0,0 +1,119 @@
+"""Sketches - 标题相似度草图（SimHash / MinHash）模块
+
+SimHash：每个标题压缩为一个 64 位整数，标题中的每个词哈希为 64 位，按位投票后取符号。
+相似的标题只有少数位不同，两个草图的相似度 = 1 - 汉明距离 / 64，比较一次只是一次异或和 popcount，
+不需要保存或比较原始文本。用于选择阶段的多样性惩罚（scraper/selection.py）。没有特征的标题（只有停用词、表情等）
+草图为 0，不与任何标题相似，否则任意两个这样的标题都会被当作重复。
+
+MinHash：每个标题的词集合在 MINHASH_PERMUTATIONS 个随机排列下的最小哈希值，两个签名相同位置相等的比例
+估计词集合的 Jaccard 相似度；签名按段分桶（LSH）即可在近线性时间内找出相似标题（scraper/dedupe.py）。
+
+批量计算都用 NumPy 一次处理全部标题。
+
+    sketches = simhash_many([post["title"] for post in posts])
+    similarity(sketches[0], sketches[1])   # 0.0 ~ 1.0
+    signatures = minhash_many([post["title"] for post in posts])   # (标题数, MINHASH_PERMUTATIONS)
+"""
+
+import re
+import hashlib
+from functools import lru_cache
+from typing import Iterable, List
+
+import numpy as np
+
+SKETCH_BITS = 64
+
+# MinHash：排列 (a * h + b) mod p，h 取 32 位哈希、p 为 2^31 - 1，乘积不会超出 uint64
+MINHASH_PERMUTATIONS = 32
+_MINHASH_PRIME = (1 << 31) - 1
+_MINHASH_RNG = np.random.default_rng(20240611)
+_MINHASH_A = _MINHASH_RNG.integers(1, _MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _MINHASH_RNG.integers(0, _MINHASH_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# 几乎每个英文标题都有的词，参与投票只会让不相关的标题看起来相似
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def title_features(text: str) -> List[str]:
+    """标题特征：小写的词（去掉单字符和停用词）"""
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    # 固定的哈希函数（不受 PYTHONHASHSEED 影响），同一标题在不同进程中草图相同
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _hash_features(texts: List[str]):
+    """全部标题的特征哈希（按标题连续排列）和每个标题的特征数"""
+    hashes: List[int] = []
+    counts = np.zeros(len(texts), dtype=np.intp)
+    for index, text in enumerate(texts):
+        features = title_features(text or "")
+        hashes.extend(_feature_hash(feature) for feature in features)
+        counts[index] = len(features)
+    return np.array(hashes, dtype="<u8"), counts
+
+
+def simhash_many(texts: Iterable[str]) -> List[int]:
+    """
+    批量计算 SimHash
+
+    Returns:
+        与 texts 等长的 64 位整数列表（没有特征的文本为 0）
+    """
+    texts = list(texts)
+    hashes, counts = _hash_features(texts)
+    if not len(hashes):
+        return [0] * len(texts)
+
+    # 每个特征哈希展开为 64 位（转置为 位 x 特征，按行连续），同一标题的特征是连续的一段
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    bits = np.ascontiguousarray(bits.T)
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    # 每个标题中该位为 1 的特征数，超过特征数的一半即为 1
+    ones = np.zeros((len(texts), SKETCH_BITS), dtype=np.int32)
+    ones[present] = np.add.reduceat(bits, starts, axis=1, dtype=np.int32).T
+    packed = np.packbits(ones * 2 > counts[:, None], axis=1, bitorder="little")
+    return packed.view("<u8").ravel().tolist()
+
+
+def minhash_many(texts: Iterable[str]) -> np.ndarray:
+    """
+    批量计算 MinHash 签名
+
+    Returns:
+        (标题数, MINHASH_PERMUTATIONS) 的 uint64 数组；没有特征的标题各位置为 _MINHASH_PRIME（与任何标题都不相等）
+    """
+    texts = list(texts)
+    hashes, counts = _hash_features(texts)
+    signatures = np.full((len(texts), MINHASH_PERMUTATIONS), _MINHASH_PRIME, dtype=np.uint64)
+    if not len(hashes):
+        return signatures
+
+    # 排列 x 特征，按行连续；同一标题的特征是连续的一段，按段取最小值
+    permuted = (_MINHASH_A[:, None] * (hashes & np.uint64(0xFFFFFFFF))[None, :] + _MINHASH_B[:, None]) % np.uint64(
+        _MINHASH_PRIME
+    )
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    signatures[present] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return signatures
+
+
+def simhash(text: str) -> int:
+    return simhash_many([text])[0]
+
+
+def similarity(first: int, second: int) -> float:
+    """两个草图的相似度：1 - 汉明距离 / 64；没有特征的标题（草图为 0）与任何标题的相似度都为 0"""
+    if not first or not second:
+        return 0.0
+    return 1.0 - bin(first ^ second).count("1") / SKETCH_BITS
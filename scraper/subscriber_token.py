@@ -0,0 +1,55 @@
+"""Subscriber Token - 订阅者令牌模块
+
+查询和取消订阅不以邮箱地址为凭据：每封 digest 邮件带有收件人自己的令牌（List-Unsubscribe 头），
+令牌由邮箱地址和以 WEB_SECRET_KEY 计算的 HMAC-SHA256 签名组成，只有收到邮件的人才能查询或取消自己的订阅。
+更换 WEB_SECRET_KEY 后，已发出的令牌全部失效。
+
+    token = make_token("alice@example.com", secret)
+    read_token(token, secret)  # -> "alice@example.com"，签名不符时为 None
+"""
+
+import hmac
+import base64
+import hashlib
+from typing import Optional
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _signature(email: str, secret: str) -> str:
+    digest = hmac.new(secret.encode("utf-8"), b"subscriber:" + email.encode("utf-8"), hashlib.sha256).digest()
+    return _encode(digest)
+
+
+def make_token(email: str, secret: str) -> str:
+    """生成订阅者令牌（邮箱地址不区分大小写）"""
+    email = email.lower()
+    return f"{_encode(email.encode('utf-8'))}.{_signature(email, secret)}"
+
+
+def read_token(token: str, secret: str) -> Optional[str]:
+    """校验令牌，返回其中的邮箱地址；格式错误或签名不符时返回 None"""
+    payload, _, signature = token.partition(".")
+    try:
+        email = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)).decode("utf-8")
+    except ValueError:
+        return None
+    if not email or not hmac.compare_digest(signature, _signature(email, secret)):
+        return None
+    return email
+
+
+def unsubscribe_url(base_url: str, email: str, secret: str) -> Optional[str]:
+    """
+    一键取消订阅的地址（POST，RFC 8058）
+
+    Args:
+        base_url: API 的公网地址（PUBLIC_BASE_URL），为空时返回 None
+        email: 收件人
+        secret: WEB_SECRET_KEY
+    """
+    if not base_url:
+        return None
+    return f"{base_url.rstrip('/')}/api/unsubscribe/{make_token(email, secret)}"
@@ -0,0 +1,370 @@
+"""Tracing - 轻量级分阶段计时与计数模块
+
+用法：
+
+    run = tracing.start_run("run_scraper_job")
+    with tracing.span("reddit.listing", subreddit="python") as s:
+        ...
+        s.add_bytes(1024)
+    tracing.incr("posts.fetched", 25)
+    report = tracing.end_run(success=True).report()
+
+没有活动的 run 时，span 和计数器都是空操作，可以常驻在热点路径上。
+
+活动的 run 保存在 ContextVar 中：API 的多个任务线程可以同时各自记录一次运行。新线程不会继承活动的 run，
+提交到线程池的函数需要用 bind() 包装，才能记录到提交方的 run 中：
+
+    pool.submit(tracing.bind(fetch), subreddit_name)
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+import functools
+import contextvars
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .metrics import JOB_DURATION_SECONDS, JOB_RUNS
+
+logger = logging.getLogger(__name__)
+
+# 每次运行最多保留的原始 span 数（仅用于 OpenTelemetry 导出，聚合统计不受影响）
+MAX_RECORDED_SPANS = 10000
+
+
+class StageStats:
+    """单个阶段的聚合统计"""
+
+    __slots__ = ("count", "total_seconds", "max_seconds", "errors", "bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.errors = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 4),
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "errors": self.errors,
+            "bytes": self.bytes,
+        }
+
+
+class RunTrace:
+    """一次任务运行的计时记录"""
+
+    def __init__(self, job_name: str):
+        self.run_id = uuid.uuid4().hex
+        self.job_name = job_name
+        self.started_at = datetime.now()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.success = None
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        start_ns: int,
+        duration: float,
+        error: Optional[str],
+        nbytes: int,
+        attrs: Dict,
+        span_id: str,
+        parent_id: Optional[str],
+    ):
+        """记录一个已结束的 span"""
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.count += 1
+            stats.total_seconds += duration
+            stats.max_seconds = max(stats.max_seconds, duration)
+            stats.bytes += nbytes
+            if error is not None:
+                stats.errors += 1
+
+            if len(self.spans) < MAX_RECORDED_SPANS:
+                self.spans.append(
+                    {
+                        "span_id": span_id,
+                        "parent_id": parent_id,
+                        "name": name,
+                        "start_ns": start_ns,
+                        "end_ns": start_ns + int(duration * 1e9),
+                        "error": error,
+                        "bytes": nbytes,
+                        "attributes": attrs,
+                    }
+                )
+
+    def incr(self, name: str, value: int = 1):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def duration_seconds(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def report(self) -> Dict:
+        """生成结构化的计时报告"""
+        with self._lock:
+            stages = {name: stats.to_dict() for name, stats in self.stages.items()}
+            counters = dict(self.counters)
+        return {
+            "run_id": self.run_id,
+            "job_name": self.job_name,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds, 4),
+            "success": self.success,
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def format_report(self) -> str:
+        """生成便于阅读的计时报告（按总耗时降序）"""
+        report = self.report()
+        lines = [f"Timing report for {self.job_name} ({report['duration_seconds']:.2f}s, run {self.run_id}):"]
+        stages = sorted(report["stages"].items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+        for name, stats in stages:
+            lines.append(
+                f"  {name:<32} {stats['count']:>5}x  total {stats['total_seconds']:>8.3f}s  "
+                f"avg {stats['avg_ms']:>8.1f}ms  max {stats['max_ms']:>8.1f}ms  "
+                f"errors {stats['errors']:>3}  bytes {stats['bytes']}"
+            )
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"  {name:<32} {value}")
+        return "\n".join(lines)
+
+
+_current_run: contextvars.ContextVar[Optional[RunTrace]] = contextvars.ContextVar("tracing_run", default=None)
+_local = threading.local()
+
+
+def start_run(job_name: str) -> RunTrace:
+    """开始记录一次运行（当前线程或协程的上下文中只有一个活动的 run）"""
+    run = RunTrace(job_name)
+    _current_run.set(run)
+    return run
+
+
+def end_run(success: bool = True) -> Optional[RunTrace]:
+    """结束当前运行并返回其记录"""
+    run = _current_run.get()
+    _current_run.set(None)
+    if run is not None:
+        run.end_ns = time.time_ns()
+        run.success = success
+        JOB_DURATION_SECONDS.labels(job=run.job_name).observe(run.duration_seconds)
+        JOB_RUNS.labels(job=run.job_name, status="success" if success else "failure").inc()
+    return run
+
+
+def current_run() -> Optional[RunTrace]:
+    return _current_run.get()
+
+
+def bind(func: Callable) -> Callable:
+    """
+    把当前活动的 run 绑定到函数上，在其他线程（如线程池）中调用时记录到同一个 run
+
+    Args:
+        func: 要提交到线程池的函数
+
+    Returns:
+        包装后的函数；没有活动的 run 时原样返回
+    """
+    run = _current_run.get()
+    if run is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_run.set(run)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_run.reset(token)
+
+    return wrapper
+
+
+def incr(name: str, value: int = 1):
+    """累加当前运行的计数器（没有活动的 run 时忽略）"""
+    run = _current_run.get()
+    if run is not None:
+        run.incr(name, value)
+
+
+class span:
+    """计时上下文管理器，记录耗时、字节数和异常
+
+    传入 histogram（metrics 中带标签的子对象）时，无论是否有活动的 run，耗时都会计入该直方图。
+    """
+
+    __slots__ = ("name", "attrs", "histogram", "nbytes", "error", "span_id", "_run", "_start_ns", "_start", "_parent_id")
+
+    def __init__(self, name: str, histogram=None, **attrs):
+        self.name = name
+        self.histogram = histogram
+        self.attrs = attrs
+        self.nbytes = 0
+        self.error = None
+
+    def add_bytes(self, nbytes: int):
+        self.nbytes += nbytes
+
+    def set_attribute(self, key: str, value):
+        self.attrs[key] = value
+
+    def set_error(self, error: str):
+        """标记失败（用于内部吞掉异常、只返回错误信息的调用）"""
+        self.error = error
+
+    def __enter__(self):
+        self._run = _current_run.get()
+        if self._run is not None:
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            self._parent_id = stack[-1] if stack else None
+            self.span_id = os.urandom(8).hex()
+            stack.append(self.span_id)
+            self._start_ns = time.time_ns()
+        if self._run is not None or self.histogram is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - self._start)
+        if self._run is not None:
+            duration = time.perf_counter() - self._start
+            _local.stack.pop()
+            if exc is not None and self.error is None:
+                self.error = f"{exc_type.__name__}: {exc}"
+            self._run.record(
+                self.name, self._start_ns, duration, self.error, self.nbytes, self.attrs, self.span_id, self._parent_id
+            )
+        return False
+
+
+def traced(name: str, histogram=None):
+    """为函数添加 span 的装饰器"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, histogram=histogram):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def export_otlp(run: RunTrace, endpoint: str, service_name: str = "newsea-scraper", timeout: int = 5) -> bool:
+    """
+    以 OTLP/HTTP JSON 格式把一次运行导出到 OpenTelemetry Collector
+
+    Args:
+        run: 运行记录
+        endpoint: Collector 地址，如 http://localhost:4318
+        service_name: service.name 资源属性
+        timeout: 请求超时（秒）
+
+    Returns:
+        是否导出成功
+    """
+    import requests
+
+    trace_id = run.run_id
+    root_id = os.urandom(8).hex()
+    otlp_spans = [
+        {
+            "traceId": trace_id,
+            "spanId": root_id,
+            "name": run.job_name,
+            "kind": 1,
+            "startTimeUnixNano": str(run.start_ns),
+            "endTimeUnixNano": str(run.end_ns or time.time_ns()),
+            "attributes": [{"key": "run.success", "value": _otlp_value(bool(run.success))}],
+            "status": {"code": 1 if run.success else 2},
+        }
+    ]
+    for record in run.spans:
+        attributes = [{"key": key, "value": _otlp_value(value)} for key, value in record["attributes"].items()]
+        if record["bytes"]:
+            attributes.append({"key": "bytes", "value": _otlp_value(record["bytes"])})
+        otlp_span = {
+            "traceId": trace_id,
+            "spanId": record["span_id"],
+            "parentSpanId": record["parent_id"] or root_id,
+            "name": record["name"],
+            "kind": 3,
+            "startTimeUnixNano": str(record["start_ns"]),
+            "endTimeUnixNano": str(record["end_ns"]),
+            "attributes": attributes,
+            "status": {"code": 2, "message": record["error"]} if record["error"] else {"code": 1},
+        }
+        otlp_spans.append(otlp_span)
+
+    body = {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": _otlp_value(service_name)}]},
+                "scopeSpans": [{"scope": {"name": "scraper.tracing"}, "spans": otlp_spans}],
+            }
+        ]
+    }
+    try:
+        resp = requests.post(endpoint.rstrip("/") + "/v1/traces", json=body, timeout=timeout)
+        resp.raise_for_status()
+        logger.info(f"Exported {len(otlp_spans)} spans to {endpoint}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to export spans to {endpoint}: {e}")
+        return False
+
+
+def publish_run(run: Optional[RunTrace], db=None, otlp_endpoint: str = "") -> None:
+    """
+    输出并保存一次运行的计时报告
+
+    Args:
+        run: 运行记录（为None时忽略）
+        db: DatabaseManager，提供时把报告写入 job_runs 表
+        otlp_endpoint: OpenTelemetry Collector 地址，为空时不导出
+    """
+    if run is None:
+        return
+
+    logger.info(run.format_report())
+    if db is not None:
+        db.save_run_report(run.report())
+    if otlp_endpoint:
+        export_otlp(run, otlp_endpoint)
@@ -0,0 +1,94 @@
+"""Trending - 按分数快照检测上升趋势的模块
+
+只看一次 top(time_filter) 的分数，分不清正在上升的帖子和早已停止增长的老帖子。每次抓取都把帖子的分数和评论数
+写入 post_snapshots 表（DatabaseManager.record_snapshots），这里用最近的快照计算：
+
+- 速度：最近一个窗口（TRENDING_WINDOW_HOURS）内每小时增加的分数
+- 加速度：最近一个窗口的速度减去前一个窗口的速度，再除以窗口长度
+- 只有一个快照的帖子用发布以来的平均速度，加速度为 0
+
+窗口锚点由数据库按帖子聚合（DatabaseManager.get_snapshot_windows），速度和加速度用 NumPy 对全部候选一次计算：
+
+    momentum = log(1 + 速度) 按 subreddit 的 z-score + acceleration_weight * 加速度（对称 log 后整体 z-score）+ log(weight)
+
+    ranker = MomentumRanker(config, db)
+    scores = ranker.scores(candidates)
+"""
+
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .ranking import MIN_AGE_HOURS, _grouped_zscore, _subreddit_groups, _zscore
+
+_ANCHORS = ("last_ts", "last_score", "base_ts", "base_score", "prior_ts", "prior_score")
+
+
+def momentum_features(
+    posts: List[Dict], windows: Dict[str, Dict], window_hours: float, now: float = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每个帖子的速度和加速度
+
+    Args:
+        posts: 帖子字典列表
+        windows: DatabaseManager.get_snapshot_windows() 的结果
+        window_hours: 窗口长度（小时）
+        now: 当前时间戳，默认 time.time()
+
+    Returns:
+        (速度 分数/小时, 加速度 分数/小时²)，与 posts 等长
+    """
+    count = len(posts)
+    now = time.time() if now is None else now
+    anchors = np.full((count, len(_ANCHORS)), np.nan)
+    for index, post in enumerate(posts):
+        window = windows.get(post["id"])
+        if window is not None:
+            anchors[index] = [window[key] for key in _ANCHORS]
+    last_ts, last_score, base_ts, base_score, prior_ts, prior_score = anchors.T
+
+    score = np.fromiter((post["score"] for post in posts), dtype=np.float64, count=count)
+    created = np.fromiter((post["created_utc"] for post in posts), dtype=np.float64, count=count)
+    lifetime = score / np.maximum((now - created) / 3600.0, MIN_AGE_HOURS)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        recent_hours = (last_ts - base_ts) / 3600.0
+        prior_hours = (base_ts - prior_ts) / 3600.0
+        recent = (last_score - base_score) / recent_hours
+        prior = (base_score - prior_score) / prior_hours
+    # 快照不足一个时间间隔时退回平均速度；只有最近窗口的快照时没有加速度
+    has_recent = recent_hours > 0
+    velocity = np.where(has_recent, recent, lifetime)
+    acceleration = np.where(has_recent & (prior_hours > 0), (recent - prior) / window_hours, 0.0)
+    return velocity, acceleration
+
+
+class MomentumRanker:
+    """
+    按分数快照的速度和加速度为候选帖子排序（TRENDING_* 和 subreddit profiles 的权重）
+
+    Args:
+        config: 配置管理器
+        db: 数据库管理器（读取 post_snapshots）
+    """
+
+    def __init__(self, config, db):
+        self.config = config
+        self.db = db
+
+    def scores(self, posts: List[Dict], now: float = None) -> np.ndarray:
+        """计算每个帖子的趋势分数（越大越靠前），调用前应先记录本次抓取的快照"""
+        if not posts:
+            return np.empty(0)
+        settings = self.config.get_trending_settings()
+        windows = self.db.get_snapshot_windows([post["id"] for post in posts], settings.window_hours)
+        velocity, acceleration = momentum_features(posts, windows, settings.window_hours, now)
+
+        groups, names = _subreddit_groups(posts)
+        profiles = self.config.get_subreddit_profiles()
+        weights = np.array([profiles.get(name).weight for name in names], dtype=np.float64)[groups]
+        velocity_feature = _grouped_zscore(np.log1p(np.maximum(velocity, 0)), groups, len(names))
+        acceleration_feature = _zscore(np.sign(acceleration) * np.log1p(np.abs(acceleration)))
+        return velocity_feature + settings.acceleration_weight * acceleration_feature + np.log(weights)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Queue worker entry point - 从 Postgres 任务队列领取并执行抓取/摘要任务
+Usage: python -m scraper.worker [--once] [--max-jobs N]
+
+可以在一台或多台机器上同时启动 N 个进程，任务通过 FOR UPDATE SKIP LOCKED 分发。
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.config_manager import ConfigManager
+from scraper.reddit_scraper import RedditScraper
+from scraper.database_manager import DatabaseManager
+from scraper import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_FETCH_SUBREDDIT = "fetch_subreddit"
+JOB_ENRICH_POST = "enrich_post"
+
+
+class QueueWorker:
+    """任务队列 worker"""
+
+    def __init__(self, config: ConfigManager = None, reddit: RedditScraper = None, db: DatabaseManager = None):
+        self.config = config or ConfigManager()
+        self.reddit = reddit or RedditScraper(self.config)
+        self.db = db or DatabaseManager(self.config)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = self.config.get_queue_visibility_timeout()
+        self.poll_interval = self.config.get_worker_poll_interval()
+        self.handlers = {
+            JOB_FETCH_SUBREDDIT: self._handle_fetch_subreddit,
+            JOB_ENRICH_POST: self._handle_enrich_post,
+        }
+
+    def _handle_fetch_subreddit(self, payload: dict) -> None:
+        """抓取一个subreddit并写入候选暂存表（按列表游标增量抓取，已暂存的帖子不再翻页）"""
+        posts = self.reddit.fetch_subreddit_changes(payload["subreddit"], self.db)
+        self.db.upsert_candidates(posts)
+
+    def _handle_enrich_post(self, payload: dict) -> None:
+        """为一个候选帖子补充评论和GPT摘要"""
+        posts = self.db.get_candidates_by_ids([payload["post_id"]])
+        if not posts:
+            raise ValueError(f"Candidate {payload['post_id']} not found in staging")
+        post = self.reddit.enrich_post(posts[0])
+        if not self.db.save_candidate_enrichment(post):
+            raise RuntimeError(f"Failed to save enrichment for {post['id']}")
+
+    def run_job(self, job: dict) -> bool:
+        """执行单个任务，返回是否成功"""
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            handler(job["payload"])
+            self.db.complete_job(job["id"], self.worker_id)
+            return True
+        except Exception as e:
+            logger.warning(f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}/{job['max_attempts']}: {e}")
+            self.db.fail_job(job["id"], self.worker_id, str(e))
+            return False
+
+    def run(self, once: bool = False, max_jobs: int = None) -> int:
+        """
+        循环领取并执行任务
+
+        Args:
+            once: 队列为空时立即退出（协调者内联执行时使用）
+            max_jobs: 最多执行的任务数
+
+        Returns:
+            执行的任务数
+        """
+        logger.info(f"Worker {self.worker_id} started")
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            jobs = self.db.claim_jobs(self.worker_id, limit=1, visibility_timeout=self.visibility_timeout)
+            if not jobs:
+                if once:
+                    break
+                # 空闲时检查 .env 是否修改（下一个任务使用新配置）
+                self.config.reload_if_changed()
+                time.sleep(self.poll_interval)
+                continue
+
+            for job in jobs:
+                self.run_job(job)
+                processed += 1
+
+        logger.info(f"Worker {self.worker_id} stopped after {processed} jobs")
+        return processed
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {number}")
+    return number
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """解析命令行参数（argv 默认 sys.argv[1:]），参数错误时打印用法并以状态码 2 退出"""
+    parser = argparse.ArgumentParser(description="从 Postgres 任务队列领取并执行抓取/摘要任务")
+    parser.add_argument("--once", action="store_true", help="队列为空时立即退出")
+    parser.add_argument("--max-jobs", type=_positive_int, default=None, help="最多执行的任务数")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    """Main entry point"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+    worker = QueueWorker()
+    metrics_port = worker.config.get_metrics_port()
+    if metrics_port:
+        metrics.start_http_server(metrics_port)
+    worker.run(once=args.once, max_jobs=args.max_jobs)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by user")
@@ -0,0 +1 @@
+# 基准测试（本地替身服务，不访问外部网络）
@@ -0,0 +1,712 @@
+"""
+基准测试用的本地替身
+- FakeReddit: 回放 Reddit 列表 JSON（录制的或合成的），模拟 PRAW 接口（评论树和 /api/morechildren 走 reddit.request）
+- FakeRedditServer: 同样的数据通过本地 HTTP 服务提供，经过真实的 PRAW 请求路径
+- FakeOpenAIServer: OpenAI 兼容的 /chat/completions 服务，可配置延迟和错误注入
+- SMTPSink: 只接收不投递的本地 SMTP 服务
+- disposable_postgres: 临时 PostgreSQL（BENCH_DATABASE_URL / pgserver / 本机 initdb）
+"""
+
+import os
+import json
+import time
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import socketserver
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "ai model release open source rust python linux kernel space nasa mars rover climate study "
+    "researchers found new record game update patch court ruling election vote market stocks "
+    "chip gpu launch security breach privacy law startup funding quantum physics vaccine trial"
+).split()
+
+
+def _base36(n: int) -> str:
+    chars = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = chars[r] + out
+        if n == 0:
+            return out
+
+
+def synthetic_listing(subreddit: str, size: int, seed: int = 0, duplicate_rate: float = 0.05) -> List[Dict]:
+    """
+    生成与 Reddit 列表接口 children[].data 结构一致的帖子数据
+
+    Args:
+        subreddit: subreddit名称
+        size: 帖子数量
+        seed: 随机种子（同样的参数生成同样的数据）
+        duplicate_rate: 与其他 subreddit 共享链接的帖子比例（转帖）
+    """
+    rng = random.Random(f"{subreddit}:{seed}")
+    # 订阅人数单独生成，不影响其他字段的随机序列
+    subscribers = random.Random(subreddit).randrange(10_000, 40_000_000)
+    now = time.time()
+    posts = []
+    for i in range(size):
+        post_id = _base36(rng.randrange(36**5, 36**6))
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 14))).capitalize()
+        shared = rng.random() < duplicate_rate
+        url = f"https://news.example.com/story/{rng.randrange(50) if shared else post_id}"
+        posts.append(
+            {
+                "id": post_id,
+                "name": f"t3_{post_id}",
+                "title": title,
+                "author": f"user_{rng.randrange(10000)}",
+                "url": url,
+                "permalink": f"/r/{subreddit}/comments/{post_id}/",
+                "subreddit": subreddit,
+                "score": int(rng.lognormvariate(6, 1.5)),
+                "num_comments": int(rng.lognormvariate(4, 1.2)),
+                "created_utc": now - rng.uniform(0, 20 * 3600),
+                "selftext": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 80))),
+                "is_video": rng.random() < 0.05,
+                "over_18": rng.random() < 0.02,
+                "subreddit_subscribers": subscribers,
+            }
+        )
+    return posts
+
+
+def load_recorded_listings(directory: str, rebase_time: bool = True) -> Dict[str, List[Dict]]:
+    """
+    读取录制的列表 JSON（如 https://www.reddit.com/r/python/hot.json?limit=100 保存为 python.json）
+
+    Args:
+        directory: 目录，每个 subreddit 一个 {name}.json 文件
+        rebase_time: 把最新帖子的时间平移到当前时间，避免被 24 小时窗口过滤掉
+    """
+    listings = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        posts = [child["data"] for child in payload["data"]["children"] if child.get("kind") == "t3"]
+        if rebase_time and posts:
+            shift = time.time() - max(post["created_utc"] for post in posts)
+            for post in posts:
+                post["created_utc"] += shift
+        listings[filename[:-5]] = posts
+    return listings
+
+
+def _fake_comments(post: Dict, count: int) -> List[Dict]:
+    """按帖子ID生成固定的评论（与 FakeSubmission.comments 相同的数据）"""
+    rng = random.Random(post["id"])
+    return [
+        {
+            "author": f"commenter_{rng.randrange(1000)}",
+            "body": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))),
+            "score": rng.randrange(1, 5000),
+            "created_utc": post["created_utc"] + rng.uniform(0, 3600),
+        }
+        for _ in range(count)
+    ]
+
+
+def _thing(kind: str, data: Dict) -> Dict:
+    return {"kind": kind, "data": {**data, "name": f"{kind}_{data['id']}"}}
+
+
+def _listing(children: List[Dict], after: Optional[str] = None) -> Dict:
+    return {"kind": "Listing", "data": {"after": after, "before": None, "dist": len(children), "children": children}}
+
+
+def _comment_things(post: Dict, index: int, comment: Dict, depth: int, replies: int, nested: bool) -> List[Dict]:
+    """第 index 条顶层评论；depth > 1 时带 replies 条回复（nested 时放在 replies 字段中，否则与评论平铺）"""
+    post_id = post["id"]
+    comment_id = f"{post_id}c{index}"
+    reply_things = []
+    if depth > 1:
+        reply_things = [
+            _thing(
+                "t1",
+                {
+                    **reply,
+                    "id": f"{comment_id}r{number}",
+                    "parent_id": f"t1_{comment_id}",
+                    "link_id": f"t3_{post_id}",
+                    "depth": 1,
+                    "replies": "",
+                },
+            )
+            for number, reply in enumerate(_fake_comments({"id": comment_id, "created_utc": comment["created_utc"]}, replies))
+        ]
+    data = {**comment, "id": comment_id, "parent_id": f"t3_{post_id}", "link_id": f"t3_{post_id}", "depth": 0}
+    if nested:
+        return [_thing("t1", {**data, "replies": _listing(reply_things) if reply_things else ""})]
+    return [_thing("t1", {**data, "replies": ""})] + reply_things
+
+
+def comment_tree(post: Dict, count: int, limit: int = 200, depth: int = 10, replies: int = 2) -> List[Dict]:
+    """
+    /comments/{id} 的响应：[帖子, 评论]；前 limit 条顶层评论（depth > 1 时每条带 replies 条回复），
+    其余顶层评论的ID放进一个 "more" 占位
+
+    Args:
+        post: 帖子 data 字典
+        count: 帖子的顶层评论总数
+    """
+    post_id = post["id"]
+    comments = _fake_comments(post, min(count, limit))
+    children = [
+        thing
+        for index, comment in enumerate(comments)
+        for thing in _comment_things(post, index, comment, depth, replies, True)
+    ]
+    if count > limit:
+        rest = [f"{post_id}c{index}" for index in range(limit, count)]
+        children.append(
+            {
+                "kind": "more",
+                "data": {
+                    "id": rest[0],
+                    "name": f"t1_{rest[0]}",
+                    "parent_id": f"t3_{post_id}",
+                    "depth": 0,
+                    "count": len(rest),
+                    "children": rest,
+                },
+            }
+        )
+    return [_listing([_thing("t3", post)]), _listing(children)]
+
+
+def more_children(post: Dict, count: int, children: List[str], depth: int = 10, replies: int = 2) -> Dict:
+    """/api/morechildren 的响应：children 中的顶层评论按顺序平铺返回（depth > 1 时带回复）"""
+    prefix = f"{post['id']}c"
+    indexes = [int(child[len(prefix) :]) for child in children if child.startswith(prefix) and child[len(prefix) :].isdigit()]
+    comments = _fake_comments(post, count)
+    things = [
+        thing
+        for index in indexes
+        if index < count
+        for thing in _comment_things(post, index, comments[index], depth, replies, False)
+    ]
+    return {"json": {"errors": [], "data": {"things": things}}}
+
+
+class FakeSubmission:
+    """模拟 praw.models.Submission（列表中的帖子）"""
+
+    def __init__(self, reddit: "FakeReddit", data: Dict):
+        self._reddit = reddit
+        self.__dict__.update({key: value for key, value in data.items() if key != "subreddit"})
+
+    @property
+    def fullname(self) -> str:
+        return f"t3_{self.id}"
+
+
+class FakeSubreddit:
+    def __init__(self, reddit: "FakeReddit", name: str):
+        self._reddit = reddit
+        self.display_name = name
+
+    def _listing(self, limit: int, params: Dict = None):
+        posts = self._reddit.listings.get(self.display_name, [])
+        after = (params or {}).get("after")
+        if after:
+            # 从 after 指向的帖子之后继续（与 Reddit 列表的 after 游标一致）
+            ids = [post["id"] for post in posts]
+            posts = posts[ids.index(after.removeprefix("t3_")) + 1 :] if after.removeprefix("t3_") in ids else []
+        posts = posts[:limit]
+        for start in range(0, len(posts), 100):
+            # 每页 100 条一次请求
+            self._reddit._request(self._reddit.listing_latency)
+            for data in posts[start : start + 100]:
+                yield FakeSubmission(self._reddit, data)
+
+    def hot(self, limit: int = 100, params: Dict = None, **kwargs):
+        return self._listing(limit, params)
+
+    def top(self, time_filter: str = "day", limit: int = 100, params: Dict = None, **kwargs):
+        return self._listing(limit, params)
+
+    def new(self, limit: int = 100, params: Dict = None, **kwargs):
+        return self._listing(limit, params)
+
+    def rising(self, limit: int = 100, params: Dict = None, **kwargs):
+        return self._listing(limit, params)
+
+    def controversial(self, time_filter: str = "day", limit: int = 100, params: Dict = None, **kwargs):
+        return self._listing(limit, params)
+
+
+class _FakeAuth:
+    def __init__(self, reddit: "FakeReddit"):
+        self._reddit = reddit
+
+    @property
+    def limits(self) -> Dict:
+        return {"remaining": max(0, 1000 - self._reddit.request_count), "reset_timestamp": time.time() + 600, "used": 0}
+
+
+class _FakeUser:
+    def me(self):
+        return "benchmark_user"
+
+
+class FakeReddit:
+    """
+    模拟 praw.Reddit 中 RedditScraper 用到的接口
+
+    Args:
+        listings: {subreddit: [帖子 data 字典]}
+        listing_latency: 每个列表页请求的延迟（秒）
+        comment_latency: 每次评论树或 /api/morechildren 请求的延迟（秒）
+        comments_per_post: 每个帖子的顶层评论数
+    """
+
+    def __init__(
+        self,
+        listings: Dict[str, List[Dict]],
+        listing_latency: float = 0.0,
+        comment_latency: float = 0.0,
+        comments_per_post: int = 8,
+    ):
+        self.listings = listings
+        self.listing_latency = listing_latency
+        self.comment_latency = comment_latency
+        self.comments_per_post = comments_per_post
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._by_id = {post["id"]: post for posts in listings.values() for post in posts}
+        self.auth = _FakeAuth(self)
+        self.user = _FakeUser()
+
+    def _request(self, latency: float):
+        with self._lock:
+            self.request_count += 1
+        if latency:
+            time.sleep(latency)
+
+    def subreddit(self, name: str) -> FakeSubreddit:
+        return FakeSubreddit(self, name)
+
+    def submission(self, id: str) -> FakeSubmission:
+        return FakeSubmission(self, self._by_id[id])
+
+    def request(self, method: str, path: str, params: Dict = None, data: Dict = None, **kwargs):
+        """reddit.request：评论树（comments/{id}，支持 limit / depth）和 api/morechildren"""
+        params, data = params or {}, data or {}
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] == ["comments"] and len(parts) >= 2 and parts[1] in self._by_id:
+            self._request(self.comment_latency)
+            return comment_tree(
+                self._by_id[parts[1]], self.comments_per_post, int(params.get("limit", 200)), int(params.get("depth", 10))
+            )
+        if parts == ["api", "morechildren"]:
+            self._request(self.comment_latency)
+            post = self._by_id[data["link_id"].removeprefix("t3_")]
+            return more_children(post, self.comments_per_post, data["children"].split(","), int(data.get("depth", 10)))
+        raise ValueError(f"FakeReddit does not serve {method} {path}")
+
+    def info(self, fullnames: List[str]):
+        """/api/info：每 100 个 fullname 一次请求，查不到的帖子不返回"""
+        fullnames = list(fullnames)
+        for start in range(0, len(fullnames), 100):
+            self._request(self.listing_latency)
+            for fullname in fullnames[start : start + 100]:
+                data = self._by_id.get(fullname.removeprefix("t3_"))
+                if data is not None:
+                    yield FakeSubmission(self, data)
+
+
+FAKE_RATELIMIT_QUOTA = 100_000
+
+
+class FakeRedditServer:
+    """
+    Reddit OAuth API 的本地 HTTP 替身（access token、列表、评论、/api/info），请求经过真实的 PRAW / prawcore 路径，
+    用于录制和回放（scraper/cassette.py）；praw.Reddit 需要传入 praw_overrides() 中的地址（只读模式）
+
+    Args:
+        listings: {subreddit: [帖子 data 字典]}
+        latency: 每个请求的延迟（秒）
+        comments_per_post: 每个帖子的顶层评论数
+    """
+
+    def __init__(self, listings: Dict[str, List[Dict]], latency: float = 0.0, comments_per_post: int = 8):
+        self.listings = listings
+        self.latency = latency
+        self.comments_per_post = comments_per_post
+        self.request_count = 0
+        self.started_at = time.time()
+        self._by_id = {post["id"]: post for posts in listings.values() for post in posts}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def praw_overrides(self) -> Dict[str, str]:
+        """praw.Reddit 的配置覆盖：OAuth 和 token 请求都发往本地服务"""
+        return {"oauth_url": self.url, "reddit_url": self.url}
+
+    def _listing_page(self, subreddit: str, query: Dict) -> Dict:
+        posts = self.listings.get(subreddit, [])
+        after = query.get("after", [""])[0]
+        if after:
+            ids = [post["id"] for post in posts]
+            posts = posts[ids.index(after.removeprefix("t3_")) + 1 :] if after.removeprefix("t3_") in ids else []
+        limit = int(query.get("limit", ["25"])[0])
+        page = posts[:limit]
+        next_after = f"t3_{page[-1]['id']}" if len(posts) > limit and page else None
+        return _listing([_thing("t3", post) for post in page], next_after)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _count(self) -> int:
+                with fake._lock:
+                    fake.request_count += 1
+                    used = fake.request_count
+                if fake.latency:
+                    time.sleep(fake.latency)
+                return used
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+                parts = [part for part in urlparse(self.path).path.split("/") if part]
+                if parts != ["api", "morechildren"]:
+                    self._reply(200, {"access_token": "fake", "token_type": "bearer", "expires_in": 86400, "scope": "*"})
+                    return
+                used = self._count()
+                post = fake._by_id.get(form.get("link_id", [""])[0].removeprefix("t3_"))
+                if post is None:
+                    self._reply(404, {"message": "Not Found", "error": 404}, used)
+                    return
+                children = form.get("children", [""])[0].split(",")
+                depth = int(form.get("depth", ["10"])[0])
+                self._reply(200, more_children(post, fake.comments_per_post, children, depth), used)
+
+            def do_GET(self):
+                used = self._count()
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                parts = [part for part in parsed.path.split("/") if part]
+                if len(parts) == 3 and parts[0] == "r":
+                    self._reply(200, fake._listing_page(parts[1], query), used)
+                elif len(parts) >= 2 and parts[0] == "comments" and parts[1] in fake._by_id:
+                    limit, depth = int(query.get("limit", ["200"])[0]), int(query.get("depth", ["10"])[0])
+                    self._reply(200, comment_tree(fake._by_id[parts[1]], fake.comments_per_post, limit, depth), used)
+                elif parts[:2] == ["api", "info"]:
+                    ids = [item.removeprefix("t3_") for item in query.get("id", [""])[0].split(",") if item]
+                    children = [_thing("t3", fake._by_id[post_id]) for post_id in ids if post_id in fake._by_id]
+                    self._reply(200, _listing(children), used)
+                else:
+                    self._reply(404, {"message": "Not Found", "error": 404}, used)
+
+            def _reply(self, status: int, payload, used: int = 0):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                if used:
+                    self.send_header("x-ratelimit-used", str(used))
+                    # 配额足够大，PRAW 和令牌桶都不会因为替身的响应头而等待
+                    self.send_header("x-ratelimit-remaining", str(max(0, FAKE_RATELIMIT_QUOTA - used)))
+                    self.send_header("x-ratelimit-reset", str(max(1, 600 - int(time.time() - fake.started_at))))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeRedditServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeOpenAIServer:
+    """
+    OpenAI 兼容的本地服务
+
+    Args:
+        latency: 每个请求的延迟（秒）
+        error_rate: 返回错误的概率
+        error_status: 注入错误时的 HTTP 状态码
+        seed: 随机种子
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, error_status: int = 500, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.request_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.request_count += 1
+                    fail = fake._rng.random() < fake.error_rate
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if not self.path.endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": "not found"}})
+                elif fail:
+                    self._reply(fake.error_status, {"error": {"message": "injected failure"}})
+                else:
+                    prompt = body.get("messages", [{}])[-1].get("content", "")
+                    content = "这是一条用于基准测试的模拟摘要，内容长度与真实响应相近。"
+                    self._reply(
+                        200,
+                        {
+                            "id": f"chatcmpl-{fake.request_count}",
+                            "object": "chat.completion",
+                            "model": body.get("model", "fake"),
+                            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                            "usage": {
+                                "prompt_tokens": len(prompt) // 2,
+                                "completion_tokens": len(content),
+                                "total_tokens": len(prompt) // 2 + len(content),
+                            },
+                        },
+                    )
+
+            def _reply(self, status: int, payload: Dict):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class SMTPSink:
+    """只接收邮件、不投递的本地 SMTP 服务（无 TLS、无认证）"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages: List[bytes] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _send(self, line: str):
+                self.wfile.write((line + "\r\n").encode("ascii"))
+
+            def handle(self):
+                self._send("220 localhost SMTPSink")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode("ascii", "replace").strip().upper()
+                    if command.startswith("EHLO"):
+                        self._send("250-localhost")
+                        self._send("250 8BITMIME")
+                    elif command.startswith("HELO"):
+                        self._send("250 localhost")
+                    elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                        self._send("250 OK")
+                    elif command == "DATA":
+                        self._send("354 End data with <CR><LF>.<CR><LF>")
+                        chunks = []
+                        while True:
+                            data_line = self.rfile.readline()
+                            if not data_line or data_line in (b".\r\n", b".\n"):
+                                break
+                            chunks.append(data_line)
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        with sink._lock:
+                            sink.messages.append(b"".join(chunks))
+                        self._send("250 OK: queued")
+                    elif command == "QUIT":
+                        self._send("221 Bye")
+                        return
+                    else:
+                        self._send("502 Command not implemented")
+
+        return Handler
+
+    def start(self) -> "SMTPSink":
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def disposable_postgres():
+    """
+    提供一个临时 PostgreSQL，返回 DB_* 环境变量；都不可用时返回 None
+
+    依次尝试：BENCH_DATABASE_URL（已有的测试库） -> pgserver 包 -> PATH 中的 initdb/pg_ctl
+    """
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        # 拆成 DB_* 变量：DATABASE_URL 会强制 sslmode=require，本地测试库通常不开 SSL
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        yield {
+            "DB_HOST": query.get("host", [parsed.hostname or "localhost"])[0],
+            "DB_PORT": str(parsed.port or 5432),
+            "DB_NAME": parsed.path[1:] or "postgres",
+            "DB_USER": parsed.username or "postgres",
+            "DB_PASSWORD": parsed.password or "",
+            "DB_SSLMODE": query.get("sslmode", ["prefer"])[0],
+        }
+        return
+
+    try:
+        import pgserver
+    except ImportError:
+        pgserver = None
+
+    if pgserver is not None:
+        data_dir = tempfile.mkdtemp(prefix="bench-pg-")
+        server = pgserver.get_server(data_dir, cleanup_mode="delete")
+        try:
+            yield {
+                "DB_HOST": data_dir,
+                "DB_PORT": "5432",
+                "DB_NAME": "postgres",
+                "DB_USER": "postgres",
+                "DB_PASSWORD": "postgres",
+                "DB_SSLMODE": "disable",
+            }
+        finally:
+            server.cleanup()
+        return
+
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not (initdb and pg_ctl):
+        yield None
+        return
+
+    data_dir = tempfile.mkdtemp(prefix="bench-pg-")
+    port = _free_port()
+    subprocess.run([initdb, "-D", data_dir, "-U", "postgres", "-A", "trust"], check=True, capture_output=True)
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-w", "-o", f"-k {data_dir} -p {port} -c listen_addresses=''", "start"],
+        check=True,
+        capture_output=True,
+    )
+    try:
+        yield {
+            "DB_HOST": data_dir,
+            "DB_PORT": str(port),
+            "DB_NAME": "postgres",
+            "DB_USER": "postgres",
+            "DB_PASSWORD": "postgres",
+            "DB_SSLMODE": "disable",
+        }
+    finally:
+        subprocess.run([pg_ctl, "-D", data_dir, "-w", "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def service_env(openai: Optional[FakeOpenAIServer], smtp: Optional[SMTPSink], db_env: Optional[Dict]) -> Dict[str, str]:
+    """把替身服务的地址转换为 scraper 使用的环境变量"""
+    env = {
+        "REDDIT_CLIENT_ID": "bench",
+        "REDDIT_CLIENT_SECRET": "bench",
+        "REDDIT_USERNAME": "bench",
+        "REDDIT_PASSWORD": "bench",
+        "EMAIL_RECIPIENTS": "reader1@example.com,reader2@example.com",
+        "SMTP_FROM_EMAIL": "bench@example.com",
+        "SMTP_USERNAME": "",
+        "SMTP_PASSWORD": "",
+        "SMTP_USE_TLS": "false",
+        "SMTP_USE_SSL": "false",
+        "OPENAI_API_KEY": "bench",
+        "CHATGPT_API_KEY": "bench",
+    }
+    if openai is not None:
+        env["OPENAI_API_BASE"] = openai.api_base
+    if smtp is not None:
+        env["SMTP_SERVER"] = "127.0.0.1"
+        env["SMTP_PORT"] = str(smtp.port)
+    if db_env:
+        env.update(db_env)
+    return env
@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+"""
+基准测试运行脚本
+在本地替身服务（Reddit / OpenAI / SMTP / PostgreSQL）上测量端到端任务和各组件热点路径的耗时，
+结果以 JSON 输出，便于在不同提交之间对比。
+
+用法：
+    python -m tests.benchmarks.run_benchmarks --sizes 25,100,500 --output bench.json
+    python -m tests.benchmarks.run_benchmarks --compare bench-main.json --output bench.json
+    python -m tests.benchmarks.run_benchmarks --only e2e.run_scraper_job --openai-latency 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import logging
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+from tests.benchmarks.fakes import (  # noqa: E402
+    FakeReddit,
+    FakeOpenAIServer,
+    SMTPSink,
+    disposable_postgres,
+    load_recorded_listings,
+    service_env,
+    synthetic_listing,
+)
+
+DEFAULT_SUBREDDITS = ["python", "technology", "science", "worldnews", "programming"]
+
+
+class BenchContext:
+    """一次基准运行共享的替身服务和参数"""
+
+    def __init__(self, args, openai: FakeOpenAIServer, smtp: SMTPSink, db_env: Optional[Dict]):
+        self.args = args
+        self.openai = openai
+        self.smtp = smtp
+        self.db_env = db_env
+        self.recorded = load_recorded_listings(args.listings) if args.listings else None
+
+    @property
+    def has_db(self) -> bool:
+        return self.db_env is not None
+
+    def listings(self, size: int) -> Dict[str, List[Dict]]:
+        """每个 subreddit size 条帖子；有录制数据时循环回放录制数据"""
+        if self.recorded:
+            listings = {}
+            for name, posts in self.recorded.items():
+                # 录制数据不够 size 条时循环使用，并给重复的帖子换一个ID
+                listings[name] = [
+                    dict(posts[i % len(posts)], id=f"{posts[i % len(posts)]['id']}{i // len(posts) or ''}")
+                    for i in range(size)
+                ]
+            return listings
+        return {name: synthetic_listing(name, size, seed=self.args.seed) for name in DEFAULT_SUBREDDITS}
+
+    def fake_reddit(self, size: int) -> FakeReddit:
+        return FakeReddit(
+            self.listings(size),
+            listing_latency=self.args.reddit_latency,
+            comment_latency=self.args.reddit_latency,
+        )
+
+    def configure(self, size: int, listings: Dict[str, List[Dict]]):
+        """设置 scraper 读取的环境变量"""
+        os.environ.update(service_env(self.openai, self.smtp, self.db_env))
+        os.environ.update(
+            {
+                "TARGET_SUBREDDITS": ",".join(listings),
+                "POSTS_LIMIT": str(size),
+                "NEWSLETTER_POSTS_LIMIT": str(self.args.newsletter_limit),
+                "ENABLE_GPT_SUMMARIES": "true",
+                "ENABLE_EDITOR_SUMMARY": "true",
+                "INCLUDE_NSFW": "false",
+            }
+        )
+        # 配置在进程内只解析一次，修改环境变量后需要显式重新加载
+        from scraper.settings import get_store
+
+        get_store().load()
+
+    def patch_reddit(self, fake: FakeReddit):
+        return mock.patch("praw.Reddit", return_value=fake)
+
+
+# ==================== 基准用例 ====================
+# 每个用例返回 (reset, run)：reset 在每次计时前调用（不计时），run 被计时并可返回附加信息
+
+
+def _peak_kb(func: Callable) -> int:
+    """调用一次 func，返回期间 Python 分配内存的峰值（KB，tracemalloc；不计入计时）"""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_collect_candidates(ctx: BenchContext, size: int):
+    """抓取并合并所有 subreddit 的候选帖子（列表解析、去重、排序）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.reddit_scraper import RedditScraper
+
+    fake = ctx.fake_reddit(size)
+    ctx.configure(size, fake.listings)
+    with ctx.patch_reddit(fake):
+        scraper = RedditScraper(ConfigManager())
+    peak_kb = _peak_kb(lambda: scraper.select_posts(scraper.collect_candidates(limit=size)))
+
+    def run():
+        candidates = scraper.collect_candidates(limit=size)
+        return {"candidates": len(candidates), "peak_kb": peak_kb}
+
+    return None, run
+
+
+def bench_stream_candidates(ctx: BenchContext, size: int):
+    """流式收集候选（scraper/pipeline.py）：逐批排序进入有界候选池后选择，与 reddit.collect_candidates 对比峰值内存"""
+    from scraper.config_manager import ConfigManager
+    from scraper.pipeline import StreamingPipeline
+    from scraper.reddit_scraper import RedditScraper
+
+    fake = ctx.fake_reddit(size)
+    ctx.configure(size, fake.listings)
+    with ctx.patch_reddit(fake):
+        scraper = RedditScraper(ConfigManager())
+
+    def stream():
+        with StreamingPipeline(scraper) as pipeline:
+            candidates, scores = pipeline.candidates(scraper.iter_listing_batches(limit=size))
+            scraper.select_posts(candidates, scores=scores)
+        return pipeline, candidates
+
+    peak_kb = _peak_kb(stream)
+
+    def run():
+        pipeline, candidates = stream()
+        return {"fetched": pipeline.fetched, "candidates": len(candidates), "peak_kb": peak_kb}
+
+    return None, run
+
+
+def bench_collect_incremental(ctx: BenchContext, size: int):
+    """暂存模式的增量抓取：上一轮已写入列表游标，本轮遇到已知帖子即停止翻页"""
+    from scraper.config_manager import ConfigManager
+    from scraper.database_manager import DatabaseManager
+    from scraper.reddit_scraper import RedditScraper
+
+    # 每个 subreddit 抓取 4 页，增量抓取只需要第一页
+    limit = size * 4
+    listings = {name: synthetic_listing(name, limit, seed=ctx.args.seed) for name in DEFAULT_SUBREDDITS}
+    fake = FakeReddit(listings, listing_latency=ctx.args.reddit_latency)
+    ctx.configure(limit, listings)
+    db = DatabaseManager()
+    with ctx.patch_reddit(fake):
+        scraper = RedditScraper(ConfigManager())
+
+    def reset():
+        db.clear_all_history()
+        scraper.collect_candidates(db=db)
+        fake.request_count = 0
+
+    def run():
+        candidates = scraper.collect_candidates(db=db)
+        return {"candidates": len(candidates), "reddit_requests": fake.request_count}
+
+    return reset, run
+
+
+def bench_enrich_posts(ctx: BenchContext, size: int):
+    """为帖子获取评论并生成 GPT 摘要（每个帖子两次 OpenAI 请求）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.reddit_scraper import RedditScraper
+
+    fake = ctx.fake_reddit(size)
+    ctx.configure(size, fake.listings)
+    with ctx.patch_reddit(fake):
+        scraper = RedditScraper(ConfigManager())
+    candidates = scraper.collect_candidates(limit=size)[: min(size, ctx.args.enrich_cap)]
+    state = {}
+
+    def reset():
+        state["posts"] = [dict(post) for post in candidates]
+        state["openai_requests"] = ctx.openai.request_count
+
+    def run():
+        scraper.enrich_posts(state["posts"])
+        return {"posts": len(state["posts"]), "openai_requests": ctx.openai.request_count - state["openai_requests"]}
+
+    return reset, run
+
+
+def bench_render_newsletter(ctx: BenchContext, size: int):
+    """渲染 HTML 和纯文本 Newsletter"""
+    from scraper.config_manager import ConfigManager
+    from scraper.newsletter_sender import NewsletterSender
+
+    posts = _enriched_posts(ctx, size)
+    sender = NewsletterSender(ConfigManager())
+
+    def run():
+        html = sender._generate_newsletter_html(posts, "editor words")
+        text = sender._generate_newsletter_text(posts, "editor words")
+        return {"bytes": len(html.encode("utf-8")) + len(text.encode("utf-8"))}
+
+    return None, run
+
+
+def bench_send_newsletter(ctx: BenchContext, size: int):
+    """生成并通过 SMTP 发送 Newsletter（含编辑寄语的 OpenAI 请求）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.newsletter_sender import NewsletterSender
+
+    posts = _enriched_posts(ctx, size)
+    sender = NewsletterSender(ConfigManager())
+
+    def run():
+        success, _ = sender.send_newsletter(posts)
+        if not success:
+            raise RuntimeError("send_newsletter failed")
+        return {"message_bytes": len(ctx.smtp.messages[-1])}
+
+    return None, run
+
+
+def bench_build_digests(ctx: BenchContext, size: int):
+    """为 size 个订阅者（每人订阅两个 subreddit）组装 Newsletter：每个 subreddit 抓取一次，入选帖子补充一次"""
+    from scraper.config_manager import ConfigManager
+    from scraper.reddit_scraper import RedditScraper
+    from scraper.digest import DigestBuilder
+
+    fake = ctx.fake_reddit(size)
+    ctx.configure(size, fake.listings)
+    with ctx.patch_reddit(fake):
+        scraper = RedditScraper(ConfigManager())
+    builder = DigestBuilder(scraper.config, scraper)
+    names = sorted(fake.listings)
+    index = {name: [] for name in names}
+    for i in range(size):
+        for name in (names[i % len(names)], names[(i * 7 + 1) % len(names)]):
+            index[name].append(f"subscriber{i}@example.com")
+    state = {}
+
+    def reset():
+        fake.request_count = 0
+        state["openai_requests"] = ctx.openai.request_count
+
+    def run():
+        digests = builder.build(index)
+        return {
+            "digests": len(digests),
+            "reddit_requests": fake.request_count,
+            "openai_requests": ctx.openai.request_count - state["openai_requests"],
+        }
+
+    return reset, run
+
+
+def bench_rank_candidates(ctx: BenchContext, size: int):
+    """为 size x 100 条候选帖子计算排序分数并选出前 NEWSLETTER_POSTS_LIMIT 条（扩大候选池的开销）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.ranking import Ranker
+
+    listings = {name: synthetic_listing(name, size * 20, seed=ctx.args.seed) for name in DEFAULT_SUBREDDITS}
+    ctx.configure(size, listings)
+    ranker = Ranker(ConfigManager())
+    candidates = [post for posts in listings.values() for post in posts]
+
+    def run():
+        selected = ranker.top_k(candidates, ctx.args.newsletter_limit)
+        return {"candidates": len(candidates), "selected": len(selected)}
+
+    return None, run
+
+
+def bench_select_posts(ctx: BenchContext, size: int):
+    """从 size x 100 条候选中做多样性选择（排序、截取候选池、标题草图、MMR）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.selection import DiversitySelector
+
+    listings = {name: synthetic_listing(name, size * 20, seed=ctx.args.seed) for name in DEFAULT_SUBREDDITS}
+    ctx.configure(size, listings)
+    selector = DiversitySelector(ConfigManager())
+    candidates = [post for posts in listings.values() for post in posts]
+
+    def run():
+        selected = selector.select(candidates, ctx.args.newsletter_limit)
+        return {"candidates": len(candidates), "subreddits": len({post["subreddit"] for post in selected})}
+
+    return None, run
+
+
+def bench_remove_duplicates(ctx: BenchContext, size: int):
+    """为 size x 100 条候选帖子排序并去掉重复链接和相似标题（URL 规范化、MinHash LSH 分桶）"""
+    from scraper.config_manager import ConfigManager
+    from scraper.dedupe import rank_unique
+
+    listings = {name: synthetic_listing(name, size * 20, seed=ctx.args.seed) for name in DEFAULT_SUBREDDITS}
+    ctx.configure(size, listings)
+    config = ConfigManager()
+    candidates = [post for posts in listings.values() for post in posts]
+
+    def run():
+        unique, _ = rank_unique(candidates, config)
+        return {"candidates": len(candidates), "unique": len(unique)}
+
+    return None, run
+
+
+def bench_filter_new_posts(ctx: BenchContext, size: int):
+    """在一半候选帖子已发送过的情况下过滤新帖子"""
+    from scraper.database_manager import DatabaseManager
+
+    posts = _enriched_posts(ctx, size)
+    db = DatabaseManager()
+    db.clear_all_history()
+    db.mark_posts_as_sent(posts[::2])
+
+    def run():
+        return {"new_posts": len(db.filter_new_posts(posts))}
+
+    return None, run
+
+
+def bench_mark_posts_as_sent(ctx: BenchContext, size: int):
+    """记录已发送的帖子"""
+    from scraper.database_manager import DatabaseManager
+
+    posts = _enriched_posts(ctx, size)
+    db = DatabaseManager()
+
+    def run():
+        if not db.mark_posts_as_sent(posts):
+            raise RuntimeError("mark_posts_as_sent failed")
+
+    return db.clear_all_history, run
+
+
+def bench_upsert_candidates(ctx: BenchContext, size: int):
+    """写入暂存区候选帖子"""
+    from scraper.database_manager import DatabaseManager
+
+    posts = _enriched_posts(ctx, size)
+    db = DatabaseManager()
+
+    def run():
+        return {"rows": db.upsert_candidates(posts)}
+
+    return db.clear_all_history, run
+
+
+def bench_record_snapshots(ctx: BenchContext, size: int):
+    """记录分数快照并读取趋势窗口（每次抓取一次）"""
+    from scraper.database_manager import DatabaseManager
+
+    posts = _enriched_posts(ctx, size)
+    db = DatabaseManager()
+    post_ids = [post["id"] for post in posts]
+
+    def run():
+        rows = db.record_snapshots(posts)
+        return {"rows": rows, "windows": len(db.get_snapshot_windows(post_ids, 3))}
+
+    return db.clear_all_history, run
+
+
+def bench_update_post_scores(ctx: BenchContext, size: int):
+    """刷新已发送帖子的分数：一条 UPDATE ... FROM (VALUES ...) 更新一批帖子"""
+    from scraper.database_manager import DatabaseManager
+
+    posts = _enriched_posts(ctx, size)
+    db = DatabaseManager()
+    stats = [{"id": post["id"], "score": post["score"] + 100, "num_comments": post["num_comments"] + 5} for post in posts]
+
+    def reset():
+        db.clear_all_history()
+        db.mark_posts_as_sent(posts)
+
+    def run():
+        return {"rows": db.update_post_scores(stats)}
+
+    return reset, run
+
+
+def bench_run_scraper_job(ctx: BenchContext, size: int):
+    """端到端 run_scraper_job：抓取 -> 过滤 -> 补充 -> 渲染 -> 发送 -> 记录"""
+    from scraper.database_manager import DatabaseManager
+    from scraper import run_job
+
+    fake = ctx.fake_reddit(size)
+    ctx.configure(size, fake.listings)
+    db = DatabaseManager()
+    state = {}
+
+    def reset():
+        db.clear_all_history()
+        fake.request_count = 0
+        state["messages"] = len(ctx.smtp.messages)
+        state["openai_requests"] = ctx.openai.request_count
+
+    def run():
+        with ctx.patch_reddit(fake):
+            try:
+                run_job.run_scraper_job()
+            except SystemExit:
+                raise RuntimeError("run_scraper_job failed")
+        if len(ctx.smtp.messages) != state["messages"] + 1:
+            raise RuntimeError("newsletter was not delivered to the SMTP sink")
+        return {
+            "reddit_requests": fake.request_count,
+            "openai_requests": ctx.openai.request_count - state["openai_requests"],
+        }
+
+    return reset, run
+
+
+def _candidate_records(ctx: BenchContext, size: int, as_records: bool):
+    """
+    size x 100 条已补充评论的候选帖子：构造时每条候选的内存占用（tracemalloc，字段值在两种形式间共用，只比较容器），
+    计时部分为序列化成 data_json 再读回
+
+    Args:
+        as_records: True 使用 scraper.models.Post / Comment，False 使用字典
+    """
+    import tracemalloc
+    from scraper.models import Post, json_default
+
+    sources = []
+    for name in DEFAULT_SUBREDDITS:
+        for data in synthetic_listing(name, size * 20, seed=ctx.args.seed):
+            source = {key: data[key] for key in Post.BASE_FIELDS if key in data}
+            source.update(
+                permalink=f"https://reddit.com{data['permalink']}",
+                top_comments=[
+                    {"author": "commenter", "body": data["title"], "score": 10, "created_utc": data["created_utc"]}
+                    for _ in range(5)
+                ],
+                gpt_summary="这是一条用于基准测试的模拟摘要。",
+                comment_summary="这是一条用于基准测试的评论摘要。",
+            )
+            sources.append(source)
+
+    def load(source: Dict):
+        if as_records:
+            return Post.from_dict(source)
+        return dict(source, top_comments=[dict(comment) for comment in source["top_comments"]])
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [load(source) for source in sources]
+    per_candidate = (tracemalloc.get_traced_memory()[0] - before) / len(records)
+    tracemalloc.stop()
+
+    def run():
+        rows = [json.dumps(record, ensure_ascii=False, default=json_default) for record in records]
+        loaded = [load(json.loads(row)) for row in rows]
+        return {"candidates": len(loaded), "bytes_per_candidate": round(per_candidate)}
+
+    return None, run
+
+
+def bench_dict_records(ctx: BenchContext, size: int):
+    """候选帖子以字典保存：内存占用和 data_json 序列化（与 models.post_records 对比）"""
+    return _candidate_records(ctx, size, as_records=False)
+
+
+def bench_post_records(ctx: BenchContext, size: int):
+    """候选帖子以 __slots__ 的 Post / Comment 记录保存：内存占用和 data_json 序列化"""
+    return _candidate_records(ctx, size, as_records=True)
+
+
+def _enriched_posts(ctx: BenchContext, size: int) -> List[Dict]:
+    """构造已补充评论和摘要的帖子（不经过 Reddit / OpenAI，用于下游组件的基准）"""
+    posts = []
+    for name, listing in ctx.listings(size).items():
+        for data in listing:
+            post = {key: data[key] for key in ("id", "title", "author", "url", "score", "num_comments", "created_utc")}
+            post.update(
+                {
+                    "permalink": f"https://reddit.com{data['permalink']}",
+                    "subreddit": name,
+                    "selftext": data["selftext"][:500],
+                    "is_video": data["is_video"],
+                    "over_18": data["over_18"],
+                    "top_comments": [
+                        {"author": "commenter", "body": data["title"], "score": 10, "created_utc": data["created_utc"]}
+                    ]
+                    * 5,
+                    "gpt_summary": "这是一条用于基准测试的模拟摘要。",
+                    "comment_summary": "这是一条用于基准测试的评论摘要。",
+                }
+            )
+            posts.append(post)
+    return posts[:size]
+
+
+BENCHMARKS: Dict[str, Dict] = {
+    "reddit.collect_candidates": {"func": bench_collect_candidates, "db": False},
+    "reddit.stream_candidates": {"func": bench_stream_candidates, "db": False},
+    "reddit.collect_incremental": {"func": bench_collect_incremental, "db": True},
+    "reddit.enrich_posts": {"func": bench_enrich_posts, "db": False},
+    "newsletter.render": {"func": bench_render_newsletter, "db": False},
+    "newsletter.send": {"func": bench_send_newsletter, "db": False},
+    "digest.build": {"func": bench_build_digests, "db": False},
+    "ranking.top_k": {"func": bench_rank_candidates, "db": False},
+    "selection.select": {"func": bench_select_posts, "db": False},
+    "dedupe.rank_unique": {"func": bench_remove_duplicates, "db": False},
+    "models.dict_records": {"func": bench_dict_records, "db": False},
+    "models.post_records": {"func": bench_post_records, "db": False},
+    "db.filter_new_posts": {"func": bench_filter_new_posts, "db": True},
+    "db.mark_posts_as_sent": {"func": bench_mark_posts_as_sent, "db": True},
+    "db.upsert_candidates": {"func": bench_upsert_candidates, "db": True},
+    "db.record_snapshots": {"func": bench_record_snapshots, "db": True},
+    "db.update_post_scores": {"func": bench_update_post_scores, "db": True},
+    "e2e.run_scraper_job": {"func": bench_run_scraper_job, "db": True},
+}
+
+
+# ==================== 运行与输出 ====================
+
+
+def measure(reset: Optional[Callable], run: Callable, repeat: int, warmup: int) -> Dict:
+    """运行 warmup + repeat 次，返回耗时统计（秒）"""
+    timings = []
+    info = None
+    for i in range(warmup + repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        info = run()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+    return {
+        "runs": [round(t, 6) for t in timings],
+        "min": round(min(timings), 6),
+        "median": round(statistics.median(timings), 6),
+        "mean": round(statistics.fmean(timings), 6),
+        "max": round(max(timings), 6),
+        "stdev": round(statistics.stdev(timings), 6) if len(timings) > 1 else 0.0,
+        "info": info or {},
+    }
+
+
+def git_revision() -> Dict:
+    def git(*cmd) -> str:
+        try:
+            return subprocess.run(["git", *cmd], cwd=ROOT_DIR, capture_output=True, text=True, timeout=30).stdout.strip()
+        except Exception:
+            return ""
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_benchmarks(args) -> Dict:
+    """运行选中的基准用例，返回结果字典"""
+    names = [name for name in BENCHMARKS if not args.only or name in args.only]
+    results, skipped = [], []
+
+    with ExitStack() as stack:
+        db_env = None
+        if any(BENCHMARKS[name]["db"] for name in names):
+            db_env = stack.enter_context(disposable_postgres())
+            if db_env is None:
+                print("⚠️ 没有可用的 PostgreSQL（设置 BENCH_DATABASE_URL 或安装 pgserver），跳过数据库相关基准")
+        openai = stack.enter_context(FakeOpenAIServer(latency=args.openai_latency, error_rate=args.openai_error_rate))
+        smtp = stack.enter_context(SMTPSink())
+        ctx = BenchContext(args, openai, smtp, db_env)
+
+        saved_env = dict(os.environ)
+        stack.callback(lambda: (os.environ.clear(), os.environ.update(saved_env)))
+        # 首次 configure 之后 DatabaseManager 等读取到的都是替身服务的地址
+        ctx.configure(args.sizes[0], ctx.listings(1))
+
+        for name in names:
+            spec = BENCHMARKS[name]
+            if spec["db"] and not ctx.has_db:
+                skipped.append({"benchmark": name, "reason": "no PostgreSQL available"})
+                continue
+            for size in args.sizes:
+                print(f"🔍 {name} (size={size}) ...", flush=True)
+                try:
+                    reset, run = spec["func"](ctx, size)
+                    stats = measure(reset, run, args.repeat, args.warmup)
+                except Exception as e:
+                    print(f"❌ {name} (size={size}) 失败: {e}")
+                    skipped.append({"benchmark": name, "size": size, "reason": f"error: {e}"})
+                    continue
+                results.append({"benchmark": name, "size": size, "unit": "seconds", **stats})
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            **git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "listings": args.listings or "synthetic",
+            "reddit_latency": args.reddit_latency,
+            "openai_latency": args.openai_latency,
+            "openai_error_rate": args.openai_error_rate,
+            "database": "postgres" if any(r["benchmark"].startswith(("db.", "e2e.")) for r in results) else "none",
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def print_results(report: Dict):
+    print("\n📊 基准测试结果（秒）")
+    print(f"{'benchmark':<28} {'size':>6} {'median':>10} {'min':>10} {'max':>10}")
+    for result in report["results"]:
+        print(
+            f"{result['benchmark']:<28} {result['size']:>6} {result['median']:>10.4f} "
+            f"{result['min']:>10.4f} {result['max']:>10.4f}"
+        )
+    for item in report["skipped"]:
+        print(f"⚠️ 跳过 {item['benchmark']}: {item['reason']}")
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    与基线结果对比中位数
+
+    Args:
+        report: 本次结果
+        baseline: 基线结果（之前运行保存的 JSON）
+        threshold: 视为回归的相对变慢比例（如 0.2 表示慢 20%）
+
+    Returns:
+        回归的用例列表
+    """
+    base = {(r["benchmark"], r["size"]): r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\n📊 与基线 {baseline.get('meta', {}).get('commit', '')[:10]} 对比（中位数）")
+    for result in report["results"]:
+        old = base.get((result["benchmark"], result["size"]))
+        if old is None or not old["median"]:
+            continue
+        change = result["median"] / old["median"] - 1
+        flag = "❌" if change > threshold else ("✅" if change < -threshold else "  ")
+        print(
+            f"{flag} {result['benchmark']:<28} {result['size']:>6} "
+            f"{old['median']:>10.4f} -> {result['median']:>10.4f}  {change:+.1%}"
+        )
+        if change > threshold:
+            regressions.append({"benchmark": result["benchmark"], "size": result["size"], "change": round(change, 4)})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reddit Newsletter Bot 基准测试")
+    parser.add_argument("--sizes", default="25,100,500", help="每个 subreddit 的帖子数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时次数")
+    parser.add_argument("--warmup", type=int, default=1, help="不计时的预热次数")
+    parser.add_argument("--only", default="", help="只运行这些用例，逗号分隔")
+    parser.add_argument("--output", default="", help="结果 JSON 的输出路径")
+    parser.add_argument("--compare", default="", help="基线结果 JSON，用于对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="对比时视为回归的变慢比例")
+    parser.add_argument("--listings", default="", help="录制的 Reddit 列表 JSON 目录（默认生成合成数据）")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument("--newsletter-limit", type=int, default=10, help="每期 Newsletter 的帖子数")
+    parser.add_argument("--enrich-cap", type=int, default=100, help="reddit.enrich_posts 最多处理的帖子数")
+    parser.add_argument("--reddit-latency", type=float, default=0.0, help="每个 Reddit 请求的模拟延迟（秒）")
+    parser.add_argument("--openai-latency", type=float, default=0.0, help="每个 OpenAI 请求的模拟延迟（秒）")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0, help="OpenAI 请求的错误注入比例")
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.only = [name for name in args.only.split(",") if name]
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    for attr in ("output", "compare", "listings"):
+        if getattr(args, attr):
+            setattr(args, attr, os.path.abspath(getattr(args, attr)))
+    # 模板按相对路径读取，需要在项目根目录运行
+    os.chdir(ROOT_DIR)
+    # 在导入 scraper 模块之前配置根日志：scraper.main 导入时的 basicConfig 不再生效，基准测试不会写入 data/logs
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s", force=True)
+
+    report = run_benchmarks(args)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 个用例变慢超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
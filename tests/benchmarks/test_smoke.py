@@ -0,0 +1,21 @@
+"""基准测试冒烟测试：以最小数据量跑一遍所有用例，确保替身服务和用例本身可用"""
+
+import json
+
+from tests.benchmarks import run_benchmarks
+
+
+def test_benchmarks_smoke(tmp_path):
+    output = tmp_path / "bench.json"
+    exit_code = run_benchmarks.main(["--sizes", "5", "--repeat", "1", "--warmup", "0", "--output", str(output)])
+    assert exit_code == 0
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    errors = [item for item in report["skipped"] if item["reason"].startswith("error")]
+    assert not errors
+    assert {result["benchmark"] for result in report["results"]} >= {
+        "reddit.collect_candidates",
+        "reddit.enrich_posts",
+        "newsletter.render",
+        "newsletter.send",
+    }
@@ -0,0 +1,46 @@
+"""测试 /api/posts：fetch_listing 返回 Post 记录时，缓存未命中和进程内命中都返回 JSON"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api import app as api_app  # noqa: E402
+from scraper.lazy import Lazy  # noqa: E402
+from scraper.listing_cache import ListingCache  # noqa: E402
+from scraper.models import Comment, Post  # noqa: E402
+
+
+def fake_fetch(subreddit, listing, time_filter, limit):
+    post = Post("abc", "A title", "someone", "https://example.com/a", "/r/x/abc", subreddit, 42, 7, 1700000000.0)
+    post["top_comments"] = [Comment("bob", "nice", 3, None)]
+    return [post]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # 不在后台构造 Reddit 客户端和数据库连接
+    monkeypatch.setattr(api_app, "warm_up", lambda: None)
+    monkeypatch.setattr(api_app, "listing_cache", Lazy("listing_cache", lambda: ListingCache(fake_fetch, ttl=60)))
+    with TestClient(api_app.app) as client:
+        yield client
+
+
+def test_get_posts_serializes_records(client):
+    for expected in ("MISS", "HIT"):
+        response = client.get("/api/posts/python?listing=hot")
+        assert response.status_code == 200, response.text
+        assert response.headers["X-Cache"] == expected
+        body = response.json()
+        assert body["count"] == 1
+        assert body["posts"][0]["id"] == "abc"
+        assert body["posts"][0]["subreddit"] == "python"
+        assert body["posts"][0]["top_comments"] == [{"author": "bob", "body": "nice", "score": 3, "created_utc": None}]
+
+    etag = response.headers["ETag"]
+    assert client.get("/api/posts/python?listing=hot", headers={"If-None-Match": etag}).status_code == 304
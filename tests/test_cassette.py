@@ -0,0 +1,118 @@
+"""测试 HTTP 录制和回放（scraper/cassette.py）：通过假的传输层录制，再离线回放"""
+
+import os
+import sys
+import json
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from scraper.cassette import INDEX_FILE, DATA_FILE, Cassette, CassetteMiss, request_key
+
+TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+LISTING_URL = "https://oauth.reddit.com/r/python/hot"
+GPT_URL = "https://api.openai.com/v1/chat/completions"
+CREATED = 1700000000.0
+
+
+class FakeTransport(BaseAdapter):
+    """按顺序返回预设响应的传输层，记录收到的请求"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, body, headers = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK" if status == 200 else "Error"
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response.url = request.url
+        response.request = request
+        response._content = json.dumps(body).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def listing(score):
+    return {
+        "kind": "Listing",
+        "data": {"children": [{"kind": "t3", "data": {"id": "abc", "score": score, "created_utc": CREATED}}]},
+    }
+
+
+def test_access_token_key_excludes_credentials():
+    first = request_key("POST", TOKEN_URL, data={"grant_type": "password", "username": "u", "password": "secret"})
+    second = request_key("POST", TOKEN_URL, data={"grant_type": "password", "username": "u", "password": "other"})
+    assert first == second == f"POST {TOKEN_URL}"
+    assert request_key("GET", LISTING_URL, params={"raw_json": 1, "limit": 2}) == f"GET {LISTING_URL}?limit=2&raw_json=1"
+    assert request_key("POST", GPT_URL, json_body={"b": 1, "a": 2}) == request_key("POST", GPT_URL, json_body={"a": 2, "b": 1})
+
+
+def test_record_and_replay_round_trip(tmp_path):
+    path = str(tmp_path / "cassette")
+    transport = FakeTransport(
+        [
+            (200, {"access_token": "real-token", "expires_in": 3600}, {}),
+            (200, listing(10), {"Content-Type": "application/json", "X-Ratelimit-Remaining": "99"}),
+            (200, listing(12), {"Content-Type": "application/json"}),
+            (500, {"error": "overloaded"}, {"Content-Type": "application/json"}),
+        ]
+    )
+    recorder = Cassette(path, "record")
+    session = recorder.session()
+    session.mount("https://", transport)
+    credentials = {"grant_type": "password", "username": "u", "password": "secret"}
+    assert session.post(TOKEN_URL, data=credentials).json()["access_token"] == "real-token"
+    assert session.get(LISTING_URL, params={"limit": 1}).json() == listing(10)
+    assert session.get(LISTING_URL, params={"limit": 1}).json() == listing(12)
+    assert session.post(GPT_URL, json={"model": "gpt"}).status_code == 500
+    recorder.close()
+    assert len(transport.requests) == 4
+
+    with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+        index = json.load(f)
+    assert f"POST {TOKEN_URL}" in index["entries"]
+    with open(os.path.join(path, DATA_FILE), "rb") as f:
+        data = f.read()
+    offset, length = index["entries"][f"POST {TOKEN_URL}"][0]
+    assert b"real-token" not in zlib.decompress(data[offset : offset + length])
+    assert b"secret" not in data and "secret" not in json.dumps(index)
+
+    # 假装一小时前录制：回放时帖子的 created_utc 平移一小时
+    index["recorded_at"] -= 3600
+    with open(os.path.join(path, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+    player = Cassette(path, "replay", latency_scale=0)
+    replay = player.session()
+    token = replay.post(TOKEN_URL, data={**credentials, "password": "changed"})
+    assert token.json() == {"access_token": "cassette", "expires_in": 3600}
+
+    responses = [replay.get(LISTING_URL, params={"limit": 1}) for _ in range(3)]
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    # 同一个键按录制顺序返回，读完后重复最后一个
+    scores = [response.json()["data"]["children"][0]["data"]["score"] for response in responses]
+    assert scores == [10, 12, 12]
+    shifted = responses[0].json()["data"]["children"][0]["data"]["created_utc"]
+    assert shifted - CREATED == pytest.approx(3600, abs=60)
+    assert "X-Ratelimit-Remaining" not in responses[0].headers
+    assert responses[0].headers["Content-Type"] == "application/json"
+
+    failed = replay.post(GPT_URL, json={"model": "gpt"})
+    assert (failed.status_code, failed.json()) == (500, {"error": "overloaded"})
+
+    with pytest.raises(CassetteMiss):
+        replay.get("https://oauth.reddit.com/r/science/hot")
+    assert player.misses == 1
+    player.close()
+    assert len(transport.requests) == 4
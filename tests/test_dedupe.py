@@ -0,0 +1,70 @@
+"""测试近似重复和转帖检测（scraper/dedupe.py）：链接规范化、LSH 分桶和并查集聚类"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper.dedupe import _UnionFind, canonical_url, cluster_duplicates, remove_duplicates
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.example.com/story/", "https://example.com/story"),
+        ("http://m.example.com/story?utm_source=x&utm_medium=y", "https://example.com/story"),
+        ("https://example.com/story?fbclid=abc&id=2&page=1#comments", "https://example.com/story?id=2&page=1"),
+        ("https://example.com/story?page=1&id=2&ref=home", "https://example.com/story?id=2&page=1"),
+        ("https://mobile.Example.COM/Story", "https://example.com/Story"),
+        ("https://youtu.be/dQw4w9WgXcQ?si=share", "https://youtube.com/watch?v=dQw4w9WgXcQ"),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&si=share", "https://youtube.com/watch?v=dQw4w9WgXcQ"),
+        ("https://old.reddit.com/r/python/comments/Abc123/some_title/", "reddit:abc123"),
+        ("https://redd.it/abc123", "reddit:abc123"),
+        ("", None),
+        ("not a url", None),
+        ("https://[invalid", None),
+    ],
+)
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_union_find():
+    clusters = _UnionFind(5)
+    clusters.union(3, 4)
+    clusters.union(1, 4)
+    assert [clusters.find(index) for index in range(5)] == [0, 1, 2, 1, 1]
+    clusters.union(4, 0)
+    assert {clusters.find(index) for index in (0, 1, 3, 4)} == {0}
+    assert clusters.find(2) == 2
+
+
+def post(post_id, title, url="", **fields):
+    return {"id": post_id, "title": title, "url": url or f"https://reddit.com/r/x/comments/{post_id}/", **fields}
+
+
+def test_cluster_by_link_crosspost_and_title():
+    posts = [
+        post("a1", "Court blocks new rule", "https://www.news.example/court-rule?utm_source=reddit"),
+        post("b2", "Completely different headline", "https://news.example/court-rule/"),
+        post("c3", "Court blocks new rule (xpost)", crosspost_parent="t3_a1"),
+        post("d4", "Link to the original thread", "https://old.reddit.com/r/law/comments/a1/court/"),
+        post("e5", "Astronomers detect water vapor on distant exoplanet atmosphere"),
+        post("f6", "Astronomers detect water vapor in distant exoplanet atmosphere"),
+        post("g7", "Astronomers detect methane on nearby moon"),
+        post("h8", "Daily Discussion"),
+        post("i9", "Daily Discussion"),
+    ]
+    assert cluster_duplicates(posts) == [0, 0, 0, 0, 4, 4, 6, 7, 8]
+
+
+def test_remove_duplicates_keeps_best_score():
+    posts = [
+        post("a1", "First story", "https://example.com/a"),
+        post("b2", "Second copy", "https://www.example.com/a/"),
+        post("c3", "Unrelated", "https://example.com/c"),
+    ]
+    assert remove_duplicates(posts, [1.0, 3.0, 2.0]) == [1, 2]
+    assert remove_duplicates(posts, [5.0, 3.0, 2.0]) == [0, 2]
@@ -0,0 +1,131 @@
+"""测试按订阅者组装 Newsletter（scraper/digest.py）：抓取和补充次数只取决于不同 subreddit 和入选帖子的数量"""
+
+import os
+import sys
+import hashlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.digest import DigestBuilder, group_by_selection, invert_index, merge_top_k, normalize_subreddits
+from scraper.profiles import SubredditProfiles
+from scraper.settings import RankingSettings, SelectionSettings
+
+SUBREDDITS = ["python", "science", "worldnews", "rust"]
+CREATED = 1700000000.0
+
+
+def test_normalize_subreddits():
+    names = [" Python", "r/python", "/r/Science", "r/x", "bad name!", "a" * 22, "ask_science", "SCIENCE"]
+    assert normalize_subreddits(names) == ["python", "science", "ask_science"]
+    assert normalize_subreddits([]) == []
+
+
+def test_invert_index():
+    index = {"science": ["b@example.com", "a@example.com"], "python": ["a@example.com"], "rust": []}
+    assert invert_index(index) == {"b@example.com": ("science",), "a@example.com": ("python", "science")}
+
+
+def test_merge_top_k():
+    pools = [[{"id": "a", "score": 9}, {"id": "b", "score": 5}], [], [{"id": "c", "score": 7}, {"id": "d", "score": 1}]]
+    assert [post["id"] for post in merge_top_k(pools, 3)] == ["a", "c", "b"]
+    assert [post["id"] for post in merge_top_k(pools, 10)] == ["a", "c", "b", "d"]
+    assert merge_top_k(pools, 0) == []
+    # 自定义 key：按 ID 升序
+    assert [post["id"] for post in merge_top_k(pools[::2], 2, key=lambda post: post["id"])] == ["a", "b"]
+
+
+def test_group_by_selection():
+    first, second = {"id": "p1"}, {"id": "p2"}
+    digests = {"a@example.com": [first, second], "b@example.com": [second], "c@example.com": [first, second]}
+    assert group_by_selection(digests) == [
+        (["a@example.com", "c@example.com"], [first, second]),
+        (["b@example.com"], [second]),
+    ]
+    assert group_by_selection({}) == []
+
+
+class FakeConfig:
+    def get_include_nsfw(self):
+        return False
+
+    def get_newsletter_posts_limit(self):
+        return 3
+
+    def get_subreddit_profiles(self):
+        return SubredditProfiles()
+
+    def get_ranking_settings(self):
+        return RankingSettings("none", 1.0, 0.0, 0.0)
+
+    def get_selection_settings(self):
+        return SelectionSettings(0, 1.0)
+
+
+def post(subreddit, number):
+    post_id = f"{subreddit}{number}"
+    # 互不相同的标题，避免被当作近似重复去掉
+    words = hashlib.md5(post_id.encode("utf-8")).hexdigest()
+    return {
+        "id": post_id,
+        "title": " ".join(words[i : i + 8] for i in range(0, 32, 8)),
+        "url": f"https://example.com/{post_id}",
+        "subreddit": subreddit,
+        "score": 100 * (SUBREDDITS.index(subreddit) + 1) - number,
+        "created_utc": CREATED,
+        "over_18": False,
+    }
+
+
+class FakeScraper:
+    """按 subreddit 返回固定帖子，记录抓取和补充的次数"""
+
+    def __init__(self):
+        self.config = FakeConfig()
+        self.fetches = Counter()
+        self.enriched = Counter()
+
+    def fetch_subreddit_posts(self, subreddit):
+        self.fetches[subreddit] += 1
+        return [post(subreddit, number) for number in range(5)]
+
+    def iter_enriched(self, posts):
+        for item in posts:
+            self.enriched[item["id"]] += 1
+            yield item
+
+
+def build(index):
+    scraper = FakeScraper()
+    digests = DigestBuilder(scraper.config, scraper).build(index)
+    return scraper, digests
+
+
+def test_build_selects_per_subscriber():
+    scraper, digests = build({"python": ["a@example.com", "b@example.com"], "rust": ["b@example.com"]})
+    assert [item["id"] for item in digests["a@example.com"]] == ["python0", "python1", "python2"]
+    assert [item["id"] for item in digests["b@example.com"]] == ["rust0", "rust1", "rust2"]
+    assert scraper.fetches == {"python": 1, "rust": 1}
+    assert sorted(scraper.enriched) == ["python0", "python1", "python2", "rust0", "rust1", "rust2"]
+
+
+def test_build_cost_scales_with_unique_subreddits():
+    few = {subreddit: ["a@example.com"] for subreddit in SUBREDDITS[:2]}
+    many = {subreddit: [] for subreddit in SUBREDDITS[:2]}
+    for number in range(60):
+        many[SUBREDDITS[number % 2]].append(f"user{number}@example.com")
+        if number % 3 == 0:
+            many[SUBREDDITS[(number + 1) % 2]].append(f"user{number}@example.com")
+
+    few_scraper, _ = build(few)
+    many_scraper, digests = build(many)
+    assert len(digests) == 60
+    # 订阅者增加 60 倍：每个 subreddit 仍只抓取一次，每个入选帖子只补充一次
+    assert many_scraper.fetches == few_scraper.fetches == {"python": 1, "science": 1}
+    assert set(many_scraper.enriched.values()) == {1}
+    assert len(many_scraper.enriched) == 6
+
+    # 多一个不同的 subreddit 才多一次抓取
+    many["worldnews"] = ["user0@example.com"]
+    more_scraper, _ = build(many)
+    assert sum(more_scraper.fetches.values()) == 3
@@ -0,0 +1,76 @@
+"""测试有界线程池（scraper/executor.py）：排队已满时立即拒绝，API 返回 429"""
+
+import os
+import sys
+import asyncio
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper.executor import BoundedExecutor, ExecutorOverloaded
+
+
+def wait_for_idle(pool: BoundedExecutor):
+    """名额在 Future 的完成回调中释放，result() 返回时回调可能还没有执行"""
+    deadline = time.time() + 5
+    while pool.pending and time.time() < deadline:
+        time.sleep(0.001)
+    assert pool.pending == 0
+
+
+@pytest.fixture
+def blocked_pool():
+    """一个工作线程、一个排队位置，两个任务都在等待 release"""
+    release = threading.Event()
+    pool = BoundedExecutor("io", max_workers=1, max_queue=1)
+    futures = [pool.submit(release.wait, 5), pool.submit(release.wait, 5)]
+    yield pool, release, futures
+    release.set()
+    pool.shutdown(wait=True)
+
+
+def test_rejects_when_full(blocked_pool):
+    pool, release, futures = blocked_pool
+    assert pool.pending == 2
+    with pytest.raises(ExecutorOverloaded) as info:
+        pool.submit(lambda: None)
+    assert (info.value.pool, info.value.capacity) == ("io", 2)
+    assert pool.pending == 2
+
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == [True, True]
+    wait_for_idle(pool)
+    assert pool.submit(lambda: "ok").result(timeout=5) == "ok"
+    wait_for_idle(pool)
+
+
+def test_failed_task_releases_slot():
+    pool = BoundedExecutor("test", max_workers=1, max_queue=0)
+    try:
+        future = pool.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+        wait_for_idle(pool)
+        assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+        wait_for_idle(pool)
+        assert pool.status() == {"workers": 1, "capacity": 1, "pending": 0}
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_api_returns_429_when_io_pool_is_full(monkeypatch, blocked_pool):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from api import app as api_app
+
+    monkeypatch.setattr(api_app, "warm_up", lambda: None)
+    with TestClient(api_app.app) as client:
+        monkeypatch.setattr(api_app, "io_pool", blocked_pool[0])
+        response = client.get("/api/posts/python?listing=hot")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert "at capacity" in response.json()["detail"]
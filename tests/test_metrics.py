@@ -0,0 +1,60 @@
+"""测试 scraper/metrics.py：短命线程的分片在线程结束后并入基础分片，文本格式的元数据与样本名一致"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.metrics import OPENAI_TOKENS, Counter, Histogram, render
+
+
+def run_threads(target, count: int):
+    for _ in range(count):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+
+def test_counter_folds_finished_threads():
+    counter = Counter("test_folded_total", "test", ["kind"])
+    counter.labels(kind="main").inc()
+    run_threads(lambda: counter.labels(kind="worker").inc(2), 50)
+
+    assert counter.values() == {("main",): 1, ("worker",): 100}
+    # 主线程的分片和最后一个线程结束前注册的分片（尚未并入）
+    assert len(counter._shards) <= 2
+    assert counter.values() == {("main",): 1, ("worker",): 100}
+    assert len(counter._shards) == 1
+
+
+def test_histogram_folds_finished_threads():
+    histogram = Histogram("test_folded_seconds", "test", buckets=(1.0,))
+    run_threads(lambda: histogram.observe(0.5), 20)
+    run_threads(lambda: histogram.observe(2.0), 10)
+
+    lines = histogram.collect()
+    assert 'test_folded_seconds_bucket{le="1"} 20' in lines
+    assert 'test_folded_seconds_bucket{le="+Inf"} 30' in lines
+    assert "test_folded_seconds_count 30" in lines
+    assert histogram._shards == []
+    # 合并不修改基础分片
+    assert histogram.collect() == lines
+
+
+def test_render_counter_family_matches_samples():
+    OPENAI_TOKENS.labels(model="m", type="prompt").inc(3)
+    lines = render().splitlines()
+    start = lines.index("# TYPE openai_tokens_total counter")
+    assert lines[start - 1] == "# HELP openai_tokens_total OpenAI tokens used"
+    assert 'openai_tokens_total{model="m",type="prompt"} 3' in lines
+
+    # 每个 # TYPE 之后的样本都属于同一个指标族
+    family = None
+    for line in lines:
+        if line.startswith("# TYPE "):
+            _, _, family, kind = line.split(" ")
+            suffixes = ("_bucket", "_sum", "_count") if kind == "histogram" else ("",)
+        elif not line.startswith("#"):
+            name = line.split("{")[0].split(" ")[0]
+            assert any(name == family + suffix for suffix in suffixes), line
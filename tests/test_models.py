@@ -0,0 +1,118 @@
+"""测试帖子和评论记录（scraper/models.py）的字典兼容行为"""
+
+import os
+import sys
+import copy
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper.models import Comment, Post, as_dict, json_default
+
+
+def make_post(**overrides) -> Post:
+    fields = dict(
+        id="abc",
+        title="A title",
+        author="someone",
+        url="https://example.com/a",
+        permalink="https://reddit.com/r/python/comments/abc/",
+        subreddit="python",
+        score=42,
+        num_comments=7,
+        created_utc=1700000000.0,
+    )
+    fields.update(overrides)
+    return Post(**fields)
+
+
+def test_enrichment_fields_missing_until_assigned():
+    post = make_post()
+    assert "score" in post
+    assert "gpt_summary" not in post
+    assert "top_comments" not in post
+    assert post.get("gpt_summary") is None
+    assert post.get("gpt_summary", "") == ""
+    with pytest.raises(KeyError):
+        post["gpt_summary"]
+
+    post["gpt_summary"] = "summary"
+    assert "gpt_summary" in post
+    assert post["gpt_summary"] == "summary"
+
+    del post["gpt_summary"]
+    assert "gpt_summary" not in post
+    with pytest.raises(KeyError):
+        del post["gpt_summary"]
+
+
+def test_unknown_keys_go_to_extra():
+    post = make_post()
+    assert "sent_at" not in post
+    post["sent_at"] = "2024-01-01"
+    assert post["sent_at"] == "2024-01-01"
+    assert post.get("sent_at") == "2024-01-01"
+    assert list(post)[-1] == "sent_at"
+    assert len(post) == len(Post.BASE_FIELDS) + 1
+    with pytest.raises(KeyError):
+        post["missing"]
+
+
+def test_setdefault_and_update():
+    post = make_post()
+    assert post.setdefault("comment_summary", "") == ""
+    assert post.setdefault("comment_summary", "other") == ""
+    assert post.setdefault("score", 0) == 42
+
+    post.update({"score": 50, "gpt_summary": "s", "extra": 1}, num_comments=9)
+    assert (post["score"], post["gpt_summary"], post["extra"], post["num_comments"]) == (50, "s", 1, 9)
+
+
+def test_round_trip():
+    post = make_post(crosspost_parent="t3_xyz")
+    post["top_comments"] = [Comment("bob", "nice", 3, 1700000100.0)]
+    post["sent_at"] = "2024-01-01"
+
+    data = as_dict(post)
+    assert type(data) is dict
+    assert data["top_comments"] == [{"author": "bob", "body": "nice", "score": 3, "created_utc": 1700000100.0}]
+    assert type(data["top_comments"][0]) is dict
+
+    loaded = Post.from_dict(json.loads(json.dumps(data)))
+    assert isinstance(loaded["top_comments"][0], Comment)
+    assert loaded == post
+    assert dict(loaded) == dict(post)
+
+    # 数据库中的旧数据可能缺少基础字段
+    partial = Post.from_dict({"id": "p", "score": 1})
+    assert partial.to_dict() == {"id": "p", "score": 1}
+    assert "title" not in partial
+
+
+def test_json_default():
+    post = make_post()
+    post["top_comments"] = [Comment("bob", "nice", 3, None)]
+    encoded = json.loads(json.dumps([post], default=json_default))
+    assert encoded == [as_dict(post)]
+
+    with pytest.raises(TypeError):
+        json.dumps(post)
+    with pytest.raises(TypeError):
+        json.dumps({"value": object()}, default=json_default)
+
+
+def test_copy():
+    post = make_post()
+    post["top_comments"] = [Comment("bob", "nice", 3, None)]
+    post["sent_at"] = "2024-01-01"
+
+    for duplicate in (post.copy(), copy.copy(post), copy.deepcopy(post)):
+        assert type(duplicate) is Post
+        assert duplicate == post
+        duplicate["score"] = 0
+        duplicate["sent_at"] = "later"
+        assert post["score"] == 42
+        assert post["sent_at"] == "2024-01-01"
+        assert "comment_summary" not in duplicate
@@ -0,0 +1,92 @@
+"""测试流式处理（scraper/pipeline.py）：有界的 TopK 堆和逐批的候选收集"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.pipeline import StreamingPipeline, TopK
+from scraper.profiles import SubredditProfiles
+from scraper.settings import RankingSettings
+
+
+def test_topk_at_capacity_with_ties():
+    top = TopK(3)
+    assert [top.push(score, name) for score, name in [(1, "a"), (2, "b"), (2, "c")]] == [True, True, True]
+    assert len(top) == 3
+
+    # 分数相同时先加入的元素优先：与堆中最低分相同的新元素不能挤出旧元素
+    assert top.push(1, "d") is False
+    assert top.push(2, "e") is True
+    assert top.items() == [(2, "b"), (2, "c"), (2, "e")]
+    assert top.push(2, "f") is False
+    assert top.push(0, "g") is False
+    assert top.push(3, "h") is True
+    assert top.items() == [(3, "h"), (2, "b"), (2, "c")]
+    assert len(top) == 3
+
+
+def test_topk_zero_capacity():
+    top = TopK(0)
+    assert top.push(10, "a") is False
+    assert top.items() == [] and len(top) == 0
+
+
+class FakeConfig:
+    def get_newsletter_posts_limit(self):
+        return 2
+
+    def get_subreddit_profiles(self):
+        return SubredditProfiles()
+
+    def get_ranking_settings(self):
+        return RankingSettings("none", 1.0, 0.0, 0.0)
+
+    def get_include_nsfw(self):
+        return False
+
+    def get_target_subreddits(self):
+        return ["python", "science"]
+
+    def get_comment_fetch_concurrency(self):
+        return 2
+
+
+class FakeScraper:
+    def __init__(self):
+        self.config = FakeConfig()
+
+    def _get_top_comments(self, post_id, limit):
+        return [{"author": "bob", "body": f"on {post_id}", "score": 1, "created_utc": None}]
+
+
+def post(post_id, subreddit, score, over_18=False):
+    return {
+        "id": post_id,
+        "title": f"Story {post_id}",
+        "url": f"https://example.com/{post_id}",
+        "subreddit": subreddit,
+        "score": score,
+        "over_18": over_18,
+    }
+
+
+def test_candidates_stream_batches():
+    batches = [
+        ("python", [post("p1", "python", 50), post("p2", "python", 40), post("nsfw", "python", 99, over_18=True)]),
+        ("science", [post("s1", "science", 70), post("p1", "python", 50), post("old", "science", 90)]),
+    ]
+    recorded = []
+    with StreamingPipeline(FakeScraper()) as pipeline:
+        posts, scores = pipeline.candidates(
+            batches, keep=lambda batch: [item for item in batch if item["id"] != "old"], on_batch=recorded.extend
+        )
+        # 去重和过滤 NSFW 之后记录快照，keep 过滤之前
+        assert [item["id"] for item in recorded] == ["p1", "p2", "s1", "old"]
+        assert (pipeline.fetched, pipeline.kept) == (4, 3)
+        assert [item["id"] for item in posts] == ["s1", "p1", "p2"]
+        assert scores == [70.0, 50.0, 40.0]
+        # 每批的前 ceil(K / subreddit数) = 1 个帖子在后台预取评论
+        assert set(pipeline.prefetched) == {"p1", "s1"}
+        assert pipeline.prefetched["s1"].result(timeout=5)[0]["body"] == "on s1"
+    assert pipeline._executor is None
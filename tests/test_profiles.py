@@ -0,0 +1,80 @@
+"""测试按 subreddit 的抓取配置（scraper/profiles.py）：覆盖关系、大小写和错误信息"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.profiles import SubredditProfile, SubredditProfiles
+
+BASE = SubredditProfile(limit=40, comment_limit=3)
+
+
+def write_profiles(tmp_path, data) -> str:
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_empty_path_uses_default():
+    errors = []
+    profiles = SubredditProfiles.load("", BASE, errors)
+    assert profiles.get("python") is BASE
+    assert errors == []
+
+
+def test_overrides_build_on_file_default(tmp_path):
+    path = write_profiles(
+        tmp_path,
+        {
+            "default": {"max_age_hours": 12},
+            "subreddits": {"AskScience": {"listing": "top", "time_filter": "week", "weight": 0.5, "enrich": False}},
+        },
+    )
+    errors = []
+    profiles = SubredditProfiles.load(path, BASE, errors)
+    assert errors == []
+    assert profiles.get("python") == SubredditProfile(limit=40, comment_limit=3, max_age_hours=12)
+    science = profiles.get("askscience")
+    assert profiles.get("ASKSCIENCE") is science
+    assert (science.listing, science.time_filter, science.weight, science.enrich) == ("top", "week", 0.5, False)
+    assert (science.limit, science.max_age_hours) == (40, 12)
+
+
+def test_invalid_fields_are_reported(tmp_path):
+    path = write_profiles(
+        tmp_path,
+        {
+            "defaults": {},
+            "subreddits": {"python": {"limit": 0, "comment_limit": 0, "listing": "best", "weight": True, "color": "red"}},
+        },
+    )
+    errors = []
+    profiles = SubredditProfiles.load(path, BASE, errors)
+    assert errors == [
+        f"{path}: unknown key 'defaults'",
+        f"{path}: subreddits.python.limit=0 must be an integer >= 1",
+        f"{path}: subreddits.python.listing='best' must be one of hot, new, rising, top, controversial",
+        f"{path}: subreddits.python.weight=True must be a number > 0",
+        f"{path}: subreddits.python.color is not a profile field",
+    ]
+    # 合法的字段仍然生效
+    assert profiles.get("python") == SubredditProfile(limit=40, comment_limit=0)
+
+
+def test_unreadable_files(tmp_path):
+    errors = []
+    missing = str(tmp_path / "missing.json")
+    assert SubredditProfiles.load(missing, BASE, errors).default is BASE
+    assert errors[0].startswith(f"SUBREDDIT_PROFILES_FILE={missing!r} could not be read")
+
+    errors = []
+    path = write_profiles(tmp_path, ["python"])
+    assert SubredditProfiles.load(path, BASE, errors).overrides == {}
+    assert errors == [f"{path} must contain a JSON object"]
+
+    errors = []
+    path = write_profiles(tmp_path, {"default": [], "subreddits": []})
+    SubredditProfiles.load(path, BASE, errors)
+    assert errors == [f"{path}: default must be an object", f"{path}: subreddits must be an object"]
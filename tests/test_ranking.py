@@ -0,0 +1,62 @@
+"""测试批量排序（scraper/ranking.py）：按 subreddit 的 z-score，包括只有一条帖子和方差为 0 的组"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from scraper.profiles import SubredditProfile, SubredditProfiles
+from scraper.ranking import _grouped_zscore, _subreddit_groups, _zscore, rank_scores, top_k_indices
+from scraper.settings import RankingSettings
+
+NOW = 1700000000.0
+
+
+def post(subreddit, score, hours=2.0, num_comments=0):
+    return {"subreddit": subreddit, "score": score, "created_utc": NOW - hours * 3600, "num_comments": num_comments}
+
+
+def test_grouped_zscore_single_member_and_constant_groups():
+    values = np.array([1.0, 2.0, 3.0, 7.0, 5.0, 5.0])
+    groups = np.array([0, 0, 0, 1, 2, 2])
+    result = _grouped_zscore(values, groups, 3)
+    assert np.isfinite(result).all()
+    np.testing.assert_allclose(result[:3], _zscore(values[:3]))
+    # 只有一条帖子的组和方差为 0 的组（std = 0）结果为 0
+    assert result[3] == 0.0
+    assert result[4:].tolist() == [0.0, 0.0]
+
+
+def test_subreddit_groups_ignore_case():
+    groups, names = _subreddit_groups([{"subreddit": "Python"}, {"subreddit": "science"}, {"subreddit": "python"}])
+    assert groups.tolist() == [0, 1, 0]
+    assert names == ["python", "science"]
+
+
+def test_single_post_subreddit_ranks_at_group_mean():
+    profiles = SubredditProfiles()
+    ranking = RankingSettings("zscore", score_weight=1.0, velocity_weight=0.5, comment_weight=0.0)
+    posts = [post("AskReddit", 50000), post("askreddit", 20000), post("askreddit", 100), post("tinysub", 12)]
+    scores = rank_scores(posts, profiles, ranking, now=NOW)
+    assert np.isfinite(scores).all()
+    assert scores[3] == 0.0
+    assert scores[0] > scores[3] > scores[2]
+
+
+def test_profile_weight_and_no_normalization():
+    profiles = SubredditProfiles(overrides={"science": SubredditProfile(weight=2.0)})
+    posts = [post("python", 100), post("science", 100)]
+    plain = rank_scores(posts, profiles, RankingSettings("none", 1.0, 0.5, 0.2), now=NOW)
+    assert plain.tolist() == [100.0, 200.0]
+    ranked = rank_scores(posts, profiles, RankingSettings("zscore", 1.0, 0.5, 0.0), now=NOW)
+    np.testing.assert_allclose(ranked, [0.0, np.log(2.0)])
+
+
+def test_top_k_indices_with_ties():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+    # 部分排序时相同分数的取舍不确定，只保证分数
+    assert scores[top_k_indices(scores, 2)].tolist() == [3.0, 3.0]
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 4, 3, 0]
+    assert top_k_indices(scores, 0).tolist() == []
@@ -0,0 +1,64 @@
+"""测试 Reddit 令牌桶（scraper/ratelimit.py）：按响应头补充令牌，配额用完时等到窗口重置"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("prawcore")
+from scraper.ratelimit import DEFAULT_RATE, RedditRateLimiter, request_kind  # noqa: E402
+
+
+def headers(remaining, reset, used=0):
+    return {"x-ratelimit-remaining": str(remaining), "x-ratelimit-reset": str(reset), "x-ratelimit-used": str(used)}
+
+
+def test_request_kind():
+    assert request_kind("https://oauth.reddit.com/r/python/hot") == "listing"
+    assert request_kind("https://oauth.reddit.com/api/info?id=t3_abc") == "info"
+    assert request_kind("https://oauth.reddit.com/comments/abc") == "comments"
+    assert request_kind("https://oauth.reddit.com/api/morechildren") == "comments"
+
+
+def test_refill_rate_follows_headers():
+    limiter = RedditRateLimiter(burst=2, reserve=10)
+    assert limiter.acquire() < 0.1
+    assert limiter.acquire() < 0.1
+
+    # 剩余配额（扣除 reserve）平均分配到窗口剩余的时间：每秒 100 个令牌
+    limiter.update(headers(110, 1, used=490))
+    assert limiter._rate == pytest.approx(100)
+    waited = limiter.acquire("comments")
+    assert 0 < waited < 0.5
+
+    stats = limiter.stats()
+    assert stats["requests"] == {"listing": 2, "info": 0, "comments": 1}
+    assert stats["min_remaining"] == 110
+    assert stats["window_quota"] == 600
+    assert stats["utilization"] == pytest.approx(490 / 600, abs=1e-4)
+
+
+def test_exhausted_quota_waits_for_reset():
+    limiter = RedditRateLimiter(burst=5, reserve=0)
+    limiter.update(headers(0, 0.3, used=600))
+    assert limiter._tokens == 0
+    assert limiter._rate == 0
+
+    start = time.time()
+    limiter.acquire()
+    # 窗口重置之前不发放令牌，重置之后按默认速率补充
+    assert time.time() - start >= 0.29
+    assert limiter._reset_at is None
+    assert limiter._rate == DEFAULT_RATE
+    assert limiter.stats()["min_remaining"] == 0
+
+
+def test_ignores_incomplete_headers():
+    limiter = RedditRateLimiter(burst=3)
+    limiter.update({"x-ratelimit-remaining": "5"})
+    limiter.update(headers("n/a", 10))
+    assert limiter._rate == DEFAULT_RATE
+    assert limiter.stats()["window_quota"] is None
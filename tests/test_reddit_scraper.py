@@ -0,0 +1,44 @@
+"""测试候选不足时向列表深处翻页（RedditScraper.deepen_candidates）的边界情况，不访问 Reddit"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.reddit_scraper import RedditScraper
+from scraper.settings import SelectionSettings
+
+
+class FakeConfig:
+    def __init__(self, subreddits):
+        self.subreddits = subreddits
+
+    def get_reddit_read_only(self):
+        return True
+
+    def get_enable_gpt_summaries(self):
+        return False
+
+    def get_newsletter_posts_limit(self):
+        return 5
+
+    def get_deepen_max_requests(self):
+        return 4
+
+    def get_deepen_min_score(self):
+        return 0
+
+    def get_target_subreddits(self):
+        return self.subreddits
+
+    def get_selection_settings(self):
+        return SelectionSettings(3, 0.7)
+
+
+def test_deepen_without_target_subreddits(monkeypatch):
+    monkeypatch.setattr(RedditScraper, "_initialize_reddit_client", lambda self: None)
+    scraper = RedditScraper(FakeConfig(()))
+    candidates = [{"id": "a", "subreddit": "python", "score": 10}]
+    assert scraper.deepen_candidates(candidates, keep=lambda posts: posts) is candidates
+    assert scraper.deepen_candidates([], keep=lambda posts: posts) == []
+    assert scraper.request_stats["deepen"] == 0
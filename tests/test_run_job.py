@@ -0,0 +1,36 @@
+"""测试任务入口（scraper/run_job.py）的命令行参数"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper import run_job
+
+
+def test_defaults_and_modes():
+    args = run_job.parse_args([])
+    assert not (args.test or args.distributed or args.digest or args.refresh)
+    assert (args.record, args.replay) == (None, None)
+    args = run_job.parse_args(["--digest", "--replay", "cassettes/monday"])
+    assert (args.digest, args.record, args.replay) == (True, None, "cassettes/monday")
+
+
+@pytest.mark.parametrize("argv", [["--record"], ["--record", "a", "--replay", "b"], ["--digest", "--refresh"], ["--bogus"]])
+def test_rejects_invalid_arguments(argv, capsys):
+    with pytest.raises(SystemExit) as info:
+        run_job.parse_args(argv)
+    assert info.value.code == 2
+    assert "usage:" in capsys.readouterr().err
+
+
+def test_main_configures_cassette(monkeypatch):
+    monkeypatch.setenv("HTTP_CASSETTE_MODE", "off")
+    monkeypatch.setenv("HTTP_CASSETTE", "")
+    calls = []
+    monkeypatch.setattr(run_job, "run_refresh_job", lambda: calls.append(os.environ["HTTP_CASSETTE_MODE"]))
+    run_job.main(["--refresh", "--record", "cassettes/monday"])
+    assert calls == ["record"]
+    assert os.environ["HTTP_CASSETTE"] == "cassettes/monday"
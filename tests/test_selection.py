@@ -0,0 +1,81 @@
+"""测试多样性选择（scraper/selection.py）：分数相同时的惰性贪心 MMR，以及没有特征的标题"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper.selection import NEAR_DUPLICATE_SIMILARITY, _relevance, select_diverse
+from scraper.sketches import similarity, simhash, simhash_many
+
+TITLES = [
+    "Python 3.13 released with experimental free-threaded build",
+    "Python 3.13 released with an experimental free-threaded build",
+    "Rust compiler gets faster incremental builds",
+    "New study links sleep quality and memory consolidation",
+    "Free-threaded Python build benchmarks published",
+    "SpaceX launches another batch of Starlink satellites",
+    "Rust compiler incremental builds are faster now",
+    "Scientists map memory consolidation during deep sleep",
+    "European parliament votes on new AI regulation",
+    "AI regulation vote passes European parliament",
+]
+
+
+def brute_force_mmr(scores, sketches, k, mmr_lambda):
+    """参考实现：每一步和全部已入选帖子比较，分数相同时取下标最小的候选"""
+    relevance = _relevance(scores)
+    selected = []
+    remaining = list(range(len(scores)))
+    while remaining and len(selected) < k:
+        best = None
+        for index in remaining:
+            max_similarity = max((similarity(sketches[index], sketches[chosen]) for chosen in selected), default=0.0)
+            if max_similarity >= NEAR_DUPLICATE_SIMILARITY:
+                continue
+            value = mmr_lambda * relevance[index] - (1 - mmr_lambda) * max_similarity
+            if best is None or value > best[0]:
+                best = (value, index)
+        if best is None:
+            break
+        selected.append(best[1])
+        remaining.remove(best[1])
+    return selected
+
+
+@pytest.mark.parametrize("mmr_lambda", [1.0, 0.7, 0.5, 0.0])
+def test_equal_scores_match_brute_force(mmr_lambda):
+    sketches = simhash_many(TITLES)
+    scores = [1.0] * len(TITLES)
+    for k in range(1, len(TITLES) + 1):
+        expected = brute_force_mmr(scores, sketches, k, mmr_lambda)
+        assert select_diverse(["news"] * len(TITLES), scores, sketches, k, mmr_lambda=mmr_lambda) == expected
+
+
+def test_equal_scores_keep_input_order_without_penalty():
+    sketches = simhash_many(TITLES[2:6])
+    assert select_diverse(["a", "b", "c", "d"], [5.0] * 4, sketches, 3) == [0, 1, 2]
+
+
+def test_near_duplicates_skipped():
+    sketches = [simhash(TITLES[0]), simhash(TITLES[0]), simhash(TITLES[2])]
+    assert select_diverse(["a", "b", "c"], [1.0, 1.0, 1.0], sketches, 3) == [0, 2]
+
+
+def test_subreddit_cap_backfills_with_equal_scores():
+    sketches = simhash_many(TITLES[2:5])
+    subreddits = ["python", "python", "science"]
+    assert select_diverse(subreddits, [1.0] * 3, sketches, 2, subreddit_cap=1) == [0, 2]
+    assert select_diverse(subreddits, [1.0] * 3, sketches, 3, subreddit_cap=1) == [0, 2, 1]
+
+
+def test_zero_feature_titles_are_not_duplicates():
+    titles = ["🎉🎉🎉", "The and of it", "!!!", TITLES[0]]
+    sketches = simhash_many(titles)
+    assert sketches[:3] == [0, 0, 0]
+    assert similarity(0, 0) == 0.0
+    assert similarity(0, sketches[3]) == 0.0
+    assert similarity(sketches[3], sketches[3]) == 1.0
+    assert select_diverse(["a"] * 4, [1.0] * 4, sketches, 4, mmr_lambda=0.5) == [0, 1, 2, 3]
@@ -0,0 +1,118 @@
+"""测试配置快照（scraper/settings.py）：取值范围校验、错误汇总、回放延迟解析和 .env 的重新加载"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("dotenv")
+from scraper.settings import CassetteSettings, Settings, SettingsError, SettingsStore, _EnvParser  # noqa: E402
+
+
+def test_env_parser_numbers_and_ranges():
+    env = _EnvParser({"A": "5", "B": " ", "C": "x", "D": "0", "E": "70000", "F": "2.5", "G": "hot"})
+    assert env.integer("A", 1, 1) == 5
+    assert env.integer("B", 7, 1) == 7
+    assert env.integer("MISSING", 3) == 3
+    assert env.integer("C", 1) == 1
+    assert env.integer("D", 1, 1) == 0
+    assert env.integer("E", 1, 1, 65535) == 70000
+    assert env.number("F", 1.0, 0, 3) == 2.5
+    assert env.choice("G", "new", ("hot", "new")) == "hot"
+    assert env.choice("A", "new", ("hot", "new")) == "new"
+    assert env.errors == [
+        "C='x' is not a valid int",
+        "D=0 must be >= 1",
+        "E=70000 must be <= 65535",
+        "A='5' must be one of hot, new",
+    ]
+
+
+def test_env_parser_text_flags_and_items():
+    env = _EnvParser({"FLAG": "TRUE", "LIST": " python, ,science ,", "EMPTY": ""})
+    assert env.flag("FLAG", False) is True
+    assert env.flag("MISSING", True) is True
+    assert env.items("LIST") == ("python", "science")
+    assert env.items("EMPTY", "a,b") == ()
+    assert env.text("MISSING", "default") == "default"
+    assert env.errors == []
+
+
+def test_settings_errors_are_aggregated():
+    with pytest.raises(SettingsError) as info:
+        Settings.from_env({"POSTS_LIMIT": "0", "SMTP_PORT": "abc", "RANKING_NORMALIZATION": "median"})
+    errors = info.value.errors
+    assert len(errors) == 3
+    assert "POSTS_LIMIT=0 must be >= 1" in errors
+    assert "SMTP_PORT='abc' is not a valid int" in errors
+    assert any(error.startswith("RANKING_NORMALIZATION='median'") for error in errors)
+    assert str(info.value).startswith("Invalid configuration: ")
+
+
+def test_settings_defaults():
+    settings = Settings.from_env({"TARGET_SUBREDDITS": "python,science", "POSTS_LIMIT": "40"})
+    assert settings.target_subreddits == ("python", "science")
+    assert settings.subreddit_profiles.get("python").limit == 40
+    assert settings.cassette.mode == "off"
+
+
+@pytest.mark.parametrize(
+    "latency, expected",
+    [("original", (1.0, 0.0)), ("none", (0.0, 0.0)), ("2x", (2.0, 0.0)), ("0.5X", (0.5, 0.0)), ("50", (0.0, 50.0))],
+)
+def test_cassette_latency(latency, expected):
+    env = _EnvParser({"HTTP_CASSETTE_LATENCY": latency})
+    settings = CassetteSettings.from_env(env)
+    assert (settings.latency_scale, settings.latency_ms) == expected
+    assert env.errors == []
+
+
+@pytest.mark.parametrize("latency", ["fast", "-2x", "-5", "x"])
+def test_cassette_latency_invalid(latency):
+    env = _EnvParser({"HTTP_CASSETTE_LATENCY": latency})
+    settings = CassetteSettings.from_env(env)
+    assert (settings.latency_scale, settings.latency_ms) == (1.0, 0.0)
+    assert len(env.errors) == 1 and env.errors[0].startswith("HTTP_CASSETTE_LATENCY=")
+
+
+def test_cassette_requires_path():
+    env = _EnvParser({"HTTP_CASSETTE_MODE": "replay"})
+    assert CassetteSettings.from_env(env).mode == "replay"
+    assert env.errors == ["HTTP_CASSETTE must be set when HTTP_CASSETTE_MODE=replay"]
+
+
+def write_env(path, text: str, mtime_ns: int):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_store_reload_keeps_previous_snapshot_on_error(tmp_path, monkeypatch):
+    environ = {key: value for key, value in os.environ.items() if key not in ("TARGET_SUBREDDITS", "POSTS_LIMIT")}
+    environ["NEWSLETTER_POSTS_LIMIT"] = "7"
+    monkeypatch.setattr(os, "environ", environ)
+    env_file = tmp_path / ".env"
+    write_env(env_file, "TARGET_SUBREDDITS=python\nPOSTS_LIMIT=30\nNEWSLETTER_POSTS_LIMIT=3\n", 1_000_000_000)
+
+    store = SettingsStore(str(env_file))
+    settings = store.get()
+    assert settings.target_subreddits == ("python",)
+    assert settings.posts_limit == 30
+    # 进程自身的环境变量优先于 .env
+    assert settings.newsletter_posts_limit == 7
+    assert store.reload_if_changed() is False
+
+    # 无效的修改：记录错误，继续使用旧快照，同一次修改不再重复加载
+    write_env(env_file, "TARGET_SUBREDDITS=science\nPOSTS_LIMIT=0\n", 2_000_000_000)
+    assert store.reload_if_changed() is False
+    assert store.settings is settings
+    assert store.reload_if_changed() is False
+
+    # 修正后重新加载；从 .env 删除的变量也从环境变量中移除
+    write_env(env_file, "TARGET_SUBREDDITS=science,worldnews\n", 3_000_000_000)
+    assert store.reload_if_changed() is True
+    assert store.settings.target_subreddits == ("science", "worldnews")
+    assert store.settings.posts_limit == 25
+    assert "POSTS_LIMIT" not in environ
+    assert environ["NEWSLETTER_POSTS_LIMIT"] == "7"
@@ -0,0 +1,66 @@
+"""测试订阅者令牌（scraper/subscriber_token.py）：查询和取消订阅必须带有签名令牌，不能只凭邮箱地址"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scraper.lazy import Lazy
+from scraper.subscriber_token import make_token, read_token, unsubscribe_url
+
+SECRET = "test-secret"
+
+
+def test_token_round_trip():
+    token = make_token("Alice@Example.com", SECRET)
+    assert read_token(token, SECRET) == "alice@example.com"
+    assert read_token(token, "other-secret") is None
+
+    payload, _, signature = token.partition(".")
+    forged = make_token("bob@example.com", SECRET).split(".")[0] + "." + signature
+    assert read_token(forged, SECRET) is None
+    for invalid in ("", "alice@example.com", payload, "%%%." + signature):
+        assert read_token(invalid, SECRET) is None
+
+
+def test_unsubscribe_url():
+    assert unsubscribe_url("", "alice@example.com", SECRET) is None
+    url = unsubscribe_url("https://news.example.com/", "alice@example.com", SECRET)
+    assert url == "https://news.example.com/api/unsubscribe/" + make_token("alice@example.com", SECRET)
+
+
+class FakeDB:
+    def __init__(self):
+        self.subscribers = {"alice@example.com": {"email": "alice@example.com", "active": True, "subreddits": ["python"]}}
+
+    def get_subscriber(self, email):
+        return self.subscribers.get(email)
+
+    def deactivate_subscriber(self, email):
+        return self.subscribers.pop(email, None) is not None
+
+    def close(self):
+        pass
+
+
+def test_subscription_endpoints_require_token(monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from api import app as api_app
+
+    monkeypatch.setattr(api_app, "warm_up", lambda: None)
+    monkeypatch.setattr(api_app, "db_manager", Lazy("database", FakeDB))
+    with TestClient(api_app.app) as client:
+        token = make_token("alice@example.com", api_app.config_manager.get_web_secret_key())
+        assert client.get("/api/subscribe/alice@example.com").status_code == 403
+        assert client.delete("/api/subscribe/alice@example.com").status_code == 403
+        assert client.post("/api/unsubscribe/" + make_token("alice@example.com", "guessed")).status_code == 403
+
+        response = client.get(f"/api/subscribe/{token}")
+        assert response.status_code == 200
+        assert response.json()["subreddits"] == ["python"]
+        assert client.post(f"/api/unsubscribe/{token}").status_code == 200
+        assert client.delete(f"/api/subscribe/{token}").status_code == 404
@@ -0,0 +1,58 @@
+"""测试 scraper/tracing.py：并发的任务各自记录运行，线程池中的 span 通过 bind 记录到提交方的运行"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import tracing
+
+
+def test_concurrent_runs_are_isolated():
+    started = threading.Barrier(2)
+    runs = {}
+
+    def job(name: str):
+        tracing.start_run(name)
+        started.wait()
+        with tracing.span("stage.fetch"):
+            tracing.incr("posts.fetched", len(name))
+        started.wait()
+        runs[name] = tracing.end_run(success=True)
+
+    threads = [threading.Thread(target=job, args=(name,)) for name in ("a", "bbb")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert runs["a"].job_name == "a"
+    assert runs["a"].counters == {"posts.fetched": 1}
+    assert runs["bbb"].counters == {"posts.fetched": 3}
+    assert runs["a"].stages["stage.fetch"].count == 1
+    assert tracing.current_run() is None
+
+
+def test_bind_carries_run_into_pool():
+    def work(value: int) -> int:
+        with tracing.span("worker"):
+            tracing.incr("work", value)
+        return value
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # 没有绑定的任务不记录
+        run = tracing.start_run("pool")
+        try:
+            assert list(pool.map(work, [1, 2])) == [1, 2]
+            assert run.counters == {}
+            assert list(pool.map(tracing.bind(work), [1, 2, 3])) == [1, 2, 3]
+        finally:
+            tracing.end_run()
+        # 绑定只在调用期间生效，线程池中的线程不会保留提交方的运行
+        assert pool.submit(tracing.current_run).result() is None
+
+    assert run.counters == {"work": 6}
+    assert run.stages["worker"].count == 3
+    assert tracing.bind(work) is work
@@ -0,0 +1,92 @@
+"""测试按分数快照计算的趋势特征（scraper/trending.py）：速度、加速度和退回平均速度的情况"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from scraper.profiles import SubredditProfiles
+from scraper.settings import TrendingSettings
+from scraper.trending import MomentumRanker, momentum_features
+
+NOW = 1700000000.0
+HOUR = 3600.0
+
+
+def post(post_id, score, age_hours=10.0, subreddit="python"):
+    return {"id": post_id, "score": score, "created_utc": NOW - age_hours * HOUR, "subreddit": subreddit}
+
+
+def window(last, base, prior, last_ago=0.0, base_ago=3.0, prior_ago=6.0):
+    return {
+        "last_ts": NOW - last_ago * HOUR,
+        "last_score": last,
+        "base_ts": NOW - base_ago * HOUR,
+        "base_score": base,
+        "prior_ts": NOW - prior_ago * HOUR,
+        "prior_score": prior,
+    }
+
+
+def test_momentum_features():
+    posts = [
+        post("rising", 400),
+        post("slowing", 400),
+        post("recent_only", 300),
+        post("single", 500),
+        post("unknown", 500),
+        post("fresh", 100, age_hours=1 / 60),
+    ]
+    windows = {
+        "rising": window(400, 100, 40),
+        "slowing": window(400, 250, 10),
+        # 没有两个窗口前的快照：prior 为窗口内最早的快照，与 base 相同
+        "recent_only": window(300, 60, 60, base_ago=2.0, prior_ago=2.0),
+        # 只有一个快照：三个锚点相同
+        "single": window(500, 500, 500, base_ago=0.0, prior_ago=0.0),
+    }
+    velocity, acceleration = momentum_features(posts, windows, 3.0, now=NOW)
+
+    np.testing.assert_allclose(velocity, [100.0, 50.0, 120.0, 50.0, 50.0, 400.0])
+    # (最近窗口速度 - 前一窗口速度) / 窗口长度
+    np.testing.assert_allclose(acceleration, [(100.0 - 20.0) / 3, (50.0 - 80.0) / 3, 0.0, 0.0, 0.0, 0.0])
+    assert np.isfinite(velocity).all() and np.isfinite(acceleration).all()
+
+
+class FakeConfig:
+    def get_trending_settings(self):
+        return TrendingSettings(window_hours=3.0, acceleration_weight=0.5)
+
+    def get_subreddit_profiles(self):
+        return SubredditProfiles()
+
+
+class FakeDB:
+    def __init__(self, windows):
+        self.windows = windows
+
+    def get_snapshot_windows(self, post_ids, window_hours):
+        return {post_id: self.windows[post_id] for post_id in post_ids if post_id in self.windows}
+
+
+def test_momentum_ranker_prefers_rising_posts():
+    posts = [post("stale", 5000, age_hours=20), post("rising", 800, age_hours=4), post("flat", 800, age_hours=4)]
+    windows = {
+        "stale": window(5000, 4990, 4980),
+        "rising": window(800, 300, 100),
+        "flat": window(800, 770, 740),
+    }
+    scores = MomentumRanker(FakeConfig(), FakeDB(windows)).scores(posts, now=NOW)
+    assert scores.argmax() == 1
+    assert scores[1] > scores[2] > scores[0]
+    assert MomentumRanker(FakeConfig(), FakeDB({})).scores([], now=NOW).size == 0
+
+
+@pytest.mark.parametrize("hours", [0.25, 3.0])
+def test_single_post_subreddit_is_finite(hours):
+    posts = [post("only", 10, age_hours=hours, subreddit="tinysub")]
+    scores = MomentumRanker(FakeConfig(), FakeDB({})).scores(posts, now=NOW)
+    assert np.isfinite(scores).all()
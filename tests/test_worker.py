@@ -0,0 +1,26 @@
+"""测试队列 worker（scraper/worker.py）的命令行参数"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("psycopg2")
+from scraper.worker import parse_args  # noqa: E402
+
+
+def test_defaults_and_flags():
+    args = parse_args([])
+    assert (args.once, args.max_jobs) == (False, None)
+    args = parse_args(["--once", "--max-jobs", "3"])
+    assert (args.once, args.max_jobs) == (True, 3)
+
+
+@pytest.mark.parametrize("argv", [["--max-jobs"], ["--max-jobs", "x"], ["--max-jobs", "-1"], ["--max-jobs", "0"], ["--bogus"]])
+def test_rejects_invalid_arguments(argv, capsys):
+    with pytest.raises(SystemExit) as info:
+        parse_args(argv)
+    assert info.value.code == 2
+    assert "usage:" in capsys.readouterr().err